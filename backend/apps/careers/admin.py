@@ -1,13 +1,13 @@
 from django.contrib import admin
-from .models import Career, Course, University
+from .models import Career, CareerNeighbor, CareerSkill, Course, Skill, University
 
 
 @admin.register(Career)
 class CareerAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_active', 'created_at')
-    list_filter = ('is_active', 'created_at')
+    list_filter = ('is_active', 'education_level', 'created_at')
     search_fields = ('name', 'description')
-    readonly_fields = ('id', 'created_at', 'updated_at')
+    readonly_fields = ('id', 'salary_min', 'salary_max', 'growth_pct', 'education_level', 'created_at', 'updated_at')
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'description', 'is_active')
@@ -18,6 +18,10 @@ class CareerAdmin(admin.ModelAdmin):
         ('Market Information', {
             'fields': ('average_salary_range', 'job_growth', 'typical_companies')
         }),
+        ('Parsed Attributes', {
+            'fields': ('salary_min', 'salary_max', 'growth_pct', 'education_level'),
+            'classes': ('collapse',)
+        }),
         ('Metadata', {
             'fields': ('id', 'created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -25,6 +29,28 @@ class CareerAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key')
+    search_fields = ('name', 'key')
+    readonly_fields = ('key',)
+
+
+@admin.register(CareerSkill)
+class CareerSkillAdmin(admin.ModelAdmin):
+    list_display = ('career', 'skill', 'position')
+    search_fields = ('career__name', 'skill__name')
+    raw_id_fields = ('career', 'skill')
+
+
+@admin.register(CareerNeighbor)
+class CareerNeighborAdmin(admin.ModelAdmin):
+    list_display = ('career', 'space', 'rank', 'neighbor', 'similarity')
+    list_filter = ('space',)
+    search_fields = ('career__name', 'neighbor__name')
+    raw_id_fields = ('career', 'neighbor')
+
+
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = ('name', 'career', 'provider', 'difficulty_level', 'is_active')
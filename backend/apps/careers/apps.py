@@ -5,3 +5,6 @@ class CareersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.careers'
     verbose_name = 'Careers'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registers embedding and search signal handlers)
@@ -0,0 +1,114 @@
+"""
+Parsers turning the free-text career market fields into numbers.
+
+``Career.save`` stores their results in ``salary_min`` / ``salary_max`` /
+``growth_pct`` / ``education_level`` so recommendations can be filtered and
+sorted without touching the text.  Anything that can't be parsed becomes
+None (unknown), never a guess.
+"""
+
+import re
+from typing import Optional, Tuple
+
+# education level codes, lowest to highest
+EDUCATION_NONE = 0
+EDUCATION_CERTIFICATE = 1
+EDUCATION_ASSOCIATE = 2
+EDUCATION_BACHELOR = 3
+EDUCATION_MASTER = 4
+EDUCATION_DOCTORATE = 5
+
+EDUCATION_CHOICES = [
+    (EDUCATION_NONE, 'No degree / high school'),
+    (EDUCATION_CERTIFICATE, 'Certificate or bootcamp'),
+    (EDUCATION_ASSOCIATE, "Associate's degree"),
+    (EDUCATION_BACHELOR, "Bachelor's degree"),
+    (EDUCATION_MASTER, "Master's degree"),
+    (EDUCATION_DOCTORATE, 'Doctorate'),
+]
+
+# names accepted by filters such as ``max_education=bachelor``
+EDUCATION_NAMES = {
+    'none': EDUCATION_NONE,
+    'high_school': EDUCATION_NONE,
+    'certificate': EDUCATION_CERTIFICATE,
+    'associate': EDUCATION_ASSOCIATE,
+    'bachelor': EDUCATION_BACHELOR,
+    'master': EDUCATION_MASTER,
+    'doctorate': EDUCATION_DOCTORATE,
+    'phd': EDUCATION_DOCTORATE,
+}
+
+# first match in the text wins ("Bachelor's in CS, MBA preferred" -> bachelor);
+# a bare "degree" names no level ("No formal degree required") and is ignored
+_EDUCATION_PATTERNS = [
+    (EDUCATION_DOCTORATE, r"\b(ph\.?d|doctor(ate|al)?|md)\b"),
+    (EDUCATION_MASTER, r"\b(master'?s?|mba|m\.?sc?)\b"),
+    (EDUCATION_BACHELOR, r"\b(bachelor'?s?|b\.?sc?|b\.?a)\b"),
+    (EDUCATION_ASSOCIATE, r"\bassociate'?s?\b"),
+    (EDUCATION_CERTIFICATE, r"\b(certificat\w*|bootcamp|diploma|comptia)\b"),
+    (EDUCATION_NONE, r"\b(high school|no (formal )?degree|none)\b"),
+]
+
+# "1,200,000" is one number; "80.5k" keeps its decimals
+_MONEY = re.compile(r"\$?\s*(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*([km]?)", re.IGNORECASE)
+# salary_min/salary_max are annual; other periods are left unknown
+_NOT_ANNUAL = re.compile(r"(\bper\s+(hour|month|week|day)\b|/\s*(h|hr|hour|mo|month|wk|week|day)\b|\b(hourly|monthly|weekly|daily)\b)", re.IGNORECASE)
+# "15%", "-3%" or a range "5-7%" / "5% to 7%"; "-" is a sign only when no
+# digit comes right before it
+_PERCENT = re.compile(
+    r"(?<![\d.])(-?\d+(?:\.\d+)?)\s*%?(?:\s*(?:-|–|to)\s*(-?\d+(?:\.\d+)?))?\s*%"
+)
+
+
+def _to_dollars(number: str, suffix: str) -> int:
+    value = float(number.replace(",", ""))
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(suffix.lower(), 1)
+    return int(round(value * multiplier))
+
+
+def parse_salary_range(text: str) -> Tuple[Optional[int], Optional[int]]:
+    """'$80k - $150k' -> (80000, 150000); '$85k - 150k' and '$90,000' work too.
+
+    A suffix on either end applies to both ("$85 - 150k").  Hourly, weekly
+    or monthly pay ("$40 - $60 per hour") gives (None, None).
+    """
+    if not text or _NOT_ANNUAL.search(text):
+        return None, None
+    matches = [(n, s) for n, s in _MONEY.findall(text) if n]
+    if not matches:
+        return None, None
+    suffix = next((s for _, s in matches if s), "")
+    values = [_to_dollars(n, s or suffix) for n, s in matches[:2]]
+    return min(values), max(values)
+
+
+def parse_growth(text: str) -> Optional[float]:
+    """'15% annually' -> 15.0 (first percentage in the text); '5-7%' -> 6.0."""
+    match = _PERCENT.search(text or "")
+    if not match:
+        return None
+    low, high = match.group(1), match.group(2)
+    return float(low) if high is None else (float(low) + float(high)) / 2
+
+
+def parse_education_level(text: str) -> Optional[int]:
+    """Education code of the first degree mentioned, or None."""
+    lowered = (text or "").lower()
+    best = None
+    for level, pattern in _EDUCATION_PATTERNS:
+        match = re.search(pattern, lowered)
+        if match and (best is None or match.start() < best[0]):
+            best = (match.start(), level)
+    return best[1] if best else None
+
+
+def parse_education_filter(value) -> int:
+    """Education code from a filter value: a code (3) or a name ('bachelor')."""
+    if isinstance(value, int) or (isinstance(value, str) and value.strip().isdigit()):
+        code = int(value)
+        if code in dict(EDUCATION_CHOICES):
+            return code
+    elif isinstance(value, str) and value.strip().lower() in EDUCATION_NAMES:
+        return EDUCATION_NAMES[value.strip().lower()]
+    raise ValueError(f"Unknown education level {value!r}; use 0-5 or one of {', '.join(EDUCATION_NAMES)}")
@@ -0,0 +1,169 @@
+"""
+Debounced background re-embedding of edited careers.
+
+The ``post_save`` handler in ``signals.py`` drops the id of every career whose
+embedding source text changed into this in-process queue and returns
+immediately, so admin requests never wait for the model.  A daemon worker
+waits until no new ids have arrived for ``CAREER_EMBEDDING_DEBOUNCE_SECONDS``
+(or until ``CAREER_EMBEDDING_MAX_DELAY_SECONDS`` have passed since the first
+pending edit), then re-embeds the whole burst with ``refresh_embeddings``,
+which also bumps the catalog version so scoring indexes reload.
+
+The queue lives in process memory, so it is flushed when the process exits
+(``atexit``): short-lived processes such as ``loaddata``, import commands or
+a shell re-embed what they edited before quitting.  Ids that still can't be
+embedded are logged; ``manage.py update_career_embeddings`` remains the
+backstop.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .embeddings import DEFAULT_EMBEDDING_MODEL, SOURCE_FIELDS, refresh_embeddings
+from .models import Career
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingRefreshQueue:
+    """Collects career ids and re-embeds them in debounced batches."""
+
+    def __init__(
+        self,
+        debounce_seconds: float = 2.0,
+        max_delay_seconds: float = 30.0,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+    ):
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max(max_delay_seconds, debounce_seconds)
+        self.model_name = model_name
+        self.disabled = False
+
+        self._pending: Set = set()
+        self._first_at: Optional[float] = None
+        self._last_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+        self.batches = 0
+        self.encoded = 0
+        self.failures = 0
+
+    def enqueue(self, career_id) -> None:
+        """Schedule ``career_id`` for re-embedding (non-blocking)."""
+        if self.disabled:
+            return
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_at = now
+            self._pending.add(career_id)
+            self._last_at = now
+            self._ensure_worker()
+            self._cond.notify()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "batches": self.batches,
+            "encoded": self.encoded,
+            "failures": self.failures,
+            "disabled": self.disabled,
+        }
+
+    # ------------------------------------------------------------------
+    # worker
+    # ------------------------------------------------------------------
+    def _ensure_worker(self) -> None:
+        # caller holds self._cond
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="career-embedding-refresh", daemon=True
+            )
+            self._worker.start()
+
+    def _take_batch(self) -> Set:
+        """Block until a burst of edits has settled, then return its ids."""
+        with self._cond:
+            while True:
+                if not self._pending:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic()
+                quiet_until = self._last_at + self.debounce_seconds
+                deadline = self._first_at + self.max_delay_seconds
+                due = min(quiet_until, deadline)
+                if now >= due:
+                    batch, self._pending = self._pending, set()
+                    return batch
+                self._cond.wait(due - now)
+
+    def _run(self) -> None:
+        while not self.disabled:
+            self._refresh(self._take_batch())
+
+    def _refresh(self, ids: Set) -> bool:
+        """Re-embed ``ids``; False if the whole batch failed."""
+        try:
+            careers = (
+                Career.objects.filter(pk__in=ids, is_active=True)
+                .only(*SOURCE_FIELDS)
+                .order_by("pk")
+            )
+            counts = refresh_embeddings(careers, self.model_name, chunk_size=max(len(ids), 1))
+            self.batches += 1
+            self.encoded += counts["encoded"]
+            self.failures += counts["failed"]
+            return True
+        except ImportError as e:
+            # no embedding backend installed: stop queueing work at all
+            logger.warning(f"Disabling background re-embedding: {e}")
+            self.disabled = True
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Background re-embedding of {len(ids)} careers failed: {e}")
+        finally:
+            close_old_connections()
+        return False
+
+    def flush(self) -> None:
+        """Re-embed everything still pending now, in the calling thread.
+
+        Registered with ``atexit`` so edits made just before a process exits
+        aren't lost with the daemon worker.
+        """
+        with self._cond:
+            ids, self._pending = self._pending, set()
+        if not ids:
+            return
+        if self.disabled or not self._refresh(ids):
+            logger.warning(
+                f"{len(ids)} careers were not re-embedded before exit; "
+                f"run `python manage.py update_career_embeddings`: {sorted(map(str, ids))}"
+            )
+
+
+_queue: Optional[EmbeddingRefreshQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_embedding_queue() -> EmbeddingRefreshQueue:
+    """Return the process-wide re-embedding queue."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = EmbeddingRefreshQueue(
+                    debounce_seconds=getattr(settings, "CAREER_EMBEDDING_DEBOUNCE_SECONDS", 2.0),
+                    max_delay_seconds=getattr(settings, "CAREER_EMBEDDING_MAX_DELAY_SECONDS", 30.0),
+                )
+                atexit.register(_queue.flush)
+    return _queue
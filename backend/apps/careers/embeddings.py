@@ -0,0 +1,160 @@
+"""
+Batch refresh of career embeddings.
+
+``Career.compute_embedding`` encodes one career and saves it with its own
+UPDATE.  For a whole catalog that is one model call and one query per row.
+``refresh_embeddings`` instead:
+
+1. compares each career's ``embedding_hash`` with a hash of its current
+   source text and skips unchanged rows,
+2. encodes the changed texts ``batch_size`` at a time,
+3. writes embeddings back with ``bulk_update`` in chunks of ``chunk_size``.
+
+A chunk whose encode call fails is retried one career at a time, so a single
+bad career is reported and skipped (its old embedding and hash stay, so the
+next run retries it) instead of aborting the whole run.
+
+Used by the ``update_career_embeddings`` command and the background
+re-embedding worker.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.utils import timezone
+
+from .models import Career
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# fields needed to build the source text and decide whether it changed
+SOURCE_FIELDS = ("id", "name", "description", "required_skills", "embedding_hash")
+
+_models: Dict[str, object] = {}
+_models_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """Load (once per process) and return a SentenceTransformer model."""
+    with _models_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
+
+
+class _LazyModel:
+    """Defers ``get_embedding_model`` until the first encode call."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def encode(self, *args, **kwargs):
+        return get_embedding_model(self.model_name).encode(*args, **kwargs)
+
+
+def _encode(model, texts: List[str], batch_size: int):
+    return model.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+
+
+def _flush(
+    pending: List[Career], model, batch_size: int, chunk_size: int,
+    on_error: Optional[Callable[[Career, Exception], None]] = None,
+) -> Tuple[int, int]:
+    """Encode ``pending`` careers in batches and bulk-write the vectors.
+
+    Returns ``(written, failed)``.
+    """
+    texts = [career.embedding_source_text() for career in pending]
+    try:
+        vectors = list(_encode(model, texts, batch_size))
+    except ImportError:
+        raise  # no embedding backend at all: nothing to isolate
+    except Exception as e:
+        logger.warning(f"Encoding {len(pending)} careers failed ({e}); retrying one at a time")
+        encoded, vectors = [], []
+        for career, text in zip(pending, texts):
+            try:
+                vectors.append(_encode(model, [text], batch_size)[0])
+            except ImportError:
+                raise
+            except Exception as exc:
+                logger.error(f"Embedding failed for {career.name}: {exc}")
+                if on_error:
+                    on_error(career, exc)
+                continue
+            encoded.append(career)
+        pending = encoded
+    failed = len(texts) - len(pending)
+    if not pending:
+        return 0, failed
+    now = timezone.now()
+    for career, vec in zip(pending, vectors):
+        career.embedding = vec.tolist()
+        career.embedding_hash = career.compute_embedding_hash()
+        # bulk_update skips auto_now; bump it so the catalog version moves
+        career.updated_at = now
+    Career.objects.bulk_update(
+        pending, ["embedding", "embedding_hash", "updated_at"], batch_size=chunk_size
+    )
+    return len(pending), failed
+
+
+def refresh_embeddings(
+    careers: Iterable[Career],
+    model,
+    batch_size: int = 64,
+    chunk_size: int = 500,
+    force: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+    on_error: Optional[Callable[[Career, Exception], None]] = None,
+) -> Dict[str, int]:
+    """Re-embed careers whose source text changed since their last embedding.
+
+    ``careers`` may be a lazy iterator; at most ``chunk_size`` careers are
+    held in memory before they are encoded and written.  ``force`` ignores
+    the stored hashes.  ``progress(encoded, skipped)`` is called after every
+    written chunk.  ``model`` may also be a model name, in which case the
+    model is only loaded if at least one career actually needs encoding.
+    ``on_error(career, exc)`` is called for every career that failed to
+    encode.
+
+    Returns ``{"encoded": n, "skipped": m, "failed": f}``.
+    """
+    encoded = skipped = failed = 0
+    pending: List[Career] = []
+    if isinstance(model, str):
+        model = _LazyModel(model)
+    for career in careers:
+        # careers loaded with .only(SOURCE_FIELDS) don't carry the vector
+        # itself; an empty hash means it was never computed
+        if not force and career.embedding_hash and career.embedding_hash == career.compute_embedding_hash():
+            skipped += 1
+            continue
+        pending.append(career)
+        if len(pending) >= chunk_size:
+            written, errors = _flush(pending, model, batch_size, chunk_size, on_error)
+            encoded, failed = encoded + written, failed + errors
+            pending = []
+            if progress:
+                progress(encoded, skipped)
+    if pending:
+        written, errors = _flush(pending, model, batch_size, chunk_size, on_error)
+        encoded, failed = encoded + written, failed + errors
+        if progress:
+            progress(encoded, skipped)
+
+    if encoded:
+        from ml.catalog_index import bump_catalog_version
+        bump_catalog_version()
+    logger.info(f"Embedding refresh: {encoded} encoded, {skipped} unchanged, {failed} failed")
+    return {"encoded": encoded, "skipped": skipped, "failed": failed}
@@ -0,0 +1,103 @@
+"""
+Catalog filters for the recommenders.
+
+``CatalogFilters`` bundles the optional restrictions a recommendation request
+can carry (required skills, minimum salary / growth, career clusters, highest
+education level) and turns them into one boolean mask over the positions of
+the catalog index.  The recommenders pass that mask to ``rank`` so filtered
+out careers are never scored.
+
+Careers whose value for a filtered attribute is unknown (unparseable text)
+are excluded by that filter.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .attributes import parse_education_filter
+from .skills import parse_skills, skill_mask
+
+
+def _split(value) -> Tuple[str, ...]:
+    """'a, b' or ['a', 'b'] -> ('a', 'b'), empty items dropped."""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = value.split(",")
+    return tuple(item for item in (str(v).strip() for v in value) if item)
+
+
+def _number(data, name: str, cast):
+    value = data.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if number < 0 and name != "min_growth":
+        raise ValueError(f"{name} must not be negative")
+    return number
+
+
+@dataclass(frozen=True)
+class CatalogFilters:
+    skills: Tuple[str, ...] = ()
+    skills_mode: str = "all"
+    min_salary: Optional[int] = None
+    min_growth: Optional[float] = None
+    clusters: Tuple[str, ...] = ()
+    max_education: Optional[int] = None
+
+    @classmethod
+    def from_params(cls, data) -> "CatalogFilters":
+        """Build from request data (JSON body or query params).
+
+        Raises ValueError with a client-facing message on invalid input.
+        """
+        skills_mode = data.get("skills_mode") or "all"
+        if skills_mode not in ("all", "any"):
+            raise ValueError("skills_mode must be 'all' or 'any'")
+        max_education = data.get("max_education")
+        return cls(
+            skills=tuple(parse_skills(data.get("skills"))),
+            skills_mode=skills_mode,
+            min_salary=_number(data, "min_salary", int),
+            min_growth=_number(data, "min_growth", float),
+            clusters=_split(data.get("clusters")),
+            max_education=(
+                None if max_education in (None, "") else parse_education_filter(max_education)
+            ),
+        )
+
+    def is_empty(self) -> bool:
+        return self == CatalogFilters()
+
+    def to_dict(self) -> dict:
+        """Only the filters that are set, e.g. for echoing back to the client."""
+        data = {
+            key: list(value) if isinstance(value, tuple) else value
+            for key, value in asdict(self).items()
+            if value not in (None, ())
+        }
+        if not self.skills:
+            data.pop("skills_mode")
+        return data
+
+    def mask(self, index) -> Optional[np.ndarray]:
+        """Boolean mask over the catalog index positions, or None if nothing is filtered."""
+        masks = [
+            skill_mask(self.skills, self.skills_mode, index),
+            index.attribute_mask(
+                min_salary=self.min_salary,
+                min_growth=self.min_growth,
+                clusters=list(self.clusters),
+                max_education=self.max_education,
+            ),
+        ]
+        masks = [m for m in masks if m is not None]
+        if not masks:
+            return None
+        return np.logical_and.reduce(masks)
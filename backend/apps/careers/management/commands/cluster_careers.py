@@ -2,14 +2,52 @@
 Management command to perform k-means clustering on careers
 Uses either embeddings (if available) or ability_vectors for clustering
 
-Usage: python manage.py cluster_careers [--n_clusters 8] [--use_embeddings] [--force_recompute]
+Usage: python manage.py cluster_careers [--n_clusters 8] [--use_embeddings] [--minibatch]
+                                        [--k_range 4:12] [--assign_new]
+
+The fitted centroids are saved to ML_MODELS_DIR/career_centroids.npz.
+``--assign_new`` reuses them to label careers without a cluster, without
+reclustering the rest of the catalog.
 """
-import json
 import numpy as np
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from sklearn.cluster import KMeans
+from django.utils import timezone
 from apps.careers.models import Career
+from ml.career_clusters import ClusterCentroids, load_centroids, make_kmeans, select_k
+from ml.catalog_index import bump_catalog_version
+
+
+DEFAULT_CLUSTERS = [
+    "Technology",
+    "Business",
+    "Creative",
+    "Healthcare",
+    "Education",
+    "Finance",
+    "Engineering",
+    "Administrative",
+    "Marketing",
+    "Operations",
+]
+
+
+def cluster_name(label: int) -> str:
+    """Use predefined cluster names or create generic ones."""
+    if label < len(DEFAULT_CLUSTERS):
+        return DEFAULT_CLUSTERS[label]
+    return f"Cluster_{label}"
+
+
+def parse_k_range(value: str):
+    """'4:12' -> range(4, 13)."""
+    try:
+        low, high = (int(part) for part in value.split(":"))
+    except ValueError:
+        raise CommandError(f"--k_range must look like '4:12', got {value!r}")
+    if low < 2 or high < low:
+        raise CommandError("--k_range needs 2 <= low <= high")
+    return range(low, high + 1)
 
 
 class Command(BaseCommand):
@@ -28,50 +66,98 @@ class Command(BaseCommand):
             help="Use embeddings if available, fall back to ability_vectors",
         )
         parser.add_argument(
-            "--force_recompute",
+            "--minibatch",
             action="store_true",
-            help="Force recompute even if clusters already exist",
+            help="Use MiniBatchKMeans (recommended for large catalogs)",
+        )
+        parser.add_argument(
+            "--batch_size",
+            type=int,
+            default=1024,
+            help="MiniBatchKMeans batch size (default: 1024)",
+        )
+        parser.add_argument(
+            "--k_range",
+            type=str,
+            default=None,
+            help="Pick k by silhouette score over a range, e.g. '4:12' (overrides --n_clusters)",
+        )
+        parser.add_argument(
+            "--n_jobs",
+            type=int,
+            default=-1,
+            help="Parallel jobs for --k_range evaluation (default: all cores)",
         )
+        parser.add_argument(
+            "--assign_new",
+            action="store_true",
+            help="Only assign careers without a cluster to the nearest saved centroid",
+        )
+        parser.add_argument(
+            "--centroids_path",
+            type=str,
+            default=None,
+            help="Where to save/load centroids (default: ML_MODELS_DIR/career_centroids.npz)",
+        )
+
+    def _load_vectors(self, careers, use_embeddings):
+        """Return (space, careers, matrix) for one consistent vector space."""
+        if use_embeddings:
+            rows = [(c, c.embedding) for c in careers if c.embedding]
+            if rows:
+                dim = len(rows[0][1])
+                rows = [(c, v) for c, v in rows if len(v) == dim]
+                return "embedding", [c for c, _ in rows], np.array([v for _, v in rows], dtype=np.float32)
+            self.stdout.write("No embeddings found, falling back to ability_vectors")
+
+        rows = []
+        for career in careers:
+            if not career.ability_vector:
+                continue
+            try:
+                rows.append((career, np.asarray(career.ability_vector, dtype=np.float32)))
+            except (TypeError, ValueError):
+                pass
+        if rows:
+            dim = rows[0][1].shape
+            rows = [(c, v) for c, v in rows if v.shape == dim]
+        return "ability", [c for c, _ in rows], np.array([v for _, v in rows], dtype=np.float32)
+
+    def _write_clusters(self, career_list, names):
+        now = timezone.now()
+        for career, name in zip(career_list, names):
+            career.cluster = name
+            career.updated_at = now
+        with transaction.atomic():
+            Career.objects.bulk_update(career_list, ["cluster", "updated_at"], batch_size=1000)
+        bump_catalog_version()
 
-    @transaction.atomic
     def handle(self, *args, **options):
         n_clusters = options["n_clusters"]
         use_embeddings = options["use_embeddings"]
-        force_recompute = options["force_recompute"]
 
-        # Get all careers
-        careers = Career.objects.all()
-        if not careers.exists():
+        careers = Career.objects.only("id", "name", "embedding", "ability_vector", "cluster")
+        if options["assign_new"]:
+            careers = careers.filter(cluster="")
+
+        careers = list(careers.iterator(chunk_size=2000))
+        if not careers:
+            if options["assign_new"]:
+                self.stdout.write(self.style.SUCCESS("✓ Every career already has a cluster"))
+                return
             self.stdout.write(
                 self.style.ERROR("✗ No careers found. Run 'python manage.py import_careers' first.")
             )
             return
 
-        self.stdout.write(f"Loading {careers.count()} careers for clustering...")
+        self.stdout.write(f"Loading {len(careers)} careers for clustering...")
 
-        # Prepare feature vectors
-        feature_vectors = []
-        career_list = []
-        
-        for career in careers:
-            if use_embeddings and career.embedding:
-                try:
-                    # Use embeddings if requested and available
-                    vec = np.array(career.embedding)
-                    feature_vectors.append(vec)
-                    career_list.append(career)
-                except (TypeError, ValueError):
-                    pass
-            elif career.ability_vector:
-                try:
-                    # Fall back to ability vectors
-                    vec = np.array(career.ability_vector)
-                    feature_vectors.append(vec)
-                    career_list.append(career)
-                except (TypeError, ValueError):
-                    pass
-
-        if not feature_vectors:
+        if options["assign_new"]:
+            self._assign_new(careers, options)
+            return
+
+        space, career_list, feature_vectors = self._load_vectors(careers, use_embeddings)
+        if not career_list:
             self.stdout.write(
                 self.style.ERROR(
                     f"✗ No valid vectors found. Please ensure careers have ability_vectors or embeddings."
@@ -79,54 +165,56 @@ class Command(BaseCommand):
             )
             return
 
-        feature_vectors = np.array(feature_vectors)
         self.stdout.write(
-            f"✓ Loaded {len(feature_vectors)} feature vectors (dimension: {feature_vectors.shape[1]})"
+            f"✓ Loaded {len(feature_vectors)} {space} vectors (dimension: {feature_vectors.shape[1]})"
         )
 
+        if options["k_range"]:
+            self.stdout.write(f"\nSelecting k by silhouette over {options['k_range']}...")
+            try:
+                n_clusters, scores = select_k(
+                    feature_vectors,
+                    parse_k_range(options["k_range"]),
+                    minibatch=options["minibatch"],
+                    batch_size=options["batch_size"],
+                    n_jobs=options["n_jobs"],
+                )
+            except ValueError as e:
+                raise CommandError(f"--k_range: {e}")
+            for k, score in sorted(scores.items()):
+                marker = " ←" if k == n_clusters else ""
+                self.stdout.write(f"  k={k}: silhouette {score:.4f}{marker}")
+
         # Perform k-means clustering
-        self.stdout.write(f"\nRunning k-means with {n_clusters} clusters...")
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        algorithm = "mini-batch k-means" if options["minibatch"] else "k-means"
+        self.stdout.write(f"\nRunning {algorithm} with {n_clusters} clusters...")
+        kmeans = make_kmeans(n_clusters, options["minibatch"], options["batch_size"])
         labels = kmeans.fit_predict(feature_vectors)
 
         self.stdout.write("✓ K-means clustering complete")
 
+        centroids = ClusterCentroids(
+            centroids=kmeans.cluster_centers_.astype(np.float32),
+            names=[cluster_name(i) for i in range(n_clusters)],
+            space=space,
+            inertia=float(kmeans.inertia_),
+        )
+        path = centroids.save(options["centroids_path"])
+        self.stdout.write(f"✓ Saved centroids to {path}")
+
+        names = [cluster_name(label) for label in labels]
+        self._write_clusters(career_list, names)
+
         # Map cluster labels to career names
         cluster_mapping = {}
-        default_clusters = [
-            "Technology",
-            "Business",
-            "Creative",
-            "Healthcare",
-            "Education",
-            "Finance",
-            "Engineering",
-            "Administrative",
-            "Marketing",
-            "Operations",
-        ]
-
-        for idx, career in enumerate(career_list):
-            cluster_label = labels[idx]
-            
-            # Use predefined cluster names or create generic ones
-            if cluster_label < len(default_clusters):
-                cluster_name = default_clusters[cluster_label]
-            else:
-                cluster_name = f"Cluster_{cluster_label}"
-            
-            career.cluster = cluster_name
-            career.save()
-            
-            if cluster_name not in cluster_mapping:
-                cluster_mapping[cluster_name] = []
-            cluster_mapping[cluster_name].append(career.name)
+        for career, name in zip(career_list, names):
+            cluster_mapping.setdefault(name, []).append(career.name)
 
         # Display results
         self.stdout.write(self.style.SUCCESS("\n✓ Clustering complete! Results:"))
-        for cluster_name in sorted(cluster_mapping.keys()):
-            careers_in_cluster = cluster_mapping[cluster_name]
-            self.stdout.write(f"\n{cluster_name} ({len(careers_in_cluster)} careers):")
+        for name in sorted(cluster_mapping.keys()):
+            careers_in_cluster = cluster_mapping[name]
+            self.stdout.write(f"\n{name} ({len(careers_in_cluster)} careers):")
             for career_name in sorted(careers_in_cluster):
                 self.stdout.write(f"  • {career_name}")
 
@@ -135,3 +223,25 @@ class Command(BaseCommand):
                 f"\n✓ Updated {len(career_list)} careers with cluster assignments"
             )
         )
+
+    def _assign_new(self, careers, options):
+        """Label unclustered careers with the nearest persisted centroid."""
+        centroids = load_centroids(options["centroids_path"])
+        if centroids is None:
+            raise CommandError("No saved centroids found. Run cluster_careers without --assign_new first.")
+
+        space, career_list, vectors = self._load_vectors(careers, centroids.space == "embedding")
+        if space != centroids.space or not career_list or vectors.shape[1] != centroids.dimension:
+            self.stdout.write(
+                self.style.ERROR(f"✗ No unclustered careers with {centroids.space} vectors of "
+                                 f"dimension {centroids.dimension}")
+            )
+            return
+
+        names = centroids.assign(vectors)
+        self._write_clusters(career_list, names)
+        for career, name in zip(career_list, names):
+            self.stdout.write(f"  • {career.name} → {name}")
+        self.stdout.write(
+            self.style.SUCCESS(f"\n✓ Assigned {len(career_list)} new careers to existing clusters")
+        )
@@ -0,0 +1,100 @@
+"""
+Management command to precompute the k most similar careers of every career.
+
+Usage: python manage.py compute_career_neighbors [--k 10] [--space both] [--block-size 1024]
+
+Similarities are cosine similarities of ability vectors and/or embeddings,
+computed in blocks of rows so memory stays bounded on large catalogs.  The
+result replaces the ``CareerNeighbor`` rows of that space and is served by
+GET /api/careers/{id}/similar/.
+"""
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.careers.models import CareerNeighbor
+from ml.catalog_index import CatalogIndex
+from ml.retrieval import blocked_knn
+
+
+class Command(BaseCommand):
+    help = "Compute the k nearest neighbours of every active career (ability and/or embedding space)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--k",
+            type=int,
+            default=10,
+            help="Neighbours stored per career (default: 10)",
+        )
+        parser.add_argument(
+            "--space",
+            choices=["ability", "embedding", "both"],
+            default="both",
+            help="Vector space(s) to compute (default: both)",
+        )
+        parser.add_argument(
+            "--block-size",
+            type=int,
+            default=1024,
+            help="Careers per similarity block (default: 1024)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk_create (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        k = options["k"]
+        if k < 1 or k > 32767:
+            raise CommandError("--k must be between 1 and 32767")
+
+        index = CatalogIndex.build()
+        if not index.size:
+            self.stdout.write(
+                self.style.ERROR("✗ No careers found. Run 'python manage.py import_careers' first.")
+            )
+            return
+
+        spaces = ["ability", "embedding"] if options["space"] == "both" else [options["space"]]
+        for space in spaces:
+            self._compute_space(index, space, k, options["block_size"], options["batch_size"])
+
+    def _compute_space(self, index, space, k, block_size, batch_size):
+        valid = index.has_abilities if space == "ability" else index.has_embeddings
+        positions = np.flatnonzero(valid)
+        if len(positions) < 2:
+            self.stdout.write(self.style.WARNING(f"⚠ Skipping {space}: fewer than 2 careers with vectors"))
+            return
+
+        unit = index.unit_vectors(space)[positions]
+        ids = [index.careers[pos].pk for pos in positions]
+        self.stdout.write(f"Computing {space} neighbours for {len(positions)} careers...")
+
+        rows = []
+        with transaction.atomic():
+            CareerNeighbor.objects.filter(space=space).delete()
+            written = 0
+            for block_rows, neighbours, sims in blocked_knn(unit, k, block_size):
+                for row, row_neighbours, row_sims in zip(block_rows, neighbours, sims):
+                    rows.extend(
+                        CareerNeighbor(
+                            career_id=ids[row],
+                            neighbor_id=ids[neighbour],
+                            space=space,
+                            rank=rank,
+                            similarity=float(sim),
+                        )
+                        for rank, (neighbour, sim) in enumerate(zip(row_neighbours, row_sims), start=1)
+                    )
+                if len(rows) >= batch_size:
+                    CareerNeighbor.objects.bulk_create(rows, batch_size=batch_size)
+                    written += len(rows)
+                    rows = []
+                self.stdout.write(f"  [{block_rows[-1] + 1}/{len(positions)}] careers done")
+            if rows:
+                CareerNeighbor.objects.bulk_create(rows, batch_size=batch_size)
+                written += len(rows)
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Stored {written} {space} neighbour rows"))
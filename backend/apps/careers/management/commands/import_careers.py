@@ -6,7 +6,8 @@ If --clear is passed, it will delete existing careers before importing.
 """
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from apps.careers.models import Career
+from apps.careers.models import Career, Skill
+from apps.careers.skills import sync_career_skills
 from ml.careers_db import get_all_careers, get_all_clusters
 
 
@@ -32,6 +33,7 @@ class Command(BaseCommand):
         careers_data = get_all_careers()
         created = 0
         updated = 0
+        imported = []
 
         for career_data in careers_data:
             career, is_created = Career.objects.update_or_create(
@@ -47,6 +49,7 @@ class Command(BaseCommand):
                 },
             )
 
+            imported.append(career)
             if is_created:
                 created += 1
             else:
@@ -62,6 +65,15 @@ class Command(BaseCommand):
             )
         )
 
+        # normally already done by the post_save signal; this catches careers
+        # whose skill rows drifted (e.g. imported before the Skill table existed)
+        resynced = sync_career_skills(imported)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Skills: {Skill.objects.count()} distinct, {resynced} careers re-synced"
+            )
+        )
+
         # Display cluster statistics
         clusters = get_all_clusters()
         self.stdout.write(self.style.SUCCESS("\nCluster Distribution:"))
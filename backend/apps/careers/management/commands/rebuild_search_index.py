@@ -0,0 +1,26 @@
+"""
+Management command to rebuild the career search index from scratch.
+
+Usage: python manage.py rebuild_search_index
+
+Normally the index is kept up to date by signal handlers; run this after bulk
+imports that bypass ``save()`` (``bulk_create``/``update``/raw SQL).
+"""
+from django.core.management.base import BaseCommand
+from apps.careers.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over careers, courses and universities"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend.name == "memory":
+            self.stdout.write(
+                self.style.WARNING(
+                    "⚠ In-memory backend: each server process builds its own index on first search; "
+                    "this run only checks that the index builds."
+                )
+            )
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"✓ Indexed {count} careers ({backend.name} backend)"))
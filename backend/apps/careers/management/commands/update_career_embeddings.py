@@ -1,5 +1,9 @@
 from django.core.management.base import BaseCommand
-from sentence_transformers import SentenceTransformer
+from apps.careers.embeddings import (
+    DEFAULT_EMBEDDING_MODEL,
+    SOURCE_FIELDS,
+    refresh_embeddings,
+)
 from apps.careers.models import Career
 
 
@@ -7,41 +11,66 @@ class Command(BaseCommand):
     help = (
         "Compute or refresh semantic embeddings for all active careers. "
         "Embeddings are persisted in the ``Career.embedding`` VectorField so "
-        "they can be used directly in SQL/ORM similarity queries."
+        "they can be used directly in SQL/ORM similarity queries. Careers whose "
+        "name, description and skills are unchanged since their last embedding "
+        "are skipped; changed ones are encoded in batches and bulk-written."
     )
 
     def add_arguments(self, parser):
         parser.add_argument(
             "--model",
             type=str,
-            default="all-MiniLM-L6-v2",
+            default=DEFAULT_EMBEDDING_MODEL,
             help="Name of the SentenceTransformer model to use (must be installed).",
         )
         parser.add_argument(
             "--force",
             action="store_true",
-            help="Recompute embeddings even if the field is already populated.",
+            help="Recompute embeddings even if the source text is unchanged.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=64,
+            help="Number of texts per model.encode call (default: 64).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of careers per bulk_update (default: 500).",
         )
 
     def handle(self, *args, **options):
         model_name = options["model"]
         force = options["force"]
 
-        self.stdout.write(f"Loading embedding model: {model_name}")
-        model = SentenceTransformer(model_name)
-
         qs = Career.objects.filter(is_active=True)
-        if not force:
-            qs = qs.filter(embedding__isnull=True)  # only those missing a vector
+        # a hash without a vector (e.g. embedding cleared by hand) must not
+        # count as up to date
+        qs.filter(embedding__isnull=True).exclude(embedding_hash="").update(embedding_hash="")
 
         total = qs.count()
-        self.stdout.write(f"Computing embeddings for {total} careers...")
+        self.stdout.write(f"Checking embeddings for {total} careers...")
+
+        def progress(encoded, skipped):
+            self.stdout.write(f"[{encoded + skipped}/{total}] {encoded} encoded, {skipped} unchanged")
 
-        for idx, career in enumerate(qs.iterator(), start=1):
-            self.stdout.write(f"[{idx}/{total}] {career.name}")
-            try:
-                career.compute_embedding(model)
-            except Exception as exc:
-                self.stderr.write(f"failed for {career.name}: {exc}")
+        def on_error(career, exc):
+            self.stderr.write(f"failed for {career.name}: {exc}")
+
+        # passing the name means the model is only loaded if something changed
+        counts = refresh_embeddings(
+            qs.only(*SOURCE_FIELDS).order_by("pk").iterator(chunk_size=options["chunk_size"]),
+            model_name,
+            batch_size=options["batch_size"],
+            chunk_size=options["chunk_size"],
+            force=force,
+            progress=progress,
+            on_error=on_error,
+        )
 
-        self.stdout.write(self.style.SUCCESS("Embedding update complete."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Embedding update complete: {counts['encoded']} encoded, "
+            f"{counts['skipped']} unchanged, {counts['failed']} failed."
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0002_career_ability_vector_career_cluster_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='career',
+            name='embedding_hash',
+            field=models.CharField(blank=True, default='', help_text='Hash of the source text of the cached embedding', max_length=64),
+        ),
+    ]
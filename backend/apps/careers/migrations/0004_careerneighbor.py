@@ -0,0 +1,34 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0003_career_embedding_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CareerNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('space', models.CharField(choices=[('ability', 'Ability vector'), ('embedding', 'Embedding')], max_length=16)),
+                ('rank', models.PositiveSmallIntegerField(help_text='1 = most similar')),
+                ('similarity', models.FloatField(help_text='Cosine similarity')),
+                ('career', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='careers.career')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='careers.career')),
+            ],
+            options={
+                'verbose_name': 'Career neighbor',
+                'verbose_name_plural': 'Career neighbors',
+                'ordering': ['career', 'space', 'rank'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='careerneighbor',
+            constraint=models.UniqueConstraint(fields=('career', 'space', 'rank'), name='unique_career_neighbor_rank'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0004_careerneighbor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Display name, as first seen', max_length=100)),
+                ('key', models.CharField(help_text='Lowercased, whitespace-collapsed name', max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Skill',
+                'verbose_name_plural': 'Skills',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CareerSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0, help_text='Order in required_skills')),
+                ('career', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='career_skills', to='careers.career')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='career_skills', to='careers.skill')),
+            ],
+            options={
+                'ordering': ['career', 'position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='career',
+            name='skills',
+            field=models.ManyToManyField(blank=True, related_name='careers', through='careers.CareerSkill', to='careers.skill'),
+        ),
+        migrations.AddConstraint(
+            model_name='careerskill',
+            constraint=models.UniqueConstraint(fields=('career', 'skill'), name='unique_career_skill'),
+        ),
+    ]
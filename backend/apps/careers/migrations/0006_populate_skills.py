@@ -0,0 +1,59 @@
+# Data migration: fill Skill / CareerSkill from Career.required_skills
+
+import re
+
+from django.db import migrations
+
+_SPACES = re.compile(r"\s+")
+
+
+def populate_skills(apps, schema_editor):
+    # same normalization as apps.careers.skills.normalize_skill (copied so the
+    # migration doesn't change if that module does)
+    Career = apps.get_model('careers', 'Career')
+    Skill = apps.get_model('careers', 'Skill')
+    CareerSkill = apps.get_model('careers', 'CareerSkill')
+
+    wanted = {}
+    names = {}
+    for career_id, skills in Career.objects.values_list('id', 'required_skills').iterator():
+        keys = []
+        for raw in skills or []:
+            display = _SPACES.sub(' ', str(raw)).strip()[:100]
+            key = _SPACES.sub(' ', str(raw)).strip().lower()[:100].rstrip()
+            if key and key not in keys:
+                keys.append(key)
+                names.setdefault(key, display)
+        wanted[career_id] = keys
+
+    Skill.objects.bulk_create(
+        [Skill(key=key, name=name) for key, name in names.items()],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    skill_ids = dict(Skill.objects.values_list('key', 'id'))
+    CareerSkill.objects.all().delete()
+    CareerSkill.objects.bulk_create(
+        [
+            CareerSkill(career_id=career_id, skill_id=skill_ids[key], position=position)
+            for career_id, keys in wanted.items()
+            for position, key in enumerate(keys)
+        ],
+        batch_size=1000,
+    )
+
+
+def clear_skills(apps, schema_editor):
+    apps.get_model('careers', 'CareerSkill').objects.all().delete()
+    apps.get_model('careers', 'Skill').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0005_skills'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_skills, clear_skills),
+    ]
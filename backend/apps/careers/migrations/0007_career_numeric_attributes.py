@@ -0,0 +1,33 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0006_populate_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='career',
+            name='education_level',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(0, 'No degree / high school'), (1, 'Certificate or bootcamp'), (2, "Associate's degree"), (3, "Bachelor's degree"), (4, "Master's degree"), (5, 'Doctorate')], editable=False, help_text='Parsed from required_education', null=True),
+        ),
+        migrations.AddField(
+            model_name='career',
+            name='growth_pct',
+            field=models.FloatField(blank=True, editable=False, help_text='Annual job growth in percent, parsed from job_growth', null=True),
+        ),
+        migrations.AddField(
+            model_name='career',
+            name='salary_max',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Upper end of average_salary_range (USD/year)', null=True),
+        ),
+        migrations.AddField(
+            model_name='career',
+            name='salary_min',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Lower end of average_salary_range (USD/year)', null=True),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Data migration: parse salary / growth / education text of existing careers
+
+import re
+
+from django.db import migrations
+
+# parsers as of this migration (copied from apps.careers.attributes so the
+# migration doesn't change if that module does)
+_EDUCATION_PATTERNS = [
+    (5, r"\b(ph\.?d|doctor(ate|al)?|md)\b"),
+    (4, r"\b(master'?s?|mba|m\.?sc?)\b"),
+    (3, r"\b(bachelor'?s?|b\.?sc?|b\.?a|degree)\b"),
+    (2, r"\bassociate'?s?\b"),
+    (1, r"\b(certificat\w*|bootcamp|diploma|comptia)\b"),
+    (0, r"\b(high school|no degree|none)\b"),
+]
+_MONEY = re.compile(r"\$?\s*(\d+(?:[.,]\d+)?)\s*([km]?)", re.IGNORECASE)
+_PERCENT = re.compile(r"(-?\d+(?:\.\d+)?)\s*%")
+
+
+def _to_dollars(number, suffix):
+    value = float(number.replace(",", ""))
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(suffix.lower(), 1)
+    return int(round(value * multiplier))
+
+
+def parse_salary_range(text):
+    if not text:
+        return None, None
+    matches = [(n, s) for n, s in _MONEY.findall(text) if n]
+    if not matches:
+        return None, None
+    suffix = next((s for _, s in matches if s), "")
+    values = [_to_dollars(n, s or suffix) for n, s in matches[:2]]
+    return min(values), max(values)
+
+
+def parse_growth(text):
+    match = _PERCENT.search(text or "")
+    return float(match.group(1)) if match else None
+
+
+def parse_education_level(text):
+    lowered = (text or "").lower()
+    best = None
+    for level, pattern in _EDUCATION_PATTERNS:
+        match = re.search(pattern, lowered)
+        if match and (best is None or match.start() < best[0]):
+            best = (match.start(), level)
+    return best[1] if best else None
+
+
+def populate_numeric_attributes(apps, schema_editor):
+    Career = apps.get_model('careers', 'Career')
+    careers = list(
+        Career.objects.only('id', 'average_salary_range', 'job_growth', 'required_education')
+    )
+    for career in careers:
+        career.salary_min, career.salary_max = parse_salary_range(career.average_salary_range)
+        career.growth_pct = parse_growth(career.job_growth)
+        career.education_level = parse_education_level(career.required_education)
+    Career.objects.bulk_update(
+        careers, ['salary_min', 'salary_max', 'growth_pct', 'education_level'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0007_career_numeric_attributes'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_numeric_attributes, migrations.RunPython.noop),
+    ]
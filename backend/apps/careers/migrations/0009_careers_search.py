@@ -0,0 +1,36 @@
+# FTS5 table of the full-text search backend (apps/careers/search.py).
+# Only created on SQLite; other databases use the in-memory backend.
+# 0011 fills it with the existing careers; signal handlers keep it up to
+# date afterwards.
+
+from django.db import migrations
+
+
+class SqliteRunSQL(migrations.RunSQL):
+    """``RunSQL`` that is a no-op on databases other than SQLite."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0008_populate_numeric_attributes'),
+    ]
+
+    operations = [
+        SqliteRunSQL(
+            sql=(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS careers_search USING fts5("
+                "career_id UNINDEXED, name, skills, description, courses, universities, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            ),
+            reverse_sql="DROP TABLE IF EXISTS careers_search",
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Data migration: re-parse salaries stored before thousands groups
+# ("$1,200,000") and hourly/monthly pay were handled
+
+import re
+
+from django.db import migrations
+
+# salary parser as of this migration (copied from apps.careers.attributes so
+# the migration doesn't change if that module does)
+_MONEY = re.compile(r"\$?\s*(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*([km]?)", re.IGNORECASE)
+_NOT_ANNUAL = re.compile(
+    r"(\bper\s+(hour|month|week|day)\b|/\s*(h|hr|hour|mo|month|wk|week|day)\b|\b(hourly|monthly|weekly|daily)\b)",
+    re.IGNORECASE,
+)
+
+
+def _to_dollars(number, suffix):
+    value = float(number.replace(",", ""))
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(suffix.lower(), 1)
+    return int(round(value * multiplier))
+
+
+def parse_salary_range(text):
+    if not text or _NOT_ANNUAL.search(text):
+        return None, None
+    matches = [(n, s) for n, s in _MONEY.findall(text) if n]
+    if not matches:
+        return None, None
+    suffix = next((s for _, s in matches if s), "")
+    values = [_to_dollars(n, s or suffix) for n, s in matches[:2]]
+    return min(values), max(values)
+
+
+def reparse_salaries(apps, schema_editor):
+    Career = apps.get_model('careers', 'Career')
+    careers = list(Career.objects.only('id', 'average_salary_range', 'salary_min', 'salary_max'))
+    changed = []
+    for career in careers:
+        parsed = parse_salary_range(career.average_salary_range)
+        if parsed != (career.salary_min, career.salary_max):
+            career.salary_min, career.salary_max = parsed
+            changed.append(career)
+    Career.objects.bulk_update(changed, ['salary_min', 'salary_max'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0009_careers_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(reparse_salaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Data migration: fill the FTS5 table created by 0009 with the existing
+# careers, so search works right after `migrate`.  The document builder is a
+# frozen copy of apps.careers.search.build_documents as of this migration.
+
+from collections import defaultdict
+
+from django.db import migrations
+
+FIELDS = ['name', 'skills', 'description', 'courses', 'universities']
+
+
+def build_documents(apps):
+    Career = apps.get_model('careers', 'Career')
+    Course = apps.get_model('careers', 'Course')
+    University = apps.get_model('careers', 'University')
+
+    course_names = defaultdict(list)
+    for career_id, name in Course.objects.filter(is_active=True).values_list('career_id', 'name'):
+        course_names[str(career_id)].append(name)
+    university_names = defaultdict(list)
+    for career_id, name, program in University.objects.filter(is_active=True).values_list(
+        'career_id', 'name', 'program_name'
+    ):
+        university_names[str(career_id)].append(f"{name} {program}")
+
+    documents = {}
+    for career in Career.objects.filter(is_active=True).only('id', 'name', 'description', 'required_skills'):
+        key = str(career.id)
+        documents[key] = {
+            'name': career.name,
+            'description': career.description or '',
+            'skills': ' '.join(str(skill) for skill in (career.required_skills or [])),
+            'courses': ' '.join(course_names[key]),
+            'universities': ' '.join(university_names[key]),
+        }
+    return documents
+
+
+def populate_careers_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    documents = build_documents(apps)
+    placeholders = ', '.join(['%s'] * (len(FIELDS) + 1))
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DELETE FROM careers_search")
+        cursor.executemany(
+            f"INSERT INTO careers_search (career_id, {', '.join(FIELDS)}) VALUES ({placeholders})",
+            [[career_id] + [doc[f] for f in FIELDS] for career_id, doc in documents.items()],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0010_reparse_salaries'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_careers_search, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Data migration: re-parse growth stored before ranges ("5-7%") were handled,
+# and education stored when a bare "degree" meant a bachelor's
+
+import re
+
+from django.db import migrations
+
+# parsers as of this migration (copied from apps.careers.attributes so the
+# migration doesn't change if that module does)
+_EDUCATION_PATTERNS = [
+    (5, r"\b(ph\.?d|doctor(ate|al)?|md)\b"),
+    (4, r"\b(master'?s?|mba|m\.?sc?)\b"),
+    (3, r"\b(bachelor'?s?|b\.?sc?|b\.?a)\b"),
+    (2, r"\bassociate'?s?\b"),
+    (1, r"\b(certificat\w*|bootcamp|diploma|comptia)\b"),
+    (0, r"\b(high school|no (formal )?degree|none)\b"),
+]
+_PERCENT = re.compile(
+    r"(?<![\d.])(-?\d+(?:\.\d+)?)\s*%?(?:\s*(?:-|–|to)\s*(-?\d+(?:\.\d+)?))?\s*%"
+)
+
+
+def parse_growth(text):
+    match = _PERCENT.search(text or "")
+    if not match:
+        return None
+    low, high = match.group(1), match.group(2)
+    return float(low) if high is None else (float(low) + float(high)) / 2
+
+
+def parse_education_level(text):
+    lowered = (text or "").lower()
+    best = None
+    for level, pattern in _EDUCATION_PATTERNS:
+        match = re.search(pattern, lowered)
+        if match and (best is None or match.start() < best[0]):
+            best = (match.start(), level)
+    return best[1] if best else None
+
+
+def reparse_growth_education(apps, schema_editor):
+    Career = apps.get_model('careers', 'Career')
+    careers = list(Career.objects.only('id', 'job_growth', 'required_education', 'growth_pct', 'education_level'))
+    changed = []
+    for career in careers:
+        parsed = (parse_growth(career.job_growth), parse_education_level(career.required_education))
+        if parsed != (career.growth_pct, career.education_level):
+            career.growth_pct, career.education_level = parsed
+            changed.append(career)
+    Career.objects.bulk_update(changed, ['growth_pct', 'education_level'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('careers', '0011_populate_careers_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(reparse_growth_education, migrations.RunPython.noop),
+    ]
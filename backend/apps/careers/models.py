@@ -1,6 +1,9 @@
 from django.db import models
+import hashlib
 import uuid
 
+from .attributes import EDUCATION_CHOICES, parse_education_level, parse_growth, parse_salary_range
+
 # optional: use pgvector for fast vector similarity queries when using Postgres
 # install with `pip install django-pgvector` and add 'pgvector' to INSTALLED_APPS
 # ``pgvector`` provides a native vector type with cosine operators.
@@ -17,6 +20,15 @@ except ImportError:  # fallback if extension not installed yet
 from django.contrib.postgres.fields import ArrayField
 
 
+# parsed column -> text field it comes from
+PARSED_FIELD_SOURCES = {
+    'salary_min': 'average_salary_range',
+    'salary_max': 'average_salary_range',
+    'growth_pct': 'job_growth',
+    'education_level': 'required_education',
+}
+
+
 class Career(models.Model):
     """
     Stores career information and metadata.
@@ -34,6 +46,19 @@ class Career(models.Model):
     required_education = models.CharField(max_length=255, blank=True, help_text="e.g., 'Bachelor in Computer Science'")
     related_careers = models.JSONField(default=list, help_text="List of related career names")
 
+    # numeric copies of the text fields above, parsed in save() (see attributes.py)
+    salary_min = models.PositiveIntegerField(null=True, blank=True, editable=False,
+                                             help_text="Lower end of average_salary_range (USD/year)")
+    salary_max = models.PositiveIntegerField(null=True, blank=True, editable=False,
+                                             help_text="Upper end of average_salary_range (USD/year)")
+    growth_pct = models.FloatField(null=True, blank=True, editable=False,
+                                   help_text="Annual job growth in percent, parsed from job_growth")
+    education_level = models.PositiveSmallIntegerField(null=True, blank=True, editable=False,
+                                                       choices=EDUCATION_CHOICES,
+                                                       help_text="Parsed from required_education")
+    # normalized copy of ``required_skills`` (kept in sync by apps/careers/skills.py)
+    skills = models.ManyToManyField('Skill', through='CareerSkill', related_name='careers', blank=True)
+
     # ------------------------------------------------------------------
     # fields for the embedding-based recommender system
     # ------------------------------------------------------------------
@@ -45,6 +70,10 @@ class Career(models.Model):
     # pgvector offers a native vector type with built-in cosine operators.
     embedding = models.JSONField(null=True, blank=True,
                                  help_text="Cached embedding for semantic search (list)")
+    # sha256 of the text the embedding was computed from; lets the refresh
+    # command skip careers whose name/description/skills haven't changed.
+    embedding_hash = models.CharField(max_length=64, blank=True, default="",
+                                      help_text="Hash of the source text of the cached embedding")
 
     # numeric ability vector corresponding to the 15 quiz features used by the
     # hybrid scorer.  Stored as JSON by default (will work with all databases).
@@ -69,9 +98,39 @@ class Career(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Keep the parsed numeric columns in step with their text fields."""
+        self.refresh_parsed_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(PARSED_FIELD_SOURCES.values()):
+            kwargs['update_fields'] = set(update_fields) | set(PARSED_FIELD_SOURCES)
+        super().save(*args, **kwargs)
+
+    def refresh_parsed_fields(self) -> None:
+        """Parse salary range, job growth and education text into numbers."""
+        self.salary_min, self.salary_max = parse_salary_range(self.average_salary_range)
+        self.growth_pct = parse_growth(self.job_growth)
+        self.education_level = parse_education_level(self.required_education)
+
     # ------------------------------------------------------------------
     # convenience helpers used by the recommendation pipeline
     # ------------------------------------------------------------------
+    def embedding_source_text(self) -> str:
+        """Text the semantic embedding is computed from (name, description, skills)."""
+        # list concatenation keeps order consistent
+        return " ".join(
+            [self.name or "", self.description or ""] +
+            [str(skill) for skill in (self.required_skills or [])]
+        )
+
+    def compute_embedding_hash(self) -> str:
+        """sha256 hex digest of ``embedding_source_text()``."""
+        return hashlib.sha256(self.embedding_source_text().encode("utf-8")).hexdigest()
+
+    def embedding_is_stale(self) -> bool:
+        """True when the cached embedding is missing or was built from other text."""
+        return self.embedding is None or self.embedding_hash != self.compute_embedding_hash()
+
     def compute_embedding(self, model) -> None:
         """Generate a semantic vector for this career using ``model``.
 
@@ -82,18 +141,82 @@ class Career(models.Model):
 
         The result is normalized and written back to ``self.embedding``.
         This method does **not** run on save automatically; it is usually
-        called from a management command or signal handler.
+        called from a management command or signal handler.  For many careers
+        prefer ``apps.careers.embeddings.refresh_embeddings`` which encodes in
+        batches and writes with ``bulk_update``.
         """
-        from sentence_transformers import SentenceTransformer
-        # build the source text; list concatenation keeps order consistent
-        text = " ".join(
-            [self.name or "", self.description or ""] +
-            (self.required_skills or [])
-        )
+        text = self.embedding_source_text()
         vec = model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
         # pgvector wants a list of floats; JSONField can also store the list.
         self.embedding = vec.tolist()
-        self.save(update_fields=["embedding"])
+        self.embedding_hash = self.compute_embedding_hash()
+        # updated_at moves the catalog version, so scoring indexes reload
+        self.save(update_fields=["embedding", "embedding_hash", "updated_at"])
+
+
+class Skill(models.Model):
+    """
+    A distinct skill from careers' ``required_skills`` lists.
+    ``key`` is the normalized name (see ``skills.normalize_skill``).
+    """
+    
+    name = models.CharField(max_length=100, help_text="Display name, as first seen")
+    key = models.CharField(max_length=100, unique=True, help_text="Lowercased, whitespace-collapsed name")
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Skill'
+        verbose_name_plural = 'Skills'
+    
+    def __str__(self):
+        return self.name
+
+
+class CareerSkill(models.Model):
+    """Through table between careers and their required skills."""
+    
+    career = models.ForeignKey(Career, on_delete=models.CASCADE, related_name='career_skills')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='career_skills')
+    position = models.PositiveSmallIntegerField(default=0, help_text="Order in required_skills")
+    
+    class Meta:
+        ordering = ['career', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['career', 'skill'], name='unique_career_skill'),
+        ]
+    
+    def __str__(self):
+        return f"{self.career_id} requires {self.skill_id}"
+
+
+class CareerNeighbor(models.Model):
+    """
+    Precomputed k nearest neighbours of a career in one vector space.
+    Filled by ``manage.py compute_career_neighbors``; backs
+    GET /api/careers/{id}/similar/.
+    """
+    
+    SPACE_ABILITY = 'ability'
+    SPACE_EMBEDDING = 'embedding'
+    SPACE_CHOICES = [(SPACE_ABILITY, 'Ability vector'), (SPACE_EMBEDDING, 'Embedding')]
+    
+    career = models.ForeignKey(Career, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey(Career, on_delete=models.CASCADE, related_name='+')
+    space = models.CharField(max_length=16, choices=SPACE_CHOICES)
+    rank = models.PositiveSmallIntegerField(help_text="1 = most similar")
+    similarity = models.FloatField(help_text="Cosine similarity")
+    
+    class Meta:
+        ordering = ['career', 'space', 'rank']
+        verbose_name = 'Career neighbor'
+        verbose_name_plural = 'Career neighbors'
+        constraints = [
+            # also the index used by the similar-careers lookup
+            models.UniqueConstraint(fields=['career', 'space', 'rank'], name='unique_career_neighbor_rank'),
+        ]
+    
+    def __str__(self):
+        return f"{self.career_id} → {self.neighbor_id} ({self.space} #{self.rank})"
 
 
 class Course(models.Model):
@@ -0,0 +1,278 @@
+"""
+Ranked full-text search over careers.
+
+Each active career is one search document made of its name, description,
+required skills and the names of its linked courses and universities.  Two
+backends implement the same small interface:
+
+* ``Fts5SearchBackend``   - SQLite FTS5 virtual table ranked with ``bm25()``
+                            (created by migration ``careers.0009``)
+* ``MemorySearchBackend`` - in-process inverted index with BM25 scoring, used
+                            when FTS5 isn't available (e.g. on Postgres)
+
+Both do prefix matching on every query term (``dat sci`` finds "Data
+Scientist") and require all terms to match.  ``SEARCH_BACKEND`` picks
+``'fts5'``, ``'memory'`` or ``'auto'`` (FTS5 when possible).
+
+The index is maintained incrementally: signal handlers in ``signals.py`` call
+``update_career`` after a career, course or university is saved or deleted.
+The memory backend lives in process memory, so every worker builds its own
+copy on first use and only sees edits made through that worker (plus full
+rebuilds).  Migration ``careers.0011`` fills the FTS5 table;
+``manage.py rebuild_search_index`` rebuilds it, e.g. after bulk imports.
+"""
+
+import bisect
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Career, Course, University
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# relative importance of each document field
+FIELD_WEIGHTS = {
+    "name": 10.0,
+    "skills": 4.0,
+    "description": 2.0,
+    "courses": 1.0,
+    "universities": 1.0,
+}
+FIELDS = list(FIELD_WEIGHTS)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def build_documents(career_ids: Optional[Iterable] = None) -> Dict[str, Dict[str, str]]:
+    """Return ``{career_id: {field: text}}`` for active careers (3 queries)."""
+    careers = Career.objects.filter(is_active=True).only("id", "name", "description", "required_skills")
+    courses = Course.objects.filter(is_active=True)
+    universities = University.objects.filter(is_active=True)
+    if career_ids is not None:
+        career_ids = list(career_ids)
+        careers = careers.filter(id__in=career_ids)
+        courses = courses.filter(career_id__in=career_ids)
+        universities = universities.filter(career_id__in=career_ids)
+
+    course_names = defaultdict(list)
+    for career_id, name in courses.values_list("career_id", "name"):
+        course_names[str(career_id)].append(name)
+    university_names = defaultdict(list)
+    for career_id, name, program in universities.values_list("career_id", "name", "program_name"):
+        university_names[str(career_id)].append(f"{name} {program}")
+
+    documents = {}
+    for career in careers:
+        key = str(career.id)
+        documents[key] = {
+            "name": career.name,
+            "description": career.description or "",
+            "skills": " ".join(str(skill) for skill in (career.required_skills or [])),
+            "courses": " ".join(course_names[key]),
+            "universities": " ".join(university_names[key]),
+        }
+    return documents
+
+
+# ---------------------------------------------------------------------------
+# SQLite FTS5
+# ---------------------------------------------------------------------------
+class Fts5SearchBackend:
+    """Search through an FTS5 virtual table next to the career tables."""
+
+    name = "fts5"
+    table = "careers_search"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """True on SQLite once the migration has created the FTS5 table."""
+        if connection.vendor != "sqlite":
+            return False
+        return cls.table in connection.introspection.table_names()
+
+    def rebuild(self) -> int:
+        documents = build_documents()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            self._insert(cursor, documents)
+        logger.info(f"Rebuilt FTS5 search index with {len(documents)} careers")
+        return len(documents)
+
+    def update_career(self, career_id) -> None:
+        documents = build_documents([career_id])
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE career_id = %s", [str(career_id)])
+            self._insert(cursor, documents)
+
+    def remove_career(self, career_id) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE career_id = %s", [str(career_id)])
+
+    def _insert(self, cursor, documents: Dict[str, Dict[str, str]]) -> None:
+        placeholders = ", ".join(["%s"] * (len(FIELDS) + 1))
+        cursor.executemany(
+            f"INSERT INTO {self.table} (career_id, {', '.join(FIELDS)}) VALUES ({placeholders})",
+            [[career_id] + [doc[f] for f in FIELDS] for career_id, doc in documents.items()],
+        )
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # every term as a quoted prefix query: "dat"* "sci"*
+        match = " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        weights = ", ".join(["0.0"] + [str(FIELD_WEIGHTS[f]) for f in FIELDS])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT career_id, bm25({self.table}, {weights}) AS score FROM {self.table} "
+                f"WHERE {self.table} MATCH %s ORDER BY score LIMIT %s",
+                [match, limit],
+            )
+            # bm25() is "lower is better"; flip it so higher scores rank first
+            return [(career_id, -score) for career_id, score in cursor.fetchall()]
+
+
+# ---------------------------------------------------------------------------
+# in-process inverted index
+# ---------------------------------------------------------------------------
+class MemorySearchBackend:
+    """Inverted index with field-weighted BM25 and prefix expansion."""
+
+    name = "memory"
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)  # term -> {doc: weighted tf}
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._doc_length: Dict[str, float] = {}
+        self._vocabulary: List[str] = []  # sorted, for prefix lookups
+        self._total_length = 0.0
+
+    def _ensure_built(self) -> None:
+        if not self._built:
+            self.rebuild()
+
+    def rebuild(self) -> int:
+        documents = build_documents()
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_length.clear()
+            self._vocabulary = []
+            self._total_length = 0.0
+            for career_id, doc in documents.items():
+                self._add(career_id, doc)
+            self._built = True
+        logger.info(f"Built in-memory search index with {len(documents)} careers")
+        return len(documents)
+
+    def update_career(self, career_id) -> None:
+        if not self._built:
+            return  # the first search builds everything anyway
+        documents = build_documents([career_id])
+        with self._lock:
+            self._remove(str(career_id))
+            for key, doc in documents.items():
+                self._add(key, doc)
+
+    def remove_career(self, career_id) -> None:
+        with self._lock:
+            self._remove(str(career_id))
+
+    def _add(self, career_id: str, doc: Dict[str, str]) -> None:
+        weighted = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(doc[field]):
+                weighted[token] += weight
+        for term, tf in weighted.items():
+            if term not in self._postings:
+                bisect.insort(self._vocabulary, term)
+            self._postings[term][career_id] = tf
+        self._doc_terms[career_id] = list(weighted)
+        length = float(sum(weighted.values()))
+        self._doc_length[career_id] = length
+        self._total_length += length
+
+    def _remove(self, career_id: str) -> None:
+        for term in self._doc_terms.pop(career_id, []):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(career_id, None)
+                # empty terms stay in the vocabulary; they just never match
+        self._total_length -= self._doc_length.pop(career_id, 0.0)
+
+    def _expand(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            if self._postings.get(term):
+                terms.append(term)
+        return terms
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+        self._ensure_built()
+        with self._lock:
+            n_docs = len(self._doc_length)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Optional[Dict[str, float]] = None
+            for prefix in terms:
+                # like FTS5, a prefix is one query term: its occurrences are
+                # summed per document and it has a single idf
+                tf_by_doc: Dict[str, float] = defaultdict(float)
+                for term in self._expand(prefix):
+                    for career_id, tf in self._postings[term].items():
+                        tf_by_doc[career_id] += tf
+                idf = math.log(1.0 + (n_docs - len(tf_by_doc) + 0.5) / (len(tf_by_doc) + 0.5))
+                term_scores: Dict[str, float] = {}
+                for career_id, tf in tf_by_doc.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_length[career_id] / avg_length)
+                    term_scores[career_id] = idf * tf * (self.k1 + 1) / (tf + norm)
+                # every query term must match (like FTS5's implicit AND)
+                if scores is None:
+                    scores = dict(term_scores)
+                else:
+                    scores = {doc: s + term_scores[doc] for doc, s in scores.items() if doc in term_scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """Return the process-wide search backend chosen by ``SEARCH_BACKEND``."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                choice = getattr(settings, "SEARCH_BACKEND", "auto")
+                if choice == "fts5" or (choice == "auto" and Fts5SearchBackend.is_available()):
+                    _backend = Fts5SearchBackend()
+                else:
+                    _backend = MemorySearchBackend()
+                logger.info(f"Using {_backend.name} search backend")
+    return _backend
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Career, Course, University
+from .models import Career, CareerNeighbor, Course, University
 
 
 class CourseSerializer(serializers.ModelSerializer):
@@ -32,7 +32,8 @@ class CareerDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'description', 'required_skills', 'suitable_for',
             'average_salary_range', 'job_growth', 'typical_companies',
-            'required_education', 'related_careers', 'courses', 'universities'
+            'required_education', 'related_careers', 'courses', 'universities',
+            'salary_min', 'salary_max', 'growth_pct', 'education_level'
         ]
 
 
@@ -42,3 +43,13 @@ class CareerListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Career
         fields = ['id', 'name', 'description', 'average_salary_range', 'job_growth']
+
+
+class SimilarCareerSerializer(serializers.ModelSerializer):
+    """A precomputed neighbour of a career, with the neighbour's list fields."""
+    
+    career = CareerListSerializer(source='neighbor', read_only=True)
+    
+    class Meta:
+        model = CareerNeighbor
+        fields = ['rank', 'similarity', 'career']
@@ -0,0 +1,81 @@
+"""
+Signal handlers for the careers app.
+
+Connected in ``CareersConfig.ready``.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Career, Course, University
+
+# saving only fields outside this set can't change the embedding source text
+EMBEDDING_SOURCE_FIELDS = {"name", "description", "required_skills", "is_active"}
+# ... or the career's search document
+SEARCH_SOURCE_FIELDS = EMBEDDING_SOURCE_FIELDS
+
+
+@receiver(post_save, sender=Career, dispatch_uid="careers.enqueue_reembedding")
+def enqueue_reembedding(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Queue a debounced background re-embedding when the source text changed."""
+    if raw or not getattr(settings, "CAREER_AUTO_EMBED", True) or not instance.is_active:
+        return
+    if update_fields is not None and not (set(update_fields) & EMBEDDING_SOURCE_FIELDS):
+        return
+    if not instance.embedding_is_stale():
+        return
+
+    from .embedding_queue import get_embedding_queue
+
+    career_id = instance.pk
+    # wait for the admin transaction to commit so the worker sees the edit
+    transaction.on_commit(lambda: get_embedding_queue().enqueue(career_id))
+
+
+@receiver(post_save, sender=Career, dispatch_uid="careers.sync_skills")
+def sync_skills(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Keep the normalized Skill/CareerSkill rows in step with ``required_skills``."""
+    if raw:
+        return
+    if update_fields is not None and "required_skills" not in update_fields:
+        return
+    from .skills import sync_career_skills
+
+    sync_career_skills([instance])
+
+
+def _reindex_on_commit(career_id):
+    from .search import get_search_backend
+
+    transaction.on_commit(lambda: get_search_backend().update_career(career_id))
+
+
+@receiver(post_save, sender=Career, dispatch_uid="careers.reindex_career")
+def reindex_career(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Refresh the career's search document (inactive careers drop out)."""
+    if raw:
+        return
+    if update_fields is not None and not (set(update_fields) & SEARCH_SOURCE_FIELDS):
+        return
+    _reindex_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=Career, dispatch_uid="careers.unindex_career")
+def unindex_career(sender, instance, **kwargs):
+    from .search import get_search_backend
+
+    career_id = instance.pk
+    transaction.on_commit(lambda: get_search_backend().remove_career(career_id))
+
+
+@receiver(post_save, sender=Course, dispatch_uid="careers.reindex_course")
+@receiver(post_delete, sender=Course, dispatch_uid="careers.reindex_course_delete")
+@receiver(post_save, sender=University, dispatch_uid="careers.reindex_university")
+@receiver(post_delete, sender=University, dispatch_uid="careers.reindex_university_delete")
+def reindex_parent_career(sender, instance, raw=False, **kwargs):
+    """Course and university names are part of their career's search document."""
+    if raw:
+        return
+    _reindex_on_commit(instance.career_id)
@@ -0,0 +1,173 @@
+"""
+Normalized career skills and the in-memory skill bitmap index.
+
+``Career.required_skills`` stays the editable source of truth; the ``Skill``
+and ``CareerSkill`` tables are a normalized copy kept in sync by
+``sync_career_skills`` (called from ``import_careers``, the career post_save
+signal and migration 0006).
+
+``SkillBitmapIndex`` maps every skill to a packed bitmap over the positions
+of the catalog index, so "careers requiring python AND sql" is a couple of
+``bitwise_and`` calls over N/8 bytes instead of a scan of every JSON list.
+It is rebuilt together with the catalog index (``get_skill_index``).
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.db import transaction
+
+from .models import Career, CareerSkill, Skill
+
+_SPACES = re.compile(r"\s+")
+
+# length of ``Skill.key`` / ``Skill.name``
+MAX_SKILL_LENGTH = 100
+
+
+def normalize_skill(name) -> str:
+    """'  Data  Analysis ' -> 'data analysis' (punctuation is kept: 'c++', 'ci/cd').
+
+    Keys are cut to ``MAX_SKILL_LENGTH`` characters to fit ``Skill.key``.
+    """
+    return _SPACES.sub(" ", str(name)).strip().lower()[:MAX_SKILL_LENGTH].rstrip()
+
+
+def parse_skills(value) -> List[str]:
+    """Normalized skills from 'python, sql' or ['Python', 'SQL'] (empty items dropped)."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [key for key in (normalize_skill(v) for v in value) if key]
+
+
+def _career_skill_keys(career: Career) -> Dict[str, str]:
+    """``{key: display name}`` in list order, first spelling wins."""
+    keys: Dict[str, str] = {}
+    for raw in career.required_skills or []:
+        key = normalize_skill(raw)
+        if key and key not in keys:
+            keys[key] = _SPACES.sub(" ", str(raw)).strip()[:MAX_SKILL_LENGTH]
+    return keys
+
+
+def sync_career_skills(careers: Iterable[Career]) -> int:
+    """Make the ``CareerSkill`` rows of ``careers`` match their ``required_skills``.
+
+    Careers whose rows already match are left alone.  Returns the number of
+    careers rewritten.
+    """
+    careers = list(careers)
+    if not careers:
+        return 0
+    wanted = {career.pk: _career_skill_keys(career) for career in careers}
+
+    current: Dict[object, List[str]] = {career.pk: [] for career in careers}
+    for career_id, key in (
+        CareerSkill.objects.filter(career_id__in=wanted)
+        .order_by("career_id", "position")
+        .values_list("career_id", "skill__key")
+    ):
+        current[career_id].append(key)
+    changed = [pk for pk, keys in wanted.items() if list(keys) != current[pk]]
+    if not changed:
+        return 0
+
+    with transaction.atomic():
+        names = {}
+        for pk in changed:
+            for key, name in wanted[pk].items():
+                names.setdefault(key, name)
+        Skill.objects.bulk_create(
+            [Skill(key=key, name=name) for key, name in names.items()],
+            ignore_conflicts=True,
+            batch_size=1000,
+        )
+        skill_ids = dict(Skill.objects.filter(key__in=names).values_list("key", "id"))
+
+        CareerSkill.objects.filter(career_id__in=changed).delete()
+        CareerSkill.objects.bulk_create(
+            [
+                CareerSkill(career_id=pk, skill_id=skill_ids[key], position=position)
+                for pk in changed
+                for position, key in enumerate(wanted[pk])
+            ],
+            batch_size=1000,
+        )
+
+    from ml.catalog_index import bump_catalog_version
+
+    # skill bitmaps hang off the catalog index
+    bump_catalog_version()
+    return len(changed)
+
+
+class SkillBitmapIndex:
+    """Packed skill -> career bitmaps over catalog index positions."""
+
+    def __init__(self, size: int, skill_positions: Dict[str, Iterable[int]]):
+        self.size = size
+        self.keys = sorted(skill_positions)
+        self.row = {key: i for i, key in enumerate(self.keys)}
+        dense = np.zeros((len(self.keys), size), dtype=bool)
+        for key, positions in skill_positions.items():
+            dense[self.row[key], list(positions)] = True
+        self.bitmaps = np.packbits(dense, axis=1) if size else np.zeros((len(self.keys), 0), np.uint8)
+
+    @classmethod
+    def build(cls, index) -> "SkillBitmapIndex":
+        """Build from the ``CareerSkill`` table for the careers of a ``CatalogIndex``."""
+        skill_positions: Dict[str, List[int]] = {}
+        for career_id, key in CareerSkill.objects.filter(
+            career__is_active=True
+        ).values_list("career_id", "skill__key"):
+            pos = index.position.get(str(career_id))
+            if pos is not None:
+                skill_positions.setdefault(key, []).append(pos)
+        return cls(index.size, skill_positions)
+
+    def bitmap(self, skills: Iterable[str], mode: str = "all") -> np.ndarray:
+        """Packed bitmap of careers having all (``mode='all'``) or any of ``skills``."""
+        width = self.bitmaps.shape[1]
+        rows = [self.row.get(normalize_skill(s)) for s in skills]
+        if mode == "all":
+            if not rows or any(r is None for r in rows):
+                return np.zeros(width, dtype=np.uint8)
+            return np.bitwise_and.reduce(self.bitmaps[rows], axis=0)
+        if mode == "any":
+            rows = [r for r in rows if r is not None]
+            if not rows:
+                return np.zeros(width, dtype=np.uint8)
+            return np.bitwise_or.reduce(self.bitmaps[rows], axis=0)
+        raise ValueError(f"mode must be 'all' or 'any', got {mode!r}")
+
+    def mask(self, skills: Iterable[str], mode: str = "all") -> np.ndarray:
+        """Boolean (N,) mask over catalog positions."""
+        return np.unpackbits(self.bitmap(skills, mode), count=self.size).astype(bool)
+
+    def positions(self, skills: Iterable[str], mode: str = "all") -> np.ndarray:
+        return np.flatnonzero(self.mask(skills, mode))
+
+    def counts(self) -> Dict[str, int]:
+        """Number of careers per skill."""
+        bits = np.unpackbits(self.bitmaps, axis=1, count=self.size).sum(axis=1)
+        return dict(zip(self.keys, bits.tolist()))
+
+
+def get_skill_index(index=None) -> SkillBitmapIndex:
+    """Skill bitmaps for the current (or given) catalog index, built once per version."""
+    if index is None:
+        from ml.catalog_index import get_catalog_index
+
+        index = get_catalog_index()
+    return index.derived("skill_bitmaps", lambda: SkillBitmapIndex.build(index))
+
+
+def skill_mask(skills, mode: str = "all", index=None) -> Optional[np.ndarray]:
+    """Boolean catalog mask for a skills filter, or None when no skills were given."""
+    keys = parse_skills(skills)
+    if not keys:
+        return None
+    return get_skill_index(index).mask(keys, mode)
@@ -0,0 +1,144 @@
+"""
+Tests for the careers app.
+
+Run with: python manage.py test apps.careers
+"""
+
+from unittest import mock
+
+import numpy as np
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from .embedding_queue import EmbeddingRefreshQueue
+from .embeddings import refresh_embeddings
+from .models import Career, CareerNeighbor, Skill
+from .search import Fts5SearchBackend
+from .skills import MAX_SKILL_LENGTH, parse_skills, sync_career_skills
+
+
+class SearchMigrationTests(TransactionTestCase):
+    """Careers that exist before ``migrate`` are searchable right after it."""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([target])
+
+    def test_existing_careers_are_searchable_after_migrate(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('FTS5 search is SQLite only')
+        self.migrate(('careers', '0010_reparse_salaries'))
+        Career.objects.create(name='Data Scientist', description='Models data', suitable_for='Analysts')
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM careers_search")  # as after 0009 on a fresh table
+
+        self.migrate(('careers', '0011_populate_careers_search'))
+        career_ids = [career_id for career_id, _ in Fts5SearchBackend().search('dat sci')]
+        self.assertEqual(career_ids, [str(Career.objects.get(name='Data Scientist').id)])
+
+
+class SkillKeyTests(TestCase):
+    """Skill keys always fit ``Skill.key``, however long the source text."""
+
+    def test_long_skill_is_cut_to_the_key_length(self):
+        long_skill = 'Statistical  Modelling ' * 10
+        career = Career.objects.create(
+            name='Statistician', description='Models data', suitable_for='Analysts',
+            required_skills=[long_skill, 'Python'],
+        )
+        sync_career_skills([career])
+        keys = sorted(Skill.objects.values_list('key', flat=True))
+        self.assertEqual(len(keys), 2)
+        self.assertTrue(all(len(key) <= MAX_SKILL_LENGTH for key in keys))
+        # filters normalize the same way, so the long skill can still be queried
+        self.assertIn(parse_skills([long_skill])[0], keys)
+
+
+class SimilarCareersTests(TestCase):
+    """GET /api/careers/{id}/similar/ only serves active careers."""
+
+    def setUp(self):
+        self.career, self.other = [
+            Career.objects.create(name=name, description=name, suitable_for='Anyone')
+            for name in ('Data Scientist', 'Data Analyst')
+        ]
+        CareerNeighbor.objects.create(
+            career=self.career, neighbor=self.other, space=CareerNeighbor.SPACE_EMBEDDING, rank=1, similarity=0.9
+        )
+        self.client = APIClient()
+
+    def test_neighbours_of_an_active_career(self):
+        response = self.client.get(f'/api/careers/{self.career.id}/similar/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_inactive_career_is_not_found(self):
+        Career.objects.filter(id=self.career.id).update(is_active=False)
+        response = self.client.get(f'/api/careers/{self.career.id}/similar/')
+        self.assertEqual(response.status_code, 404)
+
+
+class FakeModel:
+    """Encoder double: fails on any text mentioning 'Broken'."""
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        if any('Broken' in text for text in texts):
+            raise ValueError('cannot encode')
+        return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+
+class EmbeddingRefreshTests(TestCase):
+    """One career failing to encode doesn't stop the others."""
+
+    def setUp(self):
+        self.careers = [
+            Career.objects.create(name=name, description=name, suitable_for='Anyone')
+            for name in ('Analyst', 'Broken Career', 'Designer')
+        ]
+
+    def test_failed_career_is_skipped_and_reported(self):
+        failed = []
+        counts = refresh_embeddings(
+            Career.objects.order_by('name'), FakeModel(), chunk_size=10,
+            on_error=lambda career, exc: failed.append(career.name),
+        )
+        self.assertEqual(counts, {'encoded': 2, 'skipped': 0, 'failed': 1})
+        self.assertEqual(failed, ['Broken Career'])
+        embedded = dict(Career.objects.values_list('name', 'embedding_hash'))
+        self.assertEqual(embedded['Broken Career'], '')
+        self.assertTrue(embedded['Analyst'] and embedded['Designer'])
+
+    def test_compute_embedding_moves_updated_at(self):
+        career = self.careers[0]
+        before = Career.objects.get(pk=career.pk).updated_at
+        career.compute_embedding(FakeModel())
+        self.assertGreater(Career.objects.get(pk=career.pk).updated_at, before)
+
+
+class EmbeddingQueueTests(TestCase):
+    """Pending re-embeds are flushed, or reported, when the process exits."""
+
+    def setUp(self):
+        self.career = Career.objects.create(name='Analyst', description='Data', suitable_for='Anyone')
+        self.queue = EmbeddingRefreshQueue(debounce_seconds=3600, max_delay_seconds=3600)
+
+    @mock.patch('apps.careers.embedding_queue.refresh_embeddings',
+                return_value={'encoded': 1, 'skipped': 0, 'failed': 0})
+    def test_flush_embeds_pending_careers(self, refresh):
+        self.queue.enqueue(self.career.id)
+        self.queue.flush()
+        self.assertEqual([c.pk for c in refresh.call_args[0][0]], [self.career.pk])
+        self.assertEqual(self.queue.stats()['pending'], 0)
+        self.assertEqual(self.queue.encoded, 1)
+
+    @mock.patch('apps.careers.embedding_queue.refresh_embeddings', side_effect=ImportError('no backend'))
+    def test_dropped_careers_are_logged(self, refresh):
+        self.queue.enqueue(self.career.id)
+        with self.assertLogs('apps.careers.embedding_queue', 'WARNING') as logs:
+            self.queue.flush()
+        self.assertIn(str(self.career.id), logs.output[-1])
@@ -1,21 +1,70 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.shortcuts import get_object_or_404
-from .models import Career, Course, University
+from uuid import UUID
+import numpy as np
+from .models import Career, CareerNeighbor, Course, University
+from .search import get_search_backend
 from .serializers import (
     CareerDetailSerializer, 
     CareerListSerializer,
     CourseSerializer,
+    SimilarCareerSerializer,
     UniversitySerializer
 )
+from .skills import get_skill_index, parse_skills
+from ml.ability_recommender import ABILITY_KEYS
+from ml.catalog_index import get_catalog_index
+
+
+class CareerPagination(PageNumberPagination):
+    """Pagination for filtered career lists."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def parse_ability_ranges(params):
+    """
+    Read ``min_<ability>`` / ``max_<ability>`` query params (0-10 scale).
+    
+    Returns {dimension: (low, high)} with None for an open bound; raises
+    ValueError with a readable message on bad input.
+    """
+    ranges = {}
+    for dim, key in enumerate(ABILITY_KEYS):
+        bounds = []
+        for prefix in ('min', 'max'):
+            raw = params.get(f'{prefix}_{key}')
+            if raw in (None, ''):
+                bounds.append(None)
+                continue
+            try:
+                value = float(raw)
+            except ValueError:
+                raise ValueError(f'{prefix}_{key} must be a number')
+            if not 0 <= value <= 10:
+                raise ValueError(f'{prefix}_{key} must be between 0 and 10')
+            bounds.append(value)
+        low, high = bounds
+        if low is not None and high is not None and low > high:
+            raise ValueError(f'min_{key} is greater than max_{key}')
+        if low is not None or high is not None:
+            ranges[dim] = (low, high)
+    return ranges
 
 
 class CareerViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoints for career information.
     GET /api/careers/ - List all careers
+        filters (paginated): ?skills=python,sql&skills_mode=all|any
+                             ?min_creativity=7&max_technical=5 (any ability, 0-10)
     GET /api/careers/{id}/ - Get career details with courses and universities
+    GET /api/careers/{id}/similar/ - Most similar careers (precomputed)
     """
     
     queryset = Career.objects.filter(is_active=True)
@@ -29,7 +78,44 @@ class CareerViewSet(viewsets.ReadOnlyModelViewSet):
         return CareerDetailSerializer
     
     def list(self, request, *args, **kwargs):
-        """Return all active careers as list."""
+        """
+        Return all active careers as list.
+        
+        Filters are answered from the in-memory catalog index instead of
+        scanning the JSON columns, and their results are paginated
+        (``page``, ``page_size``):
+        
+        * ``?skills=python,sql`` keeps careers requiring all of the skills
+          (``skills_mode=any`` for at least one) via the skill bitmaps
+        * ``?min_<ability>=7&max_<ability>=5`` keeps careers whose ability
+          requirements fall in range, via per-dimension sorted arrays
+          (abilities: ``logical_thinking``, ``creativity``, ``technical``, ...)
+        """
+        skills = parse_skills(request.query_params.get('skills'))
+        try:
+            ranges = parse_ability_ranges(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if skills or ranges:
+            mode = request.query_params.get('skills_mode', 'all')
+            if mode not in ('all', 'any'):
+                return Response(
+                    {'error': "skills_mode must be 'all' or 'any'"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            index = get_catalog_index()
+            mask = np.ones(index.size, dtype=bool)
+            if skills:
+                mask &= get_skill_index(index).mask(skills, mode)
+            if ranges:
+                mask &= index.ability_ranges().query(ranges)
+            
+            paginator = CareerPagination()
+            page = paginator.paginate_queryset(np.flatnonzero(mask), request, view=self)
+            serializer = self.get_serializer([index.careers[pos] for pos in page], many=True)
+            return paginator.get_paginated_response(serializer.data)
+        
         queryset = self.get_queryset()
         serializer = self.get_serializer(queryset, many=True)
         return Response({
@@ -42,6 +128,85 @@ class CareerViewSet(viewsets.ReadOnlyModelViewSet):
         career = get_object_or_404(self.queryset, id=pk)
         serializer = self.get_serializer(career)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        Return the most similar careers from the neighbour table
+        (filled by ``manage.py compute_career_neighbors``).
+        
+        Query params:
+            space: 'embedding' (default) or 'ability'
+            limit: number of careers (default 10)
+        """
+        space = request.query_params.get('space', CareerNeighbor.SPACE_EMBEDDING)
+        if space not in dict(CareerNeighbor.SPACE_CHOICES):
+            return Response(
+                {'error': f"space must be one of: {', '.join(dict(CareerNeighbor.SPACE_CHOICES))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        neighbors = list(
+            CareerNeighbor.objects
+            .filter(career_id=pk, career__is_active=True, space=space, neighbor__is_active=True)
+            .select_related('neighbor')
+            .order_by('rank')[:limit]
+        )
+        # neighbours of an inactive career are filtered out above; an empty
+        # result may also mean "not computed yet", so only then pay for the
+        # existence check
+        if not neighbors:
+            get_object_or_404(self.queryset, id=pk)
+        
+        return Response({
+            'career_id': pk,
+            'space': space,
+            'results': SimilarCareerSerializer(neighbors, many=True).data
+        })
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """
+    Ranked full-text search over careers (name, description, skills and the
+    names of linked courses and universities).
+    GET /api/search/?q=data sci&limit=20
+    """
+    
+    permission_classes = [AllowAny]
+    
+    def search(self, request):
+        """Return active careers matching every query term (prefix match), best first."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'Query parameter q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        backend = get_search_backend()
+        hits = backend.search(query, limit=limit)
+        careers = Career.objects.filter(is_active=True).in_bulk([career_id for career_id, _ in hits])
+        
+        results = []
+        for career_id, score in hits:
+            career = careers.get(UUID(career_id))
+            if career is None:
+                continue  # deactivated/deleted since it was indexed
+            data = CareerListSerializer(career).data
+            data['score'] = round(score, 4)
+            results.append(data)
+        
+        return Response({
+            'query': query,
+            'backend': backend.name,
+            'count': len(results),
+            'results': results
+        })
 
 
 class CourseViewSet(viewsets.ReadOnlyModelViewSet):
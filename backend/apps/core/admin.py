@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import IdempotencyKey
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'key', 'status_code', 'created_at', 'expires_at')
+    list_filter = ('scope', 'status_code')
+    search_fields = ('key',)
+    readonly_fields = ('created_at',)
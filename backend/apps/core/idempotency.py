@@ -0,0 +1,145 @@
+"""
+``Idempotency-Key`` support for write endpoints.
+
+Mobile clients retry ``POST /api/quiz/submit/`` and
+``POST /api/results/recommend/`` after a timeout, and every retry used to
+redo all of its writes.  A view decorated with ``@idempotent('<scope>')``
+looks up the request's ``Idempotency-Key`` header first:
+
+* unknown key: the key is reserved first - a row with no response yet,
+  under the unique (scope, key) constraint - then the view runs and its
+  response (status < 500) is stored in that row with a digest of the
+  request body for ``IDEMPOTENCY_KEY_TTL_SECONDS``.  A 5xx or an exception
+  deletes the reservation so the client can retry;
+* known key, same body: the stored response is replayed with an
+  ``Idempotent-Replayed: true`` header - the view does not run, so the
+  answer and recommendation tables are not touched.  While the first
+  request is still running the retry gets 409 instead of running twice;
+* known key, different body: 422, the client reused a key by mistake.
+
+A reservation left by a request that never finished expires after
+``IDEMPOTENCY_IN_PROGRESS_SECONDS``.  Requests without the header behave as
+before.  Expired keys are ignored and deleted in bulk by
+``python manage.py purge_idempotency_keys``.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def _digest(data) -> str:
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def idempotent(scope: str):
+    """Decorator for ViewSet methods that replays responses by ``Idempotency-Key``."""
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'success': False, 'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            request_digest = _digest({'data': request.data, 'query': request.query_params.dict()})
+            reserved, stored = _reserve(scope, key, request_digest)
+            if reserved is None:
+                if stored is not None and stored.request_digest != request_digest:
+                    return Response(
+                        {'success': False, 'error': f'{HEADER} was already used with a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                if stored is None or stored.status_code is None:
+                    return Response(
+                        {'success': False, 'error': f'A request with this {HEADER} is still in progress'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                response = Response(stored.response_body, status=stored.status_code)
+                response[REPLAYED_HEADER] = 'true'
+                return response
+
+            try:
+                response = view_method(self, request, *args, **kwargs)
+            except Exception:
+                _release(reserved)
+                raise
+            if response.status_code < 500:
+                _store(reserved, response)
+            else:
+                _release(reserved)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _reserve(scope, key, request_digest):
+    """Reserve ``scope``/``key`` for this request.
+
+    Returns ``(pk, None)`` with the reserved row, or ``(None, row)`` when a
+    live key exists (``row`` is None if it vanished meanwhile, i.e. its
+    request just failed).
+    """
+    now = timezone.now()
+    reservation = {
+        'request_digest': request_digest,
+        'status_code': None,
+        'response_body': None,
+        'response_digest': '',
+        'expires_at': now + timedelta(seconds=getattr(settings, 'IDEMPOTENCY_IN_PROGRESS_SECONDS', 60)),
+    }
+    stored = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if stored is None:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(scope=scope, key=key, **reservation).pk, None
+        except IntegrityError:
+            # a concurrent request with the same key reserved it first
+            return None, IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if stored.expires_at <= now:
+        # take the expired row over, unless a concurrent request just did
+        if IdempotencyKey.objects.filter(pk=stored.pk, expires_at__lte=now).update(created_at=now, **reservation):
+            return stored.pk, None
+        return None, IdempotencyKey.objects.filter(pk=stored.pk).first()
+    return None, stored
+
+
+def _store(pk, response):
+    stored = IdempotencyKey.objects.filter(pk=pk, status_code__isnull=True).update(
+        status_code=response.status_code,
+        response_body=response.data,
+        response_digest=_digest(response.data),
+        expires_at=timezone.now() + timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL_SECONDS', 86400)),
+    )
+    if not stored:
+        # the reservation expired and another request took the key over
+        logger.info(f"Idempotency key reservation {pk} was taken over before the response was stored")
+
+
+def _release(pk):
+    IdempotencyKey.objects.filter(pk=pk, status_code__isnull=True).delete()
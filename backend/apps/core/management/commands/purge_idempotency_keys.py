@@ -0,0 +1,49 @@
+"""
+Management command to delete expired idempotency keys.
+
+Usage: python manage.py purge_idempotency_keys [--batch-size 5000] [--dry-run]
+
+Expired keys are already ignored by ``@idempotent`` views; this only keeps
+the table small.  Rows are deleted in primary-key batches so a large backlog
+never holds the write lock for long.  Safe to run from cron.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key responses in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows deleted per statement (default: 5000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the expired keys",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} expired idempotency keys")
+            return
+
+        deleted = 0
+        while True:
+            ids = list(expired.order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            # no relations or signals: a single DELETE ... WHERE id IN (...)
+            deleted += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Deleted {deleted} expired idempotency keys"))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:12
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='response_body',
+            field=models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='response_digest',
+            field=models.CharField(blank=True, help_text='SHA-256 of the response body', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Empty while the request is in progress', null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response stored for a client-supplied ``Idempotency-Key`` header.
+    A retried request with the same key gets this response replayed
+    instead of being executed again (see ``apps/core/idempotency.py``).
+    """
+    
+    scope = models.CharField(max_length=64, help_text="Endpoint the key was used on, e.g. 'quiz.submit'")
+    key = models.CharField(max_length=255)
+    request_digest = models.CharField(max_length=64, help_text="SHA-256 of the request body")
+    
+    # Stored response; all empty while the first request is still running
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True,
+                                                   help_text="Empty while the request is in progress")
+    response_body = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    response_digest = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the response body")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_scope_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}: {self.key}"
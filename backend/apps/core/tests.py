@@ -0,0 +1,95 @@
+"""
+Tests for the ``Idempotency-Key`` decorator.
+
+Run with: python manage.py test apps.core
+"""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from .idempotency import REPLAYED_HEADER, idempotent
+from .models import IdempotencyKey
+
+
+class CountingViewSet(viewsets.ViewSet):
+    """Counts its runs; ``during`` runs once inside the view, ``fail`` picks the outcome."""
+
+    calls = 0
+    during = None
+    fail = None
+
+    @idempotent('test.create')
+    def create(self, request):
+        type(self).calls += 1
+        if self.during:
+            type(self).during, during = None, self.during
+            during()
+        if self.fail == 'raise':
+            raise RuntimeError('boom')
+        if self.fail == '500':
+            return Response({'success': False}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({'success': True, 'call': self.calls}, status=status.HTTP_201_CREATED)
+
+
+class IdempotencyTests(TestCase):
+
+    def setUp(self):
+        CountingViewSet.calls = 0
+        CountingViewSet.during = None
+        CountingViewSet.fail = None
+        self.view = CountingViewSet.as_view({'post': 'create'})
+        self.factory = APIRequestFactory()
+
+    def post(self, data, key='key-1'):
+        request = self.factory.post('/test/', data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        return self.view(request)
+
+    def test_same_key_and_body_is_replayed(self):
+        first = self.post({'a': 1})
+        second = self.post({'a': 1})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second[REPLAYED_HEADER], 'true')
+        self.assertEqual(CountingViewSet.calls, 1)
+
+    def test_same_key_with_another_body_is_rejected(self):
+        self.post({'a': 1})
+        response = self.post({'a': 2})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CountingViewSet.calls, 1)
+
+    def test_expired_key_runs_the_view_again(self):
+        self.post({'a': 1})
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.post({'a': 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['call'], 2)
+        self.assertEqual(IdempotencyKey.objects.get().response_body['call'], 2)
+
+    def test_concurrent_request_with_the_same_key_gets_409(self):
+        # the second request arrives while the first is still in the view
+        inner = []
+        CountingViewSet.during = staticmethod(lambda: inner.append(self.post({'a': 1})))
+        first = self.post({'a': 1})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(inner[0].status_code, 409)
+        self.assertEqual(CountingViewSet.calls, 1)
+        self.assertEqual(self.post({'a': 1})[REPLAYED_HEADER], 'true')
+
+    def test_failed_request_releases_the_key(self):
+        CountingViewSet.fail = '500'
+        self.assertEqual(self.post({'a': 1}).status_code, 500)
+        CountingViewSet.fail = 'raise'
+        with self.assertRaises(RuntimeError):
+            self.post({'a': 1})
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        CountingViewSet.fail = None
+        self.assertEqual(self.post({'a': 1}).status_code, 201)
+        self.assertEqual(CountingViewSet.calls, 3)
@@ -5,3 +5,6 @@ class QuizConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.quiz'
     verbose_name = 'Career Quiz'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registers the schema version signal handlers)
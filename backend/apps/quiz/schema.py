@@ -0,0 +1,82 @@
+"""
+Quiz schema version.
+
+Recommendations depend on which questions exist and on their category and
+order (the engines map answers to abilities through them), so cached
+results must not outlive a change to the question set.  The version is
+derived from the question table (row count and latest ``updated_at``) plus a
+generation counter in the Django cache, like the catalog version in
+``ml/catalog_index.py``; deleting a question bumps the generation (see
+``signals.py``).
+
+``quiz_schema_version()`` re-reads the table at most every
+``CATALOG_INDEX_CHECK_SECONDS`` seconds per process.  ``questions_by_id()``
+keeps the questions themselves in memory for that version, so submissions
+are validated and answers mapped to categories without loading them again.
+"""
+
+import threading
+import time
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import QuizQuestion
+
+QUIZ_SCHEMA_GENERATION_CACHE_KEY = "quiz:schema_generation"
+
+_memo = {"version": None, "checked_at": 0.0}
+_questions = {"version": None, "by_id": {}, "ids": frozenset()}
+_memo_lock = threading.Lock()
+
+
+def _read_version() -> str:
+    agg = QuizQuestion.objects.aggregate(count=Count("id"), last=Max("updated_at"))
+    last = agg["last"].timestamp() if agg["last"] else 0.0
+    generation = cache.get(QUIZ_SCHEMA_GENERATION_CACHE_KEY, 0)
+    return f"{agg['count']}.{last:.6f}.{generation}"
+
+
+def quiz_schema_version() -> str:
+    """Return a version string that changes whenever the question set changes."""
+    interval = getattr(settings, "CATALOG_INDEX_CHECK_SECONDS", 5.0)
+    with _memo_lock:
+        if _memo["version"] is None or time.monotonic() - _memo["checked_at"] >= interval:
+            _memo["version"] = _read_version()
+            _memo["checked_at"] = time.monotonic()
+        return _memo["version"]
+
+
+def bump_quiz_schema_version() -> None:
+    """Invalidate the quiz schema version in every process sharing the cache."""
+    try:
+        cache.incr(QUIZ_SCHEMA_GENERATION_CACHE_KEY)
+    except ValueError:
+        # key not set yet (or evicted)
+        cache.set(QUIZ_SCHEMA_GENERATION_CACHE_KEY, 1, timeout=None)
+    with _memo_lock:
+        _memo["version"] = None
+
+
+def questions_by_id() -> Dict[str, QuizQuestion]:
+    """All quiz questions keyed by id (as a string), cached per schema version.
+
+    Shared by every caller in the process - treat the instances as read-only.
+    """
+    version = quiz_schema_version()
+    with _memo_lock:
+        if _questions["version"] == version:
+            return _questions["by_id"]
+    by_id = {str(q.id): q for q in QuizQuestion.objects.all()}
+    with _memo_lock:
+        _questions["version"], _questions["by_id"] = version, by_id
+        _questions["ids"] = frozenset(by_id)
+    return by_id
+
+
+def question_ids() -> frozenset:
+    """Ids (as strings) of all quiz questions, cached per schema version."""
+    questions_by_id()
+    return _questions["ids"]
@@ -1,5 +1,8 @@
+import uuid
+
 from rest_framework import serializers
 from .models import QuizQuestion, QuizAnswer, QuizSubmission
+from .schema import question_ids
 
 
 class QuizQuestionSerializer(serializers.ModelSerializer):
@@ -20,6 +23,35 @@ class QuizAnswerSerializer(serializers.ModelSerializer):
         fields = ['id', 'question', 'user_response', 'session_id']
 
 
+class AnswerMapField(serializers.DictField):
+    """``{question_id: response}`` map of quiz answers (responses 1-10).
+
+    Question ids are checked against the cached quiz schema, not one query
+    per answer, and normalized to their canonical string form.
+    """
+
+    child = serializers.IntegerField(min_value=1, max_value=10)
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        if not value:
+            raise serializers.ValidationError("At least one answer must be provided.")
+        known = question_ids()
+        answers, unknown = {}, []
+        for question_id, response in value.items():
+            try:
+                question_id = str(uuid.UUID(str(question_id)))
+            except ValueError:
+                pass
+            if question_id in known:
+                answers[question_id] = response
+            else:
+                unknown.append(question_id)
+        if unknown:
+            raise serializers.ValidationError(f"Unknown question ids: {', '.join(sorted(unknown))}")
+        return answers
+
+
 class QuizAnswerCreateSerializer(serializers.Serializer):
     """
     Handles bulk submission of quiz answers.
@@ -27,16 +59,9 @@ class QuizAnswerCreateSerializer(serializers.Serializer):
     """
     
     session_id = serializers.CharField(max_length=255)
-    answers = serializers.DictField(
-        child=serializers.IntegerField(min_value=1, max_value=10),
+    answers = AnswerMapField(
         help_text="Dictionary mapping question_id to response value (1-10)"
     )
-    
-    def validate_answers(self, value):
-        """Validate that all answers are valid integers in range."""
-        if not value:
-            raise serializers.ValidationError("At least one answer must be provided.")
-        return value
 
 
 class QuizSubmissionSerializer(serializers.ModelSerializer):
@@ -0,0 +1,51 @@
+"""
+Quiz submission writes.
+
+``submit_answers`` stores a whole answer set with a constant number of
+queries: question ids are already validated against the cached schema
+(``QuizAnswerCreateSerializer``), and the answers are upserted with one
+``INSERT ... ON CONFLICT (session_id, question_id) DO UPDATE``.  Backends
+without conflict targets get a delete-and-insert batch instead.
+"""
+
+from typing import Dict, Tuple
+
+from django.db import connection, transaction
+
+from .models import QuizAnswer, QuizSubmission
+
+
+def upsert_answers(session_id: str, answers: Dict[str, int]) -> None:
+    """Insert or update the ``{question_id: response}`` answers of a session."""
+    rows = [
+        QuizAnswer(session_id=session_id, question_id=question_id, user_response=response)
+        for question_id, response in answers.items()
+    ]
+    if not rows:
+        return
+    if connection.features.supports_update_conflicts_with_target:
+        QuizAnswer.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['session_id', 'question'],
+            update_fields=['user_response'],
+        )
+        return
+    with transaction.atomic():
+        QuizAnswer.objects.filter(session_id=session_id, question_id__in=list(answers)).delete()
+        QuizAnswer.objects.bulk_create(rows)
+
+
+@transaction.atomic
+def submit_answers(session_id: str, answers: Dict[str, int], user=None) -> Tuple[QuizSubmission, bool]:
+    """Record a submission and its answers.
+
+    Returns ``(submission, created)``; when ``created`` is True, ``answers``
+    are all the answers the session has.
+    """
+    submission, created = QuizSubmission.objects.get_or_create(
+        session_id=session_id,
+        defaults={'user': user}
+    )
+    upsert_answers(session_id, answers)
+    return submission, created
@@ -0,0 +1,21 @@
+"""
+Signal handlers for the quiz app.
+
+Connected in ``QuizConfig.ready``.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import QuizQuestion
+
+
+@receiver(post_save, sender=QuizQuestion, dispatch_uid="quiz.bump_schema_on_save")
+@receiver(post_delete, sender=QuizQuestion, dispatch_uid="quiz.bump_schema_on_delete")
+def bump_schema_version(sender, instance, raw=False, **kwargs):
+    """Invalidate cached recommendations when a question changes."""
+    if raw:
+        return
+    from .schema import bump_quiz_schema_version
+
+    bump_quiz_schema_version()
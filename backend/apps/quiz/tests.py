@@ -0,0 +1,106 @@
+"""
+Tests for quiz submission.
+
+Run with: python manage.py test apps.quiz
+"""
+
+import uuid
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .models import QuizAnswer, QuizQuestion, QuizSubmission
+from .schema import question_ids
+
+
+@override_settings(CATALOG_INDEX_CHECK_SECONDS=3600)
+class SubmitQuizTests(TestCase):
+    """POST /api/quiz/submit/ validates ids in memory and upserts in one batch."""
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = ['logic', 'creativity', 'communication', 'academic']
+        cls.questions = [
+            QuizQuestion.objects.create(
+                question_text=f"Question {i}", category=categories[i % len(categories)], order=i
+            )
+            for i in range(1, 21)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.session_id = str(uuid.uuid4())
+        question_ids()  # warm the cached schema, as in a running server
+
+    def submit(self, answers):
+        return self.client.post(
+            '/api/quiz/submit/',
+            {'session_id': self.session_id, 'answers': answers},
+            format='json',
+        )
+
+    def test_query_count_does_not_depend_on_answer_count(self):
+        # transaction + submission get_or_create (select, insert) + one upsert
+        with self.assertNumQueries(7):
+            response = self.submit({str(self.questions[0].id): 5})
+        self.assertEqual(response.status_code, 201)
+
+        self.session_id = str(uuid.uuid4())
+        answers = {str(q.id): (i % 10) + 1 for i, q in enumerate(self.questions)}
+        with self.assertNumQueries(7):
+            response = self.submit(answers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(QuizAnswer.objects.filter(session_id=self.session_id).count(), 20)
+
+    def test_resubmission_updates_answers_in_place(self):
+        first = {str(q.id): 3 for q in self.questions[:10]}
+        self.submit(first)
+        before = dict(
+            QuizAnswer.objects.filter(session_id=self.session_id).values_list('question_id', 'id')
+        )
+
+        second = {str(q.id): 9 for q in self.questions[5:15]}
+        with self.assertNumQueries(4):  # submission already exists: no insert
+            response = self.submit(second)
+        self.assertEqual(response.status_code, 201)
+
+        stored = {
+            str(qid): (pk, value)
+            for qid, pk, value in QuizAnswer.objects.filter(session_id=self.session_id)
+            .values_list('question_id', 'id', 'user_response')
+        }
+        self.assertEqual(len(stored), 15)
+        self.assertEqual(QuizSubmission.objects.filter(session_id=self.session_id).count(), 1)
+        for q in self.questions[:5]:
+            self.assertEqual(stored[str(q.id)][1], 3)
+        for q in self.questions[5:15]:
+            self.assertEqual(stored[str(q.id)][1], 9)
+        # updated rows keep their primary keys
+        for q in self.questions[5:10]:
+            self.assertEqual(stored[str(q.id)][0], before[q.id])
+
+    def test_fallback_without_conflict_target(self):
+        self.submit({str(q.id): 2 for q in self.questions[:4]})
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            response = self.submit({str(q.id): 8 for q in self.questions[2:6]})
+        self.assertEqual(response.status_code, 201)
+        stored = dict(
+            QuizAnswer.objects.filter(session_id=self.session_id).values_list('question_id', 'user_response')
+        )
+        self.assertEqual(
+            stored, {q.id: (2 if i < 2 else 8) for i, q in enumerate(self.questions[:6])}
+        )
+
+    def test_unknown_question_ids_are_rejected(self):
+        unknown = str(uuid.uuid4())
+        response = self.submit({str(self.questions[0].id): 5, unknown: 5, 'not-a-uuid': 5})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(unknown, str(response.data['errors']['answers']))
+        self.assertFalse(QuizAnswer.objects.filter(session_id=self.session_id).exists())
+
+    def test_new_question_is_accepted_after_schema_change(self):
+        question = QuizQuestion.objects.create(question_text="New", category='logic', order=99)
+        response = self.submit({str(question.id): 7})
+        self.assertEqual(response.status_code, 201)
@@ -3,13 +3,20 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.shortcuts import get_object_or_404
-from django.db import transaction
+from apps.core.idempotency import idempotent
 from .models import QuizQuestion, QuizAnswer, QuizSubmission
 from .serializers import (
     QuizQuestionSerializer, 
     QuizAnswerCreateSerializer, 
     QuizSubmissionSerializer
 )
+from .services import submit_answers
+from apps.results.engines import get_engine_registry
+from apps.results.services import load_session_answers, parse_recommend_options, recommend_and_store
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 class QuizQuestionViewSet(viewsets.ReadOnlyModelViewSet):
@@ -38,12 +45,13 @@ class QuizSubmissionViewSet(viewsets.ViewSet):
     """
     API endpoints for quiz submission and retrieval.
     POST /api/quiz/submit/ - Submit quiz answers
+    POST /api/quiz/submit-and-recommend/ - Submit answers and get recommendations
     GET /api/quiz/submission/{session_id}/ - Get submission details
     """
     
     permission_classes = [AllowAny]
     
-    @transaction.atomic
+    @idempotent('quiz.submit')
     def submit_quiz(self, request):
         """
         Handle quiz submission with multiple answers.
@@ -81,21 +89,13 @@ class QuizSubmissionViewSet(viewsets.ViewSet):
         answers_data = validated_data['answers']
         
         try:
-            # Create or get submission
-            submission, created = QuizSubmission.objects.get_or_create(
-                session_id=session_id,
-                defaults={'user': request.user if request.user.is_authenticated else None}
+            # Create or get submission and upsert all answers in one batch
+            submission, created = submit_answers(
+                session_id,
+                answers_data,
+                user=request.user if request.user.is_authenticated else None,
             )
             
-            # Store all answers
-            for question_id, response_value in answers_data.items():
-                question = get_object_or_404(QuizQuestion, id=question_id)
-                QuizAnswer.objects.update_or_create(
-                    session_id=session_id,
-                    question=question,
-                    defaults={'user_response': response_value}
-                )
-            
             return Response({
                 'success': True,
                 'submission_id': str(submission.id),
@@ -109,6 +109,77 @@ class QuizSubmissionViewSet(viewsets.ViewSet):
                 'error': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @idempotent('quiz.submit_and_recommend')
+    def submit_and_recommend(self, request):
+        """
+        Submit quiz answers and get recommendations in one round trip.
+        
+        Same payload as /api/quiz/submit/ plus the optional options of
+        /api/results/recommend/ (top_n, filters).  The answers are scored
+        straight from the validated payload instead of being read back.
+        
+        Returns: {
+            "success": true,
+            "submission_id": "uuid",
+            "session_id": "session-uuid",
+            "recommendation_id": "uuid",
+            "primary_career": "Software Developer",
+            "primary_compatibility": 87.5,
+            "top_recommendations": [...],
+            "abilities": {...}
+        }
+        """
+        serializer = QuizAnswerCreateSerializer(data=request.data)
+        
+        if not serializer.is_valid():
+            return Response(
+                {
+                    'success': False,
+                    'errors': serializer.errors
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            top_n, filters = parse_recommend_options(request.data)
+        except ValueError as e:
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # check before writing anything, so a retry starts from scratch
+        service = get_engine_registry().get_service()
+        if service is None:
+            return Response(
+                {'success': False, 'error': 'Recommendation engine is not ready'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        validated_data = serializer.validated_data
+        session_id = validated_data['session_id']
+        answers_data = validated_data['answers']
+        user = request.user if request.user.is_authenticated else None
+        
+        try:
+            submission, created = submit_answers(session_id, answers_data, user=user)
+            # a resubmission may cover only some questions: score all of them
+            answers = answers_data if created else load_session_answers(session_id)
+            
+            recommendation, _ = recommend_and_store(
+                service, session_id, answers, top_n, filters, user=user
+            )
+            return Response({
+                **recommendation,
+                'submission_id': str(submission.id),
+            }, status=status.HTTP_201_CREATED)
+        
+        except Exception as e:
+            logger.error(f"Error in submit-and-recommend: {e}")
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
     def get_submission(self, request, session_id=None):
         """
         Retrieve quiz submission and answers for a session.
@@ -119,7 +190,7 @@ class QuizSubmissionViewSet(viewsets.ViewSet):
         }
         """
         submission = get_object_or_404(QuizSubmission, session_id=session_id)
-        answers = QuizAnswer.objects.filter(session_id=session_id)
+        answers = QuizAnswer.objects.filter(session_id=session_id).select_related('question')
         
         quiz_data = {
             'submission': QuizSubmissionSerializer(submission).data,
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CareerRecommendation, UserProgress
+from .models import CareerRecommendation, RecommendationJob, UserProgress
 
 
 @admin.register(CareerRecommendation)
@@ -7,7 +7,7 @@ class CareerRecommendationAdmin(admin.ModelAdmin):
     list_display = ('session_id', 'primary_career', 'primary_compatibility', 'created_at')
     list_filter = ('created_at', 'primary_career')
     search_fields = ('session_id', 'primary_career')
-    readonly_fields = ('id', 'created_at', 'updated_at')
+    readonly_fields = ('id', 'answers_digest', 'engine_fingerprint', 'created_at', 'updated_at')
 
 
 @admin.register(UserProgress)
@@ -16,3 +16,11 @@ class UserProgressAdmin(admin.ModelAdmin):
     list_filter = ('created_at', 'quiz_attempt')
     search_fields = ('session_id', 'user__username')
     readonly_fields = ('id', 'created_at', 'updated_at')
+
+
+@admin.register(RecommendationJob)
+class RecommendationJobAdmin(admin.ModelAdmin):
+    list_display = ('session_id', 'status', 'attempts', 'locked_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('session_id',)
+    readonly_fields = ('id', 'created_at', 'finished_at', 'locked_by', 'locked_at')
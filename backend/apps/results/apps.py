@@ -1,7 +1,38 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+# set by config/wsgi.py and config/asgi.py before Django starts
+SERVING_ENV = 'DJANGO_SERVING_PROCESS'
+
+
+def _is_serving_process() -> bool:
+    """True for WSGI/ASGI workers and the reloading child of ``runserver``.
+
+    Servers opt in through ``SERVING_ENV``; ``runserver`` is recognised
+    whatever the entry point (manage.py, django-admin, python -m django).
+    Everything else - other commands, tests, scripts, celery - shouldn't pay
+    for loading the recommendation engines.
+    """
+    if os.environ.get(SERVING_ENV) == 'true':
+        return True
+    argv = sys.argv
+    if len(argv) > 1 and argv[1] == 'runserver':
+        return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in argv
+    return False
 
 
 class ResultsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.results'
     verbose_name = 'Career Recommendations'
+
+    def ready(self):
+        """Warm the recommendation engines in the background on startup."""
+        if not getattr(settings, 'RECOMMENDER_WARM_START', True) or not _is_serving_process():
+            return
+        from .engines import get_engine_registry
+        get_engine_registry().start_background_load()
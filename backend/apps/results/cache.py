@@ -0,0 +1,275 @@
+"""
+Two-tier cache for recommendation results.
+
+Many users submit the same (or nearly the same) answers, and every request
+used to run the whole pipeline again.  Results are now cached under
+
+    <canonical profile hash> + <request options> + <engine fingerprint>
+
+* the profile hash is a SHA-1 of the answers sorted by question id, with
+  values optionally rounded to ``RECOMMENDATION_CACHE_QUANTUM`` so
+  near-identical answer sets share an entry;
+* the engine fingerprint combines the active engine and its
+  ``model_version``, the catalog index version and the quiz schema version
+  (``apps/quiz/schema.py``), so editing a career or question, or deploying
+  a new model, changes every key - stale entries are never read again and
+  simply expire.
+
+Lookups go to an in-process LRU first (``RECOMMENDATION_CACHE_LOCAL_SIZE``
+entries) and then to the shared Django cache (``RECOMMENDATION_CACHE_SECONDS``).
+On a miss only one caller computes: threads of a process wait on a per-key
+lock, other processes see a short-lived lock key in the shared cache and poll
+for the result instead of computing it again (stampede protection).  The
+lock key holds a token, so only the process that took it deletes it
+(``coalescing.release_lock``).
+
+``get_result_cache().stats()`` reports hit/miss counters; they are included
+in the readiness health check.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .coalescing import acquire_lock, release_lock
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'recommendations:v2'
+
+# where a result came from
+LOCAL = 'local'
+SHARED = 'shared'
+COMPUTED = 'computed'
+
+
+def profile_hash(answers: Dict, quantum: Optional[float] = None) -> str:
+    """Canonical hash of ``{question_id: response}``.
+
+    Keys are compared as strings and responses as numbers, so ``{1: 7}`` and
+    ``{'1': '7'}`` hash the same.  With ``quantum`` responses are rounded to
+    its multiples first.
+    """
+    if quantum is None:
+        quantum = getattr(settings, 'RECOMMENDATION_CACHE_QUANTUM', 0)
+    canonical = []
+    for question_id, value in answers.items():
+        if isinstance(value, dict):
+            value = value.get('value', value.get('score'))
+        try:
+            value = float(value)
+            if quantum:
+                value = round(value / quantum) * quantum
+            value = round(value, 6)
+        except (TypeError, ValueError):
+            value = str(value)
+        canonical.append((str(question_id), value))
+    canonical.sort()
+    payload = json.dumps(canonical, separators=(',', ':'))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def engine_fingerprint(engine_name: Optional[str], service) -> str:
+    """Identify everything besides the answers that a result depends on."""
+    from apps.quiz.schema import quiz_schema_version
+    from ml.catalog_index import get_catalog_index
+
+    model_version = getattr(service, 'model_version', service.__class__.__name__)
+    parts = [
+        f"engine={engine_name}:{model_version}",
+        f"catalog={get_catalog_index().version}",
+        f"quiz={quiz_schema_version()}",
+    ]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+
+
+class LRUCache:
+    """Small thread-safe LRU of ``key -> value``."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[str, object]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _KeyLock:
+    __slots__ = ('lock', 'users')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0  # threads holding or waiting for ``lock``
+
+
+class RecommendationCache:
+    """In-process LRU in front of the shared Django cache, with stampede locks."""
+
+    def __init__(self, local_size: int = 1024, timeout: int = 3600, lock_seconds: float = 10.0):
+        self.local = LRUCache(local_size)
+        self.timeout = timeout
+        self.lock_seconds = lock_seconds
+        self._key_locks: Dict[str, _KeyLock] = {}
+        self._key_locks_guard = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'lock_waits': 0, 'errors': 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @contextmanager
+    def _key_lock(self, key: str):
+        """Hold the per-key lock; it is dropped once no thread holds or waits for it."""
+        with self._key_locks_guard:
+            entry = self._key_locks.get(key)
+            if entry is None:
+                entry = self._key_locks[key] = _KeyLock()
+            entry.users += 1
+        try:
+            with entry.lock:
+                yield
+        finally:
+            with self._key_locks_guard:
+                entry.users -= 1
+                if not entry.users:
+                    del self._key_locks[key]
+
+    def _shared_get(self, key: str):
+        try:
+            return cache.get(key)
+        except Exception as e:  # the shared tier is an optimisation only
+            self._count('errors')
+            logger.warning(f"Recommendation cache read failed: {e}")
+            return None
+
+    def _shared_set(self, key: str, value) -> None:
+        try:
+            cache.set(key, value, self.timeout)
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"Recommendation cache write failed: {e}")
+
+    def get_or_compute(self, key: str, fingerprint: str, compute: Callable[[], object]) -> Tuple[object, str]:
+        """Return ``(value, source)``; ``compute()`` runs at most once per key at a time.
+
+        Values are deep-copied on the way out of the local tier, so callers
+        may modify what they get.
+        """
+        if fingerprint != self._fingerprint:
+            # the catalog, quiz or model changed: local entries are dead weight
+            self.local.clear()
+            self._fingerprint = fingerprint
+        key = f"{CACHE_PREFIX}:{fingerprint}:{key}"
+
+        value = self.local.get(key)
+        if value is not None:
+            self._count('local_hits')
+            return copy.deepcopy(value), LOCAL
+
+        with self._key_lock(key):
+            # another thread may have filled it while we waited
+            value = self.local.get(key)
+            if value is not None:
+                self._count('local_hits')
+                return copy.deepcopy(value), LOCAL
+
+            value, token = self._shared_get(key), None
+            if value is None:
+                value, token = self._wait_for_other_process(key)
+            if value is not None:
+                self._count('shared_hits')
+                self.local.set(key, value)
+                return copy.deepcopy(value), SHARED
+
+            self._count('misses')
+            try:
+                value = compute()
+                self._shared_set(key, value)
+            finally:
+                if token is not None:
+                    release_lock(f"{key}:lock", token)
+            self.local.set(key, value)
+            return copy.deepcopy(value), COMPUTED
+
+    def _wait_for_other_process(self, key: str) -> Tuple[object, Optional[str]]:
+        """Take the cross-process compute lock, or wait for its holder's result.
+
+        Returns ``(value, None)`` if another process produced the value, or
+        ``(None, token)`` if we hold the lock now.  ``(None, None)`` means the
+        lock could not be taken (cache error, or waiting timed out) and we
+        compute anyway without touching the other holder's lock.
+        """
+        lock_key = f"{key}:lock"
+        try:
+            token = acquire_lock(lock_key, self.lock_seconds)
+        except Exception:
+            return None, None
+        if token is not None:
+            return None, token
+        self._count('lock_waits')
+        deadline = time.monotonic() + self.lock_seconds
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            value = self._shared_get(key)
+            if value is not None:
+                return value, None
+            delay = min(delay * 2, 0.2)
+        return None, None
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            data = dict(self._stats)
+        lookups = data['local_hits'] + data['shared_hits'] + data['misses']
+        data['hit_rate'] = round((data['local_hits'] + data['shared_hits']) / lookups, 4) if lookups else None
+        data['local_entries'] = len(self.local)
+        return data
+
+
+_result_cache: Optional[RecommendationCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> RecommendationCache:
+    """Return the process-wide recommendation result cache."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = RecommendationCache(
+                    local_size=getattr(settings, 'RECOMMENDATION_CACHE_LOCAL_SIZE', 1024),
+                    timeout=getattr(settings, 'RECOMMENDATION_CACHE_SECONDS', 3600),
+                )
+    return _result_cache
@@ -0,0 +1,182 @@
+"""
+Single-flight coalescing of duplicate requests.
+
+React strict mode and double clicks send the same ``recommend`` POST twice
+at once.  Both requests used to score the answers and then race on the
+``CareerRecommendation`` / ``UserProgress`` writes, which under SQLite means
+waiting on the database write lock.  ``SingleFlight.do(key, fn)`` runs
+``fn`` once per key at a time and hands its result to every caller that
+arrived while it was running:
+
+* within a process, followers wait on the leader's event;
+* across workers, the leader holds a short-lived lock key in the Django
+  cache and publishes its result there; followers in other processes poll
+  for it.  This needs a cache shared by the workers (``CACHE_BACKEND``);
+  with the default per-process cache only in-process coalescing applies.
+
+If the leader fails, in-process followers get the same exception; followers
+in other processes stop waiting when the lock disappears (or after
+``RECOMMENDATION_COALESCE_SECONDS``) and run ``fn`` themselves.
+
+Lock keys hold a random token and ``release_lock`` only deletes a key that
+still holds the caller's token, so a caller whose lock expired (or who never
+got it) cannot release a lock another process has taken since.
+"""
+
+import copy
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'singleflight:v1'
+
+
+def acquire_lock(lock_key: str, seconds: float) -> Optional[str]:
+    """Take ``lock_key`` in the shared cache; return its token, or None if it is held."""
+    token = uuid.uuid4().hex
+    return token if cache.add(lock_key, token, seconds) else None
+
+
+def release_lock(lock_key: str, token: str) -> None:
+    """Delete ``lock_key`` if it still holds ``token``.
+
+    The Django cache has no compare-and-delete, so another process can still
+    take the key between the read and the delete; the window is one round
+    trip instead of the whole compute.
+    """
+    try:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    except Exception as e:
+        logger.warning(f"Releasing {lock_key} failed: {e}")
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error', 'followers')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Duplicate suppression for concurrent calls with the same key."""
+
+    def __init__(self, lock_seconds: float = 15.0):
+        self.lock_seconds = lock_seconds
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'leaders': 0, 'local_shared': 0, 'remote_shared': 0, 'remote_timeouts': 0}
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def do(self, key: str, fn: Callable[[], object]) -> Tuple[object, bool]:
+        """Return ``(value, shared)``; ``shared`` is True if another call computed it.
+
+        Shared values are deep copies, so callers may modify them.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+
+        if not leader:
+            call.done.wait()
+            self._count('local_shared')
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.value), True
+
+        try:
+            value, shared = self._do_across_processes(key, fn)
+            call.value = value
+            return (copy.deepcopy(value) if call.followers else value), shared
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _do_across_processes(self, key: str, fn: Callable[[], object]) -> Tuple[object, bool]:
+        lock_key = f"{CACHE_PREFIX}:{key}:lock"
+        result_key = f"{CACHE_PREFIX}:{key}:result"
+        try:
+            token = acquire_lock(lock_key, self.lock_seconds)
+            acquired = token is not None
+        except Exception as e:  # coalescing is an optimisation only
+            logger.warning(f"Single-flight lock failed: {e}")
+            # compute and publish as the leader, but never delete a lock
+            # this call may not hold
+            token, acquired = None, True
+
+        if not acquired:
+            value = self._wait_for_result(lock_key, result_key)
+            if value is not None:
+                self._count('remote_shared')
+                return value, True
+            # the other worker failed or is too slow; compute it here
+
+        self._count('leaders')
+        try:
+            value = fn()
+            if acquired:
+                cache.set(result_key, value, self.lock_seconds)
+            return value, False
+        finally:
+            if token is not None:
+                release_lock(lock_key, token)
+
+    def _wait_for_result(self, lock_key: str, result_key: str):
+        deadline = time.monotonic() + self.lock_seconds
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            value = cache.get(result_key)
+            if value is not None:
+                return value
+            if cache.get(lock_key) is None:
+                # released without a result (the leader failed)
+                return cache.get(result_key)
+            delay = min(delay * 2, 0.2)
+        self._count('remote_timeouts')
+        return None
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            data = dict(self._stats)
+        with self._lock:
+            data['in_flight'] = len(self._calls)
+        return data
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight group."""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight(
+                    lock_seconds=getattr(settings, 'RECOMMENDATION_COALESCE_SECONDS', 15.0),
+                )
+    return _single_flight
@@ -0,0 +1,232 @@
+"""
+Recommendation engine registry with background warm loading.
+
+Constructing a recommendation service can take seconds (the hybrid engine
+loads a SentenceTransformer model), and the catalog index has to be built
+from the database before the first request can be scored.  Instead of doing
+that inside the first request, ``ResultsConfig.ready`` calls
+``start_background_load()``, which loads the catalog index and the configured
+engines in a daemon thread and runs one warmup recommendation.
+
+Engines are tried in ``RECOMMENDATION_ENGINES`` order (default
+``ability,hybrid,inference``); the first one that loads becomes the active
+service and the rest are left on standby.  The health endpoints report the
+per-engine state via ``health()``.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+
+from .cache import get_result_cache
+from .coalescing import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+STANDBY = 'standby'
+
+
+def _load_ability():
+    from ml.ability_recommender import AbilityRecommendationService
+    return AbilityRecommendationService()
+
+
+def _load_hybrid():
+    from ml.advanced_recommender import HybridRecommendationService
+    return HybridRecommendationService()
+
+
+def _load_inference():
+    from .inference import CareerInferenceService
+    return CareerInferenceService()
+
+
+ENGINE_LOADERS: Dict[str, Callable] = {
+    'ability': _load_ability,
+    'hybrid': _load_hybrid,
+    'inference': _load_inference,
+}
+
+
+def _warmup(service) -> None:
+    """Run one cheap recommendation so lazy caches and model kernels are hot."""
+    if hasattr(service, 'recommend'):
+        service.recommend({}, top_n=1)
+    else:
+        service.predict_careers({}, top_n=1)
+
+
+class EngineRegistry:
+    """Loads recommendation services once per process and tracks their state."""
+
+    def __init__(self, engine_names: List[str]):
+        self.engine_names = [name for name in engine_names if name in ENGINE_LOADERS]
+        unknown = set(engine_names) - set(self.engine_names)
+        if unknown:
+            logger.warning(f"Ignoring unknown recommendation engines: {sorted(unknown)}")
+        self.states: Dict[str, Dict] = {
+            name: {'state': PENDING, 'load_seconds': None, 'error': None}
+            for name in self.engine_names
+        }
+        self.index_state: Dict = {'state': PENDING, 'error': None}
+        self.warmup: Dict = {'state': PENDING, 'seconds': None, 'error': None}
+        self.active_name: Optional[str] = None
+        self._services: Dict[str, object] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # loading
+    # ------------------------------------------------------------------
+    def start_background_load(self) -> None:
+        """Start loading in a daemon thread (no-op if already started)."""
+        with self._lock:
+            if self._thread is not None or self._done.is_set():
+                return
+            self._thread = threading.Thread(
+                target=self.load, name='recommendation-warmup', daemon=True
+            )
+            self._thread.start()
+
+    def load(self) -> None:
+        """Load the catalog index and the first working engine, then warm up."""
+        self.started_at = time.time()
+        try:
+            self._load_index()
+            self._load_engines()
+            self._run_warmup()
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def _load_index(self) -> None:
+        from ml.catalog_index import get_catalog_index
+
+        self.index_state['state'] = LOADING
+        try:
+            get_catalog_index()
+            self.index_state['state'] = READY
+        except Exception as e:
+            logger.warning(f"Catalog index failed to load: {e}")
+            self.index_state.update(state=FAILED, error=str(e))
+
+    def _load_engines(self) -> None:
+        for name in self.engine_names:
+            if self.active_name is not None:
+                self.states[name]['state'] = STANDBY
+                continue
+            state = self.states[name]
+            state['state'] = LOADING
+            started = time.perf_counter()
+            try:
+                service = ENGINE_LOADERS[name]()
+            except Exception as e:
+                logger.warning(f"Recommendation engine '{name}' failed to load: {e}")
+                state.update(state=FAILED, error=str(e),
+                             load_seconds=round(time.perf_counter() - started, 4))
+                continue
+            state.update(state=READY, load_seconds=round(time.perf_counter() - started, 4))
+            self._services[name] = service
+            self.active_name = name
+            logger.info(f"Using '{name}' recommendation engine ({service.__class__.__name__})")
+
+        if self.active_name is None:
+            logger.error("Failed to initialize any recommendation engine")
+
+    def _run_warmup(self) -> None:
+        service = self._services.get(self.active_name)
+        if service is None:
+            self.warmup['state'] = FAILED
+            return
+        started = time.perf_counter()
+        try:
+            _warmup(service)
+            self.warmup['state'] = READY
+        except Exception as e:
+            # an empty catalog shouldn't keep the worker out of rotation
+            logger.warning(f"Warmup recommendation failed: {e}")
+            self.warmup.update(state=FAILED, error=str(e))
+        self.warmup['seconds'] = round(time.perf_counter() - started, 4)
+
+    # ------------------------------------------------------------------
+    # access
+    # ------------------------------------------------------------------
+    def get_service(self, timeout: Optional[float] = None):
+        """Return the active service, waiting up to ``timeout`` seconds.
+
+        If background loading was never started (management commands, tests,
+        or ``RECOMMENDER_WARM_START=False``) the engines are loaded
+        synchronously, which matches the old behaviour of the view.
+        """
+        if not self._done.is_set():
+            with self._lock:
+                started = self._thread is not None
+            if not started:
+                with self._lock:
+                    if not self._done.is_set() and self._thread is None:
+                        self.load()
+            else:
+                if timeout is None:
+                    timeout = getattr(settings, 'RECOMMENDATION_ENGINE_WAIT_SECONDS', 10.0)
+                self._done.wait(timeout)
+        return self._services.get(self.active_name)
+
+    @property
+    def is_ready(self) -> bool:
+        return self._done.is_set() and self.active_name is not None and self.index_state['state'] == READY
+
+    def health(self) -> Dict:
+        """Per-engine load state, catalog index version and load time."""
+        from ml.catalog_index import peek_catalog_index
+
+        index = peek_catalog_index()
+        engines = {name: dict(state) for name, state in self.states.items()}
+        service = self._services.get(self.active_name)
+        if service is not None and hasattr(service, 'embedding_stats'):
+            engines[self.active_name]['embedding_batcher'] = service.embedding_stats()
+
+        if self.is_ready:
+            status = 'ready'
+        elif self._done.is_set():
+            status = 'failed'
+        else:
+            status = 'loading'
+
+        return {
+            'status': status,
+            'active_engine': self.active_name,
+            'engines': engines,
+            'catalog_index': dict(index.summary(), state=self.index_state['state'])
+            if index is not None else dict(self.index_state),
+            'warmup': dict(self.warmup),
+            'result_cache': get_result_cache().stats(),
+            'coalescing': get_single_flight().stats(),
+            'load_seconds': round(self.finished_at - self.started_at, 4)
+            if self.finished_at and self.started_at else None,
+        }
+
+
+_registry: Optional[EngineRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_engine_registry() -> EngineRegistry:
+    """Return the process-wide engine registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = EngineRegistry(
+                    list(getattr(settings, 'RECOMMENDATION_ENGINES', ENGINE_LOADERS.keys()))
+                )
+    return _registry
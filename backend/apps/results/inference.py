@@ -3,7 +3,9 @@ ML Inference Service for Career Recommendations
 Bridges Django with sklearn model for predictions.
 """
 
+import hashlib
 import logging
+import os
 import numpy as np
 from django.conf import settings
 from ml.predictor import CareerPredictor, get_career_explanation
@@ -34,6 +36,19 @@ class CareerInferenceService:
         except Exception as e:
             logger.error(f"Failed to initialize CareerPredictor: {e}")
             raise
+        # artifacts are loaded once, so their state now identifies the model
+        # (part of the result-cache fingerprint, apps/results/cache.py)
+        self.model_version = self._artifact_version(settings.ML_MODELS_DIR)
+    
+    @staticmethod
+    def _artifact_version(model_dir: str) -> str:
+        """Short hash of the names, sizes and mtimes of the model artifacts."""
+        digest = hashlib.sha1()
+        for name in sorted(os.listdir(model_dir)):
+            if name.endswith('.joblib'):
+                stat = os.stat(os.path.join(model_dir, name))
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return f"inference:{digest.hexdigest()[:12]}"
     
     def extract_features_from_quiz(self, quiz_answers: dict) -> dict:
         """
@@ -46,7 +61,7 @@ class CareerInferenceService:
         Returns:
             Dict with extracted features (0-10 scale, then normalized by scaler)
         """
-        from apps.quiz.models import QuizQuestion
+        from apps.quiz.schema import questions_by_id
         
         logger.info(f"DEBUG: Raw quiz answers: {quiz_answers}")
         
@@ -82,7 +97,7 @@ class CareerInferenceService:
         
         # Fetch all quiz questions to get their categories and order
         try:
-            all_questions = {str(q.id): q for q in QuizQuestion.objects.all()}
+            all_questions = questions_by_id()
         except Exception as e:
             logger.error(f"Error fetching questions: {e}")
             all_questions = {}
@@ -253,7 +268,7 @@ class CareerInferenceService:
         Returns:
             Dict with ability scores (avg of relevant questions)
         """
-        from apps.quiz.models import QuizQuestion
+        from apps.quiz.schema import questions_by_id
         
         ability_scores = {
             'logical_thinking': 0,
@@ -272,7 +287,7 @@ class CareerInferenceService:
         
         # Fetch all questions
         try:
-            all_questions = {str(q.id): q for q in QuizQuestion.objects.all()}
+            all_questions = questions_by_id()
         except Exception as e:
             logger.error(f"Error fetching questions: {e}")
             return ability_scores
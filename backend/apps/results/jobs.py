@@ -0,0 +1,135 @@
+"""
+Database-backed queue of recommendation jobs.
+
+With the hybrid engine or a large catalog, scoring can take longer than a
+request should block.  POST /api/results/recommend/?async=1 therefore only
+enqueues a ``RecommendationJob`` row and answers 202; worker processes
+started by ``python manage.py run_recommendation_workers`` claim jobs,
+compute them with ``recommend_and_store`` and mark them done.  Clients poll
+GET /api/results/{session_id}/ until the status is no longer pending.
+
+No broker is needed - the table is the queue:
+
+* ``claim_next_job`` takes the oldest pending job with a conditional
+  ``UPDATE ... WHERE status = 'pending'``, so two workers never run the
+  same job (on SQLite as well as PostgreSQL);
+* a running job whose worker died is claimed again once its lock is older
+  than ``RECOMMENDATION_JOB_TIMEOUT_SECONDS``;
+* a failed job is retried until ``RECOMMENDATION_JOB_MAX_ATTEMPTS``; a job
+  whose worker died on the last attempt is marked failed instead of being
+  claimed again.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.careers.filters import CatalogFilters
+from .models import RecommendationJob
+from .services import load_session_answers, recommend_and_store
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = (RecommendationJob.PENDING, RecommendationJob.RUNNING)
+
+
+def enqueue_recommendation(session_id: str, top_n: int, filters=None, user=None) -> RecommendationJob:
+    """Queue a job, or return the session's pending job for the same options."""
+    filters_dict = filters.to_dict() if filters else {}
+    for existing in RecommendationJob.objects.filter(
+        session_id=session_id, status=RecommendationJob.PENDING, top_n=top_n, user=user,
+    ):
+        if existing.filters == filters_dict:
+            return existing
+    return RecommendationJob.objects.create(
+        session_id=session_id, top_n=top_n, filters=filters_dict, user=user,
+    )
+
+
+def latest_job(session_id: str) -> Optional[RecommendationJob]:
+    return RecommendationJob.objects.filter(session_id=session_id).order_by('-created_at').first()
+
+
+def claim_next_job(worker_id: str) -> Optional[RecommendationJob]:
+    """Claim the oldest runnable job for ``worker_id`` (None if the queue is empty)."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'RECOMMENDATION_JOB_TIMEOUT_SECONDS', 300))
+    max_attempts = getattr(settings, 'RECOMMENDATION_JOB_MAX_ATTEMPTS', 3)
+    RecommendationJob.objects.filter(
+        status=RecommendationJob.RUNNING, locked_at__lt=stale, attempts__gte=max_attempts
+    ).update(
+        status=RecommendationJob.FAILED,
+        error='Worker stopped before finishing the job',
+        locked_by='',
+        locked_at=None,
+        finished_at=now,
+    )
+    runnable = Q(status=RecommendationJob.PENDING) | Q(
+        status=RecommendationJob.RUNNING, locked_at__lt=stale, attempts__lt=max_attempts
+    )
+    # a few candidates, in case other workers take the first ones
+    for job_id, job_status in (
+        RecommendationJob.objects.filter(runnable)
+        .order_by('created_at')
+        .values_list('id', 'status')[:5]
+    ):
+        claimed = RecommendationJob.objects.filter(
+            Q(id=job_id, status=job_status) & runnable
+        ).update(
+            status=RecommendationJob.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return RecommendationJob.objects.get(id=job_id)
+    return None
+
+
+def run_job(job: RecommendationJob, service) -> None:
+    """Compute ``job`` with ``service`` and record the outcome on the job."""
+    try:
+        answers = load_session_answers(job.session_id)
+        if not answers:
+            raise LookupError('No quiz answers found for this session')
+        recommend_and_store(
+            service,
+            job.session_id,
+            answers,
+            job.top_n,
+            CatalogFilters.from_params(job.filters),
+            user=job.user,
+        )
+    except Exception as e:
+        max_attempts = getattr(settings, 'RECOMMENDATION_JOB_MAX_ATTEMPTS', 3)
+        retry = job.attempts < max_attempts and not isinstance(e, LookupError)
+        logger.error(f"Recommendation job {job.id} failed (attempt {job.attempts}): {e}")
+        RecommendationJob.objects.filter(id=job.id, locked_by=job.locked_by).update(
+            status=RecommendationJob.PENDING if retry else RecommendationJob.FAILED,
+            error=str(e),
+            locked_by='',
+            locked_at=None,
+            finished_at=None if retry else timezone.now(),
+        )
+        return
+    RecommendationJob.objects.filter(id=job.id, locked_by=job.locked_by).update(
+        status=RecommendationJob.DONE,
+        error='',
+        finished_at=timezone.now(),
+    )
+
+
+def job_status(job: RecommendationJob) -> dict:
+    """Client-facing summary of a job."""
+    data = {
+        'job_id': str(job.id),
+        'status': job.status,
+        'created_at': job.created_at,
+    }
+    if job.status == RecommendationJob.FAILED:
+        data['error'] = job.error
+    return data
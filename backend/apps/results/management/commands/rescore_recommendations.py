@@ -0,0 +1,208 @@
+"""
+Management command to rescore stored recommendations in bulk.
+
+Usage: python manage.py rescore_recommendations [--workers 2] [--chunk-size 500]
+           [--rate 0] [--all] [--resume] [--checkpoint PATH] [--dry-run]
+
+Streams the ids of the ``CareerRecommendation`` rows whose engine
+fingerprint is out of date (or of every row with ``--all``) in id-ordered
+chunks; a pool of ``--workers`` processes loads, scores and writes back
+each chunk as one batch with ``bulk_update`` (see
+``apps/results/rescoring.py``).  At most two chunks per worker are in
+flight, so memory is bounded by the chunk size, not the table size.
+
+The engine and the catalog index are loaded once in this process before
+the workers are forked, so the workers share them copy-on-write instead of
+each rebuilding the catalog.  ``--rate`` caps the sessions rescored per
+second to spare the database.  The last written id is saved to
+``--checkpoint`` after every chunk; ``--resume`` continues from it (rows
+already rescored also drop out of the default selection on their own).
+"""
+import gc
+import multiprocessing
+import signal
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.results.engines import get_engine_registry
+from apps.results.rescoring import Checkpoint, iter_chunks, rescore_chunk, rows_to_rescore
+from apps.results.services import current_fingerprint
+
+# set in the parent before forking, inherited by the workers
+_service = None
+_fingerprint = None
+
+
+def _init_worker() -> None:
+    # the parent handles Ctrl+C and stops the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _rescore(ids):
+    return rescore_chunk(_service, ids, _fingerprint)
+
+
+class Command(BaseCommand):
+    help = "Rescore stored recommendations after a catalog, quiz or model change"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "RECOMMENDATION_WORKERS", 2),
+            help="Scoring processes, 0 to score in this process (default: RECOMMENDATION_WORKERS)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Sessions per chunk (default: 500)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=0,
+            help="Maximum sessions rescored per second, 0 for no limit (default: 0)",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rescore every stored recommendation, not only stale ones",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=str(settings.BASE_DIR / "rescore_recommendations.checkpoint.json"),
+            help="File recording the last rescored id",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue after the id saved in --checkpoint",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the recommendations to rescore",
+        )
+
+    def handle(self, *args, **options):
+        global _service, _fingerprint
+
+        workers = options["workers"]
+        chunk_size = options["chunk_size"]
+        if workers < 0:
+            raise CommandError("--workers must not be negative")
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be positive")
+        if options["rate"] < 0:
+            raise CommandError("--rate must not be negative")
+
+        _service = get_engine_registry().get_service()
+        if _service is None:
+            raise CommandError("No recommendation engine could be loaded")
+        _fingerprint = current_fingerprint(_service)
+
+        checkpoint = Checkpoint(options["checkpoint"])
+        state = {"fingerprint": _fingerprint, "all": options["all"], "last_id": None, "rescored": 0}
+        if options["resume"]:
+            try:
+                saved = checkpoint.load()
+            except ValueError as e:
+                raise CommandError(str(e))
+            if saved is None:
+                self.stdout.write(self.style.WARNING("⚠ No checkpoint found, starting from the beginning"))
+            elif (saved.get("fingerprint"), saved.get("all")) != (_fingerprint, options["all"]):
+                # rows before last_id were scored by another engine version
+                self.stdout.write(self.style.WARNING(
+                    "⚠ Checkpoint is from another engine version or selection, starting from the beginning"
+                ))
+            else:
+                state = saved
+
+        queryset = rows_to_rescore(_fingerprint, include_current=options["all"])
+        if state["last_id"] is not None:
+            queryset = queryset.filter(id__gt=state["last_id"])
+        total = queryset.count()
+        self.stdout.write(
+            f"{total} recommendations to rescore with {_service.__class__.__name__} "
+            f"(fingerprint {_fingerprint})"
+        )
+        if options["dry_run"] or not total:
+            return
+
+        pool = None
+        if workers:
+            # children open their own connections; frozen objects are skipped
+            # by the collector, so it doesn't copy the inherited pages
+            connections.close_all()
+            gc.freeze()
+            pool = multiprocessing.get_context("fork").Pool(workers, initializer=_init_worker)
+
+        self.total = total
+        self.started = time.perf_counter()
+        self.counts = {"done": 0, "rescored": 0, "skipped": 0}
+        dispatched = 0
+        try:
+            in_flight = deque()
+            for ids in iter_chunks(queryset, chunk_size):
+                dispatched += len(ids)
+                if pool is None:
+                    outcome = _rescore(ids)
+                else:
+                    outcome = pool.apply_async(_rescore, (ids,))
+                in_flight.append((len(ids), str(ids[-1]), outcome))
+                while len(in_flight) > 2 * workers:
+                    self._finish(in_flight.popleft(), checkpoint, state)
+                # --rate: never run ahead of the allowed schedule
+                if options["rate"]:
+                    ahead = dispatched / options["rate"] - (time.perf_counter() - self.started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+            while in_flight:
+                self._finish(in_flight.popleft(), checkpoint, state)
+        except KeyboardInterrupt:
+            if pool is not None:
+                pool.terminate()
+            raise CommandError(
+                f"Interrupted after {self.counts['done']} recommendations; continue with --resume"
+            )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            gc.unfreeze()
+
+        checkpoint.clear()
+        elapsed = time.perf_counter() - self.started
+        rescored = self.counts["rescored"]
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Rescored {rescored} recommendations in {elapsed:.1f}s "
+            f"({rescored / elapsed if elapsed else 0:.0f}/s), "
+            f"{self.counts['skipped']} without answers skipped"
+        ))
+
+    def _finish(self, chunk, checkpoint, state) -> None:
+        """Wait for the oldest chunk and move the checkpoint past it.
+
+        Chunks may finish out of order; taking them oldest first keeps every
+        id up to the checkpoint rescored.
+        """
+        size, last_id, outcome = chunk
+        rescored, skipped = outcome if isinstance(outcome, tuple) else outcome.get()
+        state.update(last_id=last_id, rescored=state["rescored"] + rescored)
+        checkpoint.save(**state)
+
+        self.counts["done"] += size
+        self.counts["rescored"] += rescored
+        self.counts["skipped"] += skipped
+        elapsed = time.perf_counter() - self.started
+        rate = self.counts["done"] / elapsed if elapsed else 0
+        eta = (self.total - self.counts["done"]) / rate if rate else 0
+        self.stdout.write(
+            f"  [{self.counts['done']}/{self.total}] {self.counts['rescored']} rescored, "
+            f"{self.counts['skipped']} skipped - {rate:.0f}/s, ETA {eta:.0f}s"
+        )
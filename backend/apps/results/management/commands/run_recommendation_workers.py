@@ -0,0 +1,111 @@
+"""
+Management command to run recommendation job workers.
+
+Usage: python manage.py run_recommendation_workers [--workers 2] [--poll 1.0] [--once]
+
+Starts ``--workers`` processes that each load the recommendation engine once
+and then take jobs from the ``RecommendationJob`` table (see
+``apps/results/jobs.py``), sleeping ``--poll`` seconds when it is empty.
+``--once`` drains the queue and exits, e.g. for cron.  Stop with Ctrl+C or
+SIGTERM; a job in progress is finished first.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def _work(worker_number: int, poll: float, once: bool, stop) -> None:
+    """Worker process: claim and run jobs until ``stop`` is set."""
+    import django
+    django.setup()
+    from apps.results.engines import get_engine_registry
+    from apps.results.jobs import claim_next_job, run_job
+
+    # connections inherited from the parent must not be shared
+    connections.close_all()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent coordinates shutdown
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    service = get_engine_registry().get_service()
+    if service is None:
+        logger.error(f"Worker {worker_number}: no recommendation engine could be loaded")
+        return
+    logger.info(f"Worker {worker_number} ({worker_id}) ready with {service.__class__.__name__}")
+
+    while not stop.is_set():
+        job = claim_next_job(worker_id)
+        if job is None:
+            if once:
+                return
+            stop.wait(poll)
+            continue
+        started = time.perf_counter()
+        run_job(job, service)
+        logger.info(f"Job {job.id} for {job.session_id} took {time.perf_counter() - started:.3f}s")
+
+
+class Command(BaseCommand):
+    help = "Run worker processes that compute queued recommendation jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "RECOMMENDATION_WORKERS", 2),
+            help="Worker processes (default: RECOMMENDATION_WORKERS)",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=getattr(settings, "RECOMMENDATION_JOB_POLL_SECONDS", 1.0),
+            help="Seconds to wait when the queue is empty (default: RECOMMENDATION_JOB_POLL_SECONDS)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be at least 1")
+
+        stop = multiprocessing.Event()
+        # children open their own connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=_work,
+                args=(number, options["poll"], options["once"], stop),
+                name=f"recommendation-worker-{number}",
+            )
+            for number in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {workers} recommendation worker(s)")
+
+        previous_term = signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        try:
+            for process in processes:
+                while process.is_alive():
+                    process.join(timeout=0.5)
+        except KeyboardInterrupt:
+            stop.set()
+            self.stdout.write("Stopping workers...")
+            for process in processes:
+                process.join()
+        finally:
+            signal.signal(signal.SIGTERM, previous_term)
+
+        self.stdout.write(self.style.SUCCESS("✓ Recommendation workers stopped"))
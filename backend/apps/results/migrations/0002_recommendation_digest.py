@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-19 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='careerrecommendation',
+            name='answers_digest',
+            field=models.CharField(blank=True, default='', help_text="\n        Digest of the session's answers and the request options (top_n, filters).\n    ", max_length=40),
+        ),
+        migrations.AddField(
+            model_name='careerrecommendation',
+            name='engine_fingerprint',
+            field=models.CharField(blank=True, default='', help_text='\n        Engine, catalog and quiz schema versions the result was computed with.\n    ', max_length=16),
+        ),
+    ]
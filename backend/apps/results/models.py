@@ -33,6 +33,15 @@ class CareerRecommendation(models.Model):
         Extracted feature vector from quiz answers used for prediction.
     """)
     
+    # What the stored result was computed from; when both still match,
+    # POST /api/results/recommend/ returns this row without rescoring
+    answers_digest = models.CharField(max_length=40, blank=True, default='', help_text="""
+        Digest of the session's answers and the request options (top_n, filters).
+    """)
+    engine_fingerprint = models.CharField(max_length=16, blank=True, default='', help_text="""
+        Engine, catalog and quiz schema versions the result was computed with.
+    """)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -79,3 +88,51 @@ class UserProgress(models.Model):
     
     def __str__(self):
         return f"Progress - {self.session_id} (Attempt {self.quiz_attempt})"
+
+
+class RecommendationJob(models.Model):
+    """
+    Queued recommendation request (POST /api/results/recommend/?async=1).
+    Claimed and computed by ``python manage.py run_recommendation_workers``;
+    the result is saved on the session's ``CareerRecommendation``.
+    """
+    
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    session_id = models.CharField(max_length=255, db_index=True)
+    user = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='recommendation_jobs')
+    
+    # Request options
+    top_n = models.PositiveSmallIntegerField(default=10)
+    filters = models.JSONField(default=dict, blank=True, help_text="CatalogFilters.to_dict() of the request")
+    
+    # Queue state
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    locked_by = models.CharField(max_length=100, blank=True, help_text="Worker that claimed the job")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Recommendation Job'
+        verbose_name_plural = 'Recommendation Jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='recjob_status_created'),
+        ]
+    
+    def __str__(self):
+        return f"Job {self.id} - {self.session_id} ({self.status})"
@@ -0,0 +1,105 @@
+"""
+Cached full career ranking of a quiz session.
+
+"Show more careers" used to mean asking ``generate_recommendations`` for a
+larger ``top_n``, which builds dicts and explanations for every returned
+career.  Instead the active engine ranks the whole (filtered) catalog once
+per session and the result is kept in the Django cache as two compact
+arrays - int32 catalog positions and float32 scores, about 8 bytes per
+career.  GET /api/results/{session_id}/ranking/?cursor= then builds the
+detailed recommendation objects for one page only.
+
+The cache key covers the session, a digest of its answers, the filters and
+the catalog index version, so new answers or an edited catalog simply miss
+the cache instead of serving stale positions.  Positions are only meaningful
+for the index they were ranked on, so callers fetch the index once and pass
+the same one to ``get_ranking`` and ``describe``.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from ml.catalog_index import get_catalog_index
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'ranking:v1'
+
+
+@dataclass
+class Ranking:
+    positions: np.ndarray  # int32 catalog index positions, best first
+    scores: np.ndarray     # float32 relevance scores
+    catalog_version: str
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+def answers_digest(answers: Dict) -> str:
+    """Stable hash of a ``{question_id: response}`` dict."""
+    payload = json.dumps(answers, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _cache_key(session_id: str, answers: Dict, filters, catalog_version: str) -> str:
+    filter_part = json.dumps(filters.to_dict() if filters else {}, sort_keys=True)
+    digest = hashlib.sha1(f"{answers_digest(answers)}|{filter_part}".encode()).hexdigest()
+    session = hashlib.sha1(str(session_id).encode()).hexdigest()[:16]
+    return f"{CACHE_PREFIX}:{session}:{digest}:{catalog_version}"
+
+
+def get_ranking(service, session_id: str, answers: Dict, filters=None, index=None) -> Ranking:
+    """Cached full ranking of ``answers`` by ``service`` on ``index`` (computed on a miss)."""
+    if index is None:
+        index = get_catalog_index()
+    version = index.version
+    key = _cache_key(session_id, answers, filters, version)
+    cached = cache.get(key)
+    if cached is not None:
+        return Ranking(
+            positions=np.frombuffer(cached['positions'], dtype=np.int32),
+            scores=np.frombuffer(cached['scores'], dtype=np.float32),
+            catalog_version=version,
+        )
+
+    positions, scores = service.full_ranking(answers, filters=filters, index=index)
+    ranking = Ranking(
+        positions=np.ascontiguousarray(positions, dtype=np.int32),
+        scores=np.ascontiguousarray(scores, dtype=np.float32),
+        catalog_version=version,
+    )
+    cache.set(
+        key,
+        {'positions': ranking.positions.tobytes(), 'scores': ranking.scores.tobytes()},
+        getattr(settings, 'RANKING_CACHE_SECONDS', 3600),
+    )
+    logger.info(f"Cached ranking of {len(ranking)} careers for session {session_id}")
+    return ranking
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Offset from an opaque cursor (0 for none); raises ValueError if malformed."""
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        prefix, offset = raw.split(':', 1)
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if prefix != 'o' or offset < 0:
+        raise ValueError('Invalid cursor')
+    return offset
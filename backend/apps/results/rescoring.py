@@ -0,0 +1,145 @@
+"""
+Bulk rescoring of stored recommendations.
+
+A catalog, quiz or model change moves the engine fingerprint, after which
+every stored ``CareerRecommendation`` is stale: POST /api/results/recommend/
+recomputes it on the next visit, but the saved results themselves (admin,
+GET /api/results/{session_id}/) stay outdated.  ``python manage.py
+rescore_recommendations`` refreshes them in bulk with the helpers here:
+
+* ``iter_chunks`` streams the ids to rescore in primary-key order, one
+  keyset query (``id > last``) per chunk, so memory and query cost stay
+  flat however large the table is;
+* ``rescore_chunk`` rescores one chunk of ids in three steps, so a worker
+  process can take a whole chunk: ``load_chunk`` reads the rows and the
+  sessions' answers with one query each, ``score_chunk`` scores them with
+  ``compute_many_recommendations`` (one matrix pass per distinct
+  ``top_n``) and ``write_chunk`` saves them with a single ``bulk_update``;
+* ``Checkpoint`` records the last rescored id so a run can be resumed.
+
+Rows are rescored with the ``top_n`` they were stored with and without
+filters, which a stored row does not record; a session that asked for
+filters is recomputed on its next request as before.
+"""
+
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.quiz.models import QuizAnswer
+from .models import CareerRecommendation
+from .services import RESULT_FIELDS, compute_many_recommendations, recommendation_fields, request_digest
+
+# (id, session_id, answers, top_n)
+Row = Tuple[str, str, Dict[str, int], int]
+
+
+def rows_to_rescore(fingerprint: str, include_current: bool = False):
+    """Stored recommendations not computed with ``fingerprint`` (or all of them)."""
+    queryset = CareerRecommendation.objects.all()
+    if not include_current:
+        queryset = queryset.exclude(engine_fingerprint=fingerprint)
+    return queryset
+
+
+def iter_chunks(queryset, chunk_size: int, after: Optional[str] = None) -> Iterator[List[str]]:
+    """Ids of ``queryset`` in ascending order, ``chunk_size`` at a time."""
+    while True:
+        page = queryset.order_by('id')
+        if after is not None:
+            page = page.filter(id__gt=after)
+        ids = list(page.values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        after = ids[-1]
+
+
+def rescore_chunk(service, ids: List[str], fingerprint: str) -> Tuple[int, int]:
+    """Rescore the recommendations ``ids``; returns ``(rescored, skipped)``."""
+    rows, skipped = load_chunk(ids)
+    return write_chunk(score_chunk(service, rows, fingerprint)), skipped
+
+
+def load_chunk(ids: List[str]) -> Tuple[List[Row], int]:
+    """Rows ``ids`` with their sessions' answers; returns ``(rows, skipped)``.
+
+    Sessions without answers (deleted or never stored) are skipped.  The
+    stored ``top_n`` is the length of the stored list, as it is only ever
+    shorter when the catalog had fewer matches.
+    """
+    rows = list(CareerRecommendation.objects.filter(id__in=ids).values_list(
+        'id', 'session_id', 'top_recommendations'
+    ))
+    answers = {session_id: {} for _, session_id, _ in rows}
+    for session_id, question_id, response in QuizAnswer.objects.filter(
+        session_id__in=list(answers)
+    ).values_list('session_id', 'question_id', 'user_response'):
+        answers[session_id][str(question_id)] = response
+
+    max_top_n = settings.RECOMMENDATION_MAX_TOP_N
+    loaded = [
+        (str(pk), session_id, answers[session_id], min(max(len(top or []), 1), max_top_n))
+        for pk, session_id, top in rows
+        if answers[session_id]
+    ]
+    return loaded, len(ids) - len(loaded)
+
+
+def score_chunk(service, rows: List[Row], fingerprint: str) -> List[Tuple[str, Dict]]:
+    """``(id, field values)`` of every row, scored in one batch per ``top_n``."""
+    by_top_n: Dict[int, List[Row]] = {}
+    for row in rows:
+        by_top_n.setdefault(row[3], []).append(row)
+
+    scored = []
+    for top_n, group in by_top_n.items():
+        results = compute_many_recommendations(service, [row[2] for row in group], top_n)
+        for (pk, _, answers, _), result in zip(group, results):
+            digest = request_digest(answers, top_n)
+            scored.append((pk, recommendation_fields(result, answers, digest, fingerprint)))
+    return scored
+
+
+def write_chunk(scored: List[Tuple[str, Dict]]) -> int:
+    """Save a scored chunk with one ``bulk_update``; returns the rows written."""
+    now = timezone.now()  # bulk_update skips auto_now
+    objects = [CareerRecommendation(id=pk, updated_at=now, **fields) for pk, fields in scored]
+    CareerRecommendation.objects.bulk_update(objects, RESULT_FIELDS)
+    return len(objects)
+
+
+class Checkpoint:
+    """Progress of a rescoring run, kept in a small JSON file.
+
+    ``last_id`` is only advanced after a chunk is written, and chunks are
+    written in id order, so resuming never skips a row.  The file is
+    replaced atomically.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[Dict]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            raise ValueError(f"Corrupt checkpoint file {self.path}")
+
+    def save(self, **state) -> None:
+        temp = f"{self.path}.tmp"
+        with open(temp, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp, self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
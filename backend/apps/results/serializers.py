@@ -1,4 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
+from apps.quiz.serializers import AnswerMapField
 from .models import CareerRecommendation, UserProgress
 
 
@@ -24,3 +26,21 @@ class UserProgressSerializer(serializers.ModelSerializer):
             'saved_careers', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class RecommendBatchSerializer(serializers.Serializer):
+    """Sessions and raw answer sets of POST /api/results/recommend-batch/."""
+    
+    session_ids = serializers.ListField(
+        child=serializers.CharField(max_length=255), required=False, default=list
+    )
+    answers = serializers.ListField(child=AnswerMapField(), required=False, default=list)
+    
+    def validate(self, data):
+        size = len(data['session_ids']) + len(data['answers'])
+        if not size:
+            raise serializers.ValidationError("session_ids or answers is required.")
+        max_size = settings.RECOMMENDATION_BATCH_MAX_SIZE
+        if size > max_size:
+            raise serializers.ValidationError(f"At most {max_size} sessions and answer sets per request.")
+        return data
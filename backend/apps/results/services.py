@@ -0,0 +1,495 @@
+"""
+Recommendation pipeline shared by the results endpoints.
+
+``compute_recommendations`` runs the active engine on one answer set and
+adds the ability / interest / work-style profile shown on the results page.
+``recommend_for_answers`` puts the result cache (``cache.py``) in front of
+it, so identical answer sets against the same engine, catalog and quiz
+schema are only computed once.  ``recommend_and_store`` adds the stored
+``CareerRecommendation``: it is returned as-is while answers, options and
+engine are unchanged, and concurrent duplicates share one computation
+(``coalescing.py``).  Used by POST /api/results/recommend/ and
+POST /api/quiz/submit-and-recommend/; ``recommend_batch`` does the same for
+many sessions at once (POST /api/results/recommend-batch/).
+"""
+
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.careers.filters import CatalogFilters
+from apps.quiz.models import QuizAnswer
+from .cache import COMPUTED, engine_fingerprint, get_result_cache, profile_hash
+from .coalescing import get_single_flight
+from .engines import get_engine_registry
+from .models import CareerRecommendation, UserProgress
+
+logger = logging.getLogger(__name__)
+
+
+def load_session_answers(session_id: str) -> Dict[str, int]:
+    """``{question_id: response}`` of a session (empty if it has no answers)."""
+    return {
+        str(question_id): response
+        for question_id, response in QuizAnswer.objects.filter(
+            session_id=session_id
+        ).values_list('question_id', 'user_response')
+    }
+
+
+def compute_recommendations(service, answers_dict: Dict, top_n: int, filters=None) -> Dict:
+    """Run ``service`` on one answer set.
+
+    Returns ``{'recommendations': [...], 'abilities': {...}}``.
+    """
+    return {
+        'recommendations': _recommendation_list(service, answers_dict, top_n, filters),
+        'abilities': profile_scores(service, answers_dict),
+    }
+
+
+def _recommendation_list(service, answers_dict: Dict, top_n: int, filters=None) -> List[Dict]:
+    """The career recommendations of ``compute_recommendations`` alone."""
+    # Handle different service types
+    service_class_name = service.__class__.__name__
+
+    if service_class_name in ('AbilityRecommendationService', 'HybridRecommendationService'):
+        # New services return AbilityRecommendation / HybridRecommendation objects
+        rec_objects = service.recommend(
+            answers_dict, top_n=top_n, filters=filters
+        )
+        recommendations = [r.to_dict() for r in rec_objects]
+    else:
+        # Old CareerInferenceService returns dicts directly
+        recommendations = service.predict_careers(answers_dict, top_n=top_n)
+
+    return _normalize_keys(recommendations)
+
+
+def compute_many_recommendations(service, answers_list: List[Dict], top_n: int, filters=None) -> List[Dict]:
+    """``compute_recommendations`` for many answer sets.
+
+    Engines with ``recommend_many`` score all answer sets in one pass.
+    """
+    if not hasattr(service, 'recommend_many'):
+        return [compute_recommendations(service, answers, top_n, filters) for answers in answers_list]
+    rec_lists = service.recommend_many(answers_list, top_n=top_n, filters=filters)
+    return [
+        {
+            'recommendations': _normalize_keys([r.to_dict() for r in rec_objects]),
+            'abilities': profile_scores(service, answers),
+        }
+        for answers, rec_objects in zip(answers_list, rec_lists)
+    ]
+
+
+def profile_scores(service, answers_dict: Dict) -> Dict:
+    """Ability, interest and work-style profile shown next to the recommendations."""
+    if service.__class__.__name__ == 'AbilityRecommendationService':
+        ability_scores = {}  # Will be filled below
+    else:
+        ability_scores = service.calculate_ability_scores(answers_dict) if hasattr(service, 'calculate_ability_scores') else {}
+
+    # If ability_scores is empty (AbilityRecommendationService), compute using inference service
+    if not ability_scores or service.__class__.__name__ == 'AbilityRecommendationService':
+        try:
+            # Use CareerInferenceService separately to get core ability scores
+            core_abilities = _core_ability_service().calculate_ability_scores(answers_dict)
+            ability_scores.update(core_abilities)
+        except Exception as e:
+            logger.warning(f"Failed to extract core ability scores: {e}")
+    
+    # even if the service didn't supply interest details, compute them here
+    interest_scores = _extract_interest_scores(answers_dict)
+    # merge into ability_scores (overwrites existing keys or fills missing)
+    ability_scores.update(interest_scores)
+    
+    # Extract work style scores
+    work_scores = _extract_work_style_scores(answers_dict)
+    ability_scores.update(work_scores)
+    return ability_scores
+
+
+_core_service = None
+
+
+def _core_ability_service():
+    """CareerInferenceService for the core ability scores, reloaded when the artifacts change."""
+    global _core_service
+    from apps.results.inference import CareerInferenceService
+    version = CareerInferenceService._artifact_version(settings.ML_MODELS_DIR)
+    if _core_service is None or _core_service.model_version != version:
+        _core_service = CareerInferenceService()
+    return _core_service
+
+
+def _normalize_keys(recommendations: List[Dict]) -> List[Dict]:
+    """Normalize dictionary keys so the frontend can always access .career."""
+    for rec in recommendations:
+        if 'career' not in rec and 'name' in rec:
+            rec['career'] = rec['name']
+        # also ensure compatibility_score present when using score
+        if 'compatibility_score' not in rec and 'score' in rec:
+            rec['compatibility_score'] = rec['score']
+        if 'match_score' in rec and 'compatibility_score' not in rec:
+            rec['compatibility_score'] = rec['match_score']
+    return recommendations
+
+
+def _extract_interest_scores(answers):
+    """Average of the interest questions (orders 14-17), 5.0 when unanswered."""
+    scores = {
+        'interest_tech': 5.0,
+        'interest_business': 5.0,
+        'interest_creativity': 5.0,
+        'interest_social': 5.0,
+    }
+    try:
+        from apps.quiz.schema import questions_by_id
+        questions = questions_by_id()
+        buckets = {14: [], 15: [], 16: [], 17: []}
+        for qid, val in answers.items():
+            q = questions.get(str(qid))
+            if not q or q.category != 'interests':
+                continue
+            order = q.order
+            score = None
+            if isinstance(val, dict):
+                score = val.get('value') or val.get('score')
+            else:
+                score = val
+            try:
+                buckets[order].append(float(score))
+            except Exception:
+                pass
+        def avg(lst):
+            return round(sum(lst) / len(lst), 1) if lst else 5.0
+        scores['interest_tech'] = avg(buckets[14])
+        scores['interest_business'] = avg(buckets[15])
+        scores['interest_creativity'] = avg(buckets[16])
+        scores['interest_social'] = avg(buckets[17])
+    except Exception:
+        pass
+    return scores
+
+
+def _extract_work_style_scores(answers):
+    """Average of the work-style questions (orders 18-19), 5.0 when unanswered."""
+    scores = {
+        'work_style_independent': 5.0,
+        'work_style_collaborative': 5.0,
+    }
+    try:
+        from apps.quiz.schema import questions_by_id
+        questions = questions_by_id()
+        buckets = {18: [], 19: []}  # Q18: independent, Q19: collaborative
+        for qid, val in answers.items():
+            q = questions.get(str(qid))
+            if not q or q.category != 'work_style':
+                continue
+            order = q.order
+            score = None
+            if isinstance(val, dict):
+                score = val.get('value') or val.get('score')
+            else:
+                score = val
+            try:
+                buckets[order].append(float(score))
+            except Exception:
+                pass
+        def avg(lst):
+            return round(sum(lst) / len(lst), 1) if lst else 5.0
+        scores['work_style_independent'] = avg(buckets[18])
+        scores['work_style_collaborative'] = avg(buckets[19])
+    except Exception:
+        pass
+    return scores
+
+
+def _options_digest(top_n: int, filters=None) -> str:
+    options = f"top_n={top_n}|filters={sorted((filters.to_dict() if filters else {}).items())}"
+    return hashlib.sha1(options.encode()).hexdigest()[:12]
+
+
+def request_digest(answers_dict: Dict, top_n: int, filters=None) -> str:
+    """Exact digest of an answer set and the request options.
+
+    Stored on ``CareerRecommendation.answers_digest``; unlike the cache key it
+    ignores ``RECOMMENDATION_CACHE_QUANTUM``, since the stored row also keeps
+    the answers themselves.
+    """
+    return f"{profile_hash(answers_dict, quantum=0)[:27]}:{_options_digest(top_n, filters)}"
+
+
+def current_fingerprint(service) -> str:
+    """Engine fingerprint (see ``cache.engine_fingerprint``) of ``service``."""
+    return engine_fingerprint(get_engine_registry().active_name, service)
+
+
+def recommend_for_answers(
+    answers_dict: Dict, top_n: int, filters=None, service=None
+) -> Tuple[Dict, str]:
+    """Cached ``compute_recommendations`` with the active engine.
+
+    Returns ``(result, source)`` where source is 'local', 'shared' or
+    'computed' (see ``cache.py``).  Raises ``LookupError`` when no engine is
+    ready.
+
+    Only the career list is cached: with ``RECOMMENDATION_CACHE_QUANTUM``
+    set, answer sets that differ slightly share a cache entry, but the
+    ability profile shown to each user is computed from their own answers.
+    """
+    registry = get_engine_registry()
+    if service is None:
+        service = registry.get_service()
+    if service is None:
+        raise LookupError('Recommendation engine is not ready')
+    if not getattr(settings, 'RECOMMENDATION_CACHE_ENABLED', True):
+        return compute_recommendations(service, answers_dict, top_n, filters), COMPUTED
+
+    key = f"{profile_hash(answers_dict)}:{_options_digest(top_n, filters)}"
+    recommendations, source = get_result_cache().get_or_compute(
+        key,
+        engine_fingerprint(registry.active_name, service),
+        lambda: _recommendation_list(service, answers_dict, top_n, filters),
+    )
+    return {
+        'recommendations': recommendations,
+        'abilities': profile_scores(service, answers_dict),
+    }, source
+
+
+def parse_recommend_options(data) -> Tuple[int, CatalogFilters]:
+    """``(top_n, filters)`` of a recommend request; raises ValueError if invalid."""
+    try:
+        top_n = int(data.get('top_n', 10))  # Default to 10 careers instead of 5
+    except (TypeError, ValueError):
+        raise ValueError('top_n must be an integer')
+    # larger lists are paged from GET /api/results/{session_id}/ranking/
+    top_n = min(max(top_n, 1), settings.RECOMMENDATION_MAX_TOP_N)
+    return top_n, CatalogFilters.from_params(data)
+
+
+def recommendation_payload(recommendation: CareerRecommendation, top_n: int) -> Dict:
+    """Response body of POST /api/results/recommend/ for a stored result."""
+    return {
+        'success': True,
+        'recommendation_id': str(recommendation.id),
+        'session_id': recommendation.session_id,
+        'primary_career': recommendation.primary_career,
+        'primary_compatibility': round(recommendation.primary_compatibility, 2),
+        'top_recommendations': recommendation.top_recommendations[:top_n],
+        'abilities': recommendation.abilities,
+    }
+
+
+def recommend_and_store(
+    service, session_id: str, answers_dict: Dict, top_n: int, filters=None, user=None
+) -> Tuple[Dict, bool]:
+    """Recommendations for a session's answers, saved on its ``CareerRecommendation``.
+
+    Returns ``(payload, created)``; ``created`` is False when a stored or
+    concurrently computed result was reused.
+    """
+    # The results page asks again on every mount: if the stored result
+    # was computed from these answers and options by the same engine,
+    # catalog and quiz, return it without scoring or writing anything.
+    digest = request_digest(answers_dict, top_n, filters)
+    fingerprint = current_fingerprint(service)
+    stored = CareerRecommendation.objects.filter(
+        session_id=session_id,
+        answers_digest=digest,
+        engine_fingerprint=fingerprint,
+        user=user,
+    ).first()
+    if stored is not None:
+        return recommendation_payload(stored, top_n), False
+
+    # Duplicate POSTs (strict mode, double clicks) wait for the one
+    # in flight and share its result instead of racing on the writes.
+    flight_key = hashlib.sha1(
+        f"{session_id}|{getattr(user, 'pk', None)}|{digest}|{fingerprint}".encode()
+    ).hexdigest()
+    payload, shared = get_single_flight().do(
+        f"recommend:{flight_key}",
+        lambda: _compute_and_store(
+            service, session_id, answers_dict, top_n, filters, user, digest, fingerprint
+        ),
+    )
+    return payload, not shared
+
+
+def _compute_and_store(service, session_id, answers_dict, top_n, filters, user, digest, fingerprint):
+    """Score ``answers_dict``, save the result and return its payload."""
+    # identical answer sets are served from the result cache (cache.py)
+    result, source = recommend_for_answers(answers_dict, top_n, filters, service=service)
+    logger.debug(f"Recommendations for {session_id}: {source}")
+
+    with transaction.atomic():
+        recommendation, created = CareerRecommendation.objects.update_or_create(
+            session_id=session_id,
+            defaults={
+                **recommendation_fields(result, answers_dict, digest, fingerprint),
+                'user': user,
+            }
+        )
+
+        # Track user progress
+        UserProgress.objects.update_or_create(
+            session_id=session_id,
+            defaults={
+                'recommendation': recommendation,
+                'user': user,
+            }
+        )
+
+    return recommendation_payload(recommendation, top_n)
+
+
+# fields set from a computed result (plus updated_at, which bulk_update skips)
+RESULT_FIELDS = [
+    'primary_career', 'primary_compatibility', 'top_recommendations', 'abilities',
+    'quiz_features', 'answers_digest', 'engine_fingerprint', 'updated_at',
+]
+
+
+def recommendation_fields(result: Dict, answers_dict: Dict, digest: str, fingerprint: str) -> Dict:
+    """``CareerRecommendation`` field values for a ``compute_recommendations`` result."""
+    primary_career, primary_compatibility = _primary(result['recommendations'])
+    return {
+        'primary_career': primary_career,
+        'primary_compatibility': primary_compatibility,
+        'top_recommendations': result['recommendations'],
+        'abilities': result['abilities'],
+        'quiz_features': answers_dict,
+        'answers_digest': digest,
+        'engine_fingerprint': fingerprint,
+    }
+
+
+def _primary(recommendations) -> Tuple[str, float]:
+    """``(primary_career, primary_compatibility)`` of a recommendation list."""
+    if not recommendations:
+        return 'Unknown', 0
+    top = recommendations[0]
+    # Handle both response formats: new has 'score', old has 'compatibility_score'
+    return (
+        top.get('name') or top.get('career', 'Unknown'),
+        top.get('score') or top.get('compatibility_score') or top.get('match_score', 0),
+    )
+
+
+def recommend_batch(
+    service, session_ids: List[str], answer_maps: List[Dict], top_n: int, filters=None, user=None
+) -> List[Dict]:
+    """Recommendations for many sessions and raw answer sets at once.
+
+    All session answers are loaded with one query and every answer set that
+    needs scoring goes through ``compute_many_recommendations`` together.
+    Sessions keep the fast path of ``recommend_and_store`` (a stored result
+    with the same digest, fingerprint and user is returned as-is); the others
+    are written for ``user`` with one bulk update / insert per table.  Raw answer sets are
+    scored but not stored.
+
+    Returns one entry per session id, then one per answer map, in order.
+    """
+    session_ids = list(dict.fromkeys(session_ids))
+    answers_by_session = {session_id: {} for session_id in session_ids}
+    for session_id, question_id, response in QuizAnswer.objects.filter(
+        session_id__in=session_ids
+    ).values_list('session_id', 'question_id', 'user_response'):
+        answers_by_session[session_id][str(question_id)] = response
+
+    fingerprint = current_fingerprint(service)
+    digests = {
+        session_id: request_digest(answers, top_n, filters)
+        for session_id, answers in answers_by_session.items()
+        if answers
+    }
+    stored = {
+        rec.session_id: rec
+        for rec in CareerRecommendation.objects.filter(session_id__in=list(digests))
+    }
+    pending = [
+        session_id for session_id, digest in digests.items()
+        if session_id not in stored
+        or stored[session_id].answers_digest != digest
+        or stored[session_id].engine_fingerprint != fingerprint
+        or stored[session_id].user_id != getattr(user, 'pk', None)
+    ]
+
+    results = compute_many_recommendations(
+        service,
+        [answers_by_session[session_id] for session_id in pending] + list(answer_maps),
+        top_n,
+        filters,
+    )
+    if pending:
+        _store_batch(
+            pending, answers_by_session, results[:len(pending)], digests, fingerprint, user, stored
+        )
+
+    payloads = []
+    for session_id in session_ids:
+        if session_id in stored:
+            payloads.append(recommendation_payload(stored[session_id], top_n))
+        else:
+            payloads.append({
+                'success': False,
+                'session_id': session_id,
+                'error': 'No quiz answers found for this session',
+            })
+    for index, result in enumerate(results[len(pending):]):
+        primary_career, primary_compatibility = _primary(result['recommendations'])
+        payloads.append({
+            'success': True,
+            'index': index,
+            'primary_career': primary_career,
+            'primary_compatibility': round(primary_compatibility, 2),
+            'top_recommendations': result['recommendations'][:top_n],
+            'abilities': result['abilities'],
+        })
+    return payloads
+
+
+def _store_batch(session_ids, answers_by_session, results, digests, fingerprint, user, stored) -> None:
+    """Save batch results: one bulk update and one bulk insert per table.
+
+    ``stored`` is updated in place with the saved rows.
+    """
+    now = timezone.now()
+    to_update, to_create = [], []
+    for session_id, result in zip(session_ids, results):
+        recommendation = stored.get(session_id) or CareerRecommendation(session_id=session_id)
+        fields = recommendation_fields(
+            result, answers_by_session[session_id], digests[session_id], fingerprint
+        )
+        for name, value in fields.items():
+            setattr(recommendation, name, value)
+        recommendation.user = user
+        recommendation.updated_at = now  # bulk_update skips auto_now
+        (to_update if session_id in stored else to_create).append(recommendation)
+
+    with transaction.atomic():
+        CareerRecommendation.objects.bulk_update(to_update, RESULT_FIELDS + ['user'])
+        CareerRecommendation.objects.bulk_create(to_create)
+        stored.update((rec.session_id, rec) for rec in to_create)
+
+        # Track user progress, as update_or_create does for single requests
+        progress = {}
+        for row in UserProgress.objects.filter(session_id__in=session_ids).order_by('created_at'):
+            progress.setdefault(row.session_id, row)
+        for row in progress.values():
+            row.recommendation = stored[row.session_id]
+            row.user = user
+            row.updated_at = now
+        UserProgress.objects.bulk_update(list(progress.values()), ['recommendation', 'user', 'updated_at'])
+        UserProgress.objects.bulk_create([
+            UserProgress(session_id=session_id, recommendation=stored[session_id], user=user)
+            for session_id in session_ids
+            if session_id not in progress
+        ])
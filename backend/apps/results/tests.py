@@ -0,0 +1,320 @@
+"""
+Tests for the recommendation pipeline.
+
+Run with: python manage.py test apps.results
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.quiz.models import QuizAnswer, QuizQuestion
+from . import cache as result_cache
+from .coalescing import SingleFlight
+from .jobs import claim_next_job, enqueue_recommendation, run_job
+from .models import CareerRecommendation, RecommendationJob
+from .rescoring import Checkpoint, iter_chunks, load_chunk, rescore_chunk
+from .services import current_fingerprint, parse_recommend_options, recommend_for_answers, request_digest
+
+
+class StubService:
+    """Engine double: fixed careers, abilities echo the answers."""
+
+    model_version = 'stub-1'
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_careers(self, answers_dict, top_n=5):
+        self.calls += 1
+        return [{'name': f'Career {rank}', 'score': 1 - rank / 100} for rank in range(top_n)]
+
+    def calculate_ability_scores(self, answers_dict):
+        return {'logical_thinking': sum(answers_dict.values())}
+
+
+@override_settings(
+    CATALOG_INDEX_CHECK_SECONDS=3600,
+    RECOMMENDATION_CACHE_ENABLED=True,
+    RECOMMENDATION_CACHE_QUANTUM=2,
+)
+class ResultCacheTests(TestCase):
+    """recommend_for_answers shares careers between near-identical answers, not profiles."""
+
+    def setUp(self):
+        cache.clear()
+        result_cache._result_cache = None
+        self.service = StubService()
+
+    def test_quantized_hit_keeps_the_callers_profile(self):
+        first, source = recommend_for_answers({'q1': 6, 'q2': 8}, 5, service=self.service)
+        self.assertEqual(source, result_cache.COMPUTED)
+        self.assertEqual(first['abilities']['logical_thinking'], 14)
+
+        # rounds to the same answers with RECOMMENDATION_CACHE_QUANTUM=2
+        second, source = recommend_for_answers({'q1': 6, 'q2': 7}, 5, service=self.service)
+        self.assertEqual(source, result_cache.LOCAL)
+        self.assertEqual(self.service.calls, 1)
+        self.assertEqual(second['recommendations'], first['recommendations'])
+        self.assertEqual(second['abilities']['logical_thinking'], 13)
+
+
+class LockTests(TestCase):
+    """Shared-cache locks are only released by their holder; per-key locks outlive their waiters."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_timed_out_waiter_keeps_the_other_processs_lock(self):
+        results = result_cache.RecommendationCache(lock_seconds=0.05)
+        lock_key = f'{result_cache.CACHE_PREFIX}:fp:key:lock'
+        cache.set(lock_key, 'other-process')
+        value, source = results.get_or_compute('key', 'fp', lambda: ['computed'])
+        self.assertEqual((value, source), (['computed'], result_cache.COMPUTED))
+        self.assertEqual(cache.get(lock_key), 'other-process')
+
+    def test_lock_holder_releases_its_lock(self):
+        results = result_cache.RecommendationCache()
+        results.get_or_compute('key', 'fp', lambda: ['computed'])
+        self.assertIsNone(cache.get(f'{result_cache.CACHE_PREFIX}:fp:key:lock'))
+
+    def test_single_flight_without_the_lock_keeps_it(self):
+        lock_key = 'singleflight:v1:key:lock'
+        cache.set(lock_key, 'other-process')
+        with mock.patch('apps.results.coalescing.cache.add', side_effect=RuntimeError('cache down')):
+            self.assertEqual(SingleFlight().do('key', lambda: 'computed'), ('computed', False))
+        self.assertEqual(cache.get(lock_key), 'other-process')
+
+    def test_key_lock_is_kept_while_a_thread_waits(self):
+        results = result_cache.RecommendationCache()
+        key = f'{result_cache.CACHE_PREFIX}:fp:key'
+        calls, waiter_results = [], []
+        waiter = threading.Thread(
+            target=lambda: waiter_results.append(results.get_or_compute('key', 'fp', lambda: calls.append(2)))
+        )
+
+        def compute():
+            calls.append(1)
+            waiter.start()
+            while results._key_locks[key].users < 2:  # the waiter is blocked on the lock
+                time.sleep(0.001)
+            return ['computed']
+
+        results.get_or_compute('key', 'fp', compute)
+        waiter.join()
+        self.assertEqual(calls, [1])
+        self.assertEqual(waiter_results[0], (['computed'], result_cache.LOCAL))
+        self.assertEqual(results._key_locks, {})
+
+
+@override_settings(RECOMMENDATION_JOB_TIMEOUT_SECONDS=300, RECOMMENDATION_JOB_MAX_ATTEMPTS=2)
+class JobQueueTests(TestCase):
+    """claim_next_job hands each job to one worker and gives up after the attempt limit."""
+
+    def setUp(self):
+        self.job = enqueue_recommendation('session-1', 5)
+
+    def make_stale(self):
+        RecommendationJob.objects.filter(id=self.job.id).update(
+            locked_at=timezone.now() - timedelta(seconds=301)
+        )
+
+    def test_job_is_claimed_by_one_worker(self):
+        claimed = claim_next_job('worker-1')
+        self.assertEqual(claimed.id, self.job.id)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts),
+                         (RecommendationJob.RUNNING, 'worker-1', 1))
+        self.assertIsNone(claim_next_job('worker-2'))
+
+    def test_stale_lock_is_reclaimed(self):
+        claim_next_job('worker-1')
+        self.make_stale()
+        claimed = claim_next_job('worker-2')
+        self.assertEqual((claimed.id, claimed.locked_by, claimed.attempts), (self.job.id, 'worker-2', 2))
+
+    def test_stale_job_past_the_attempt_limit_fails(self):
+        claim_next_job('worker-1')
+        self.make_stale()
+        claim_next_job('worker-2')
+        self.make_stale()
+        self.assertIsNone(claim_next_job('worker-3'))
+        job = RecommendationJob.objects.get(id=self.job.id)
+        self.assertEqual(job.status, RecommendationJob.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    @mock.patch('apps.results.jobs.load_session_answers', return_value={'q1': 5})
+    @mock.patch('apps.results.jobs.recommend_and_store', side_effect=RuntimeError('engine down'))
+    def test_failed_job_is_retried_then_failed(self, recommend, answers):
+        run_job(claim_next_job('worker-1'), StubService())
+        job = RecommendationJob.objects.get(id=self.job.id)
+        self.assertEqual((job.status, job.error, job.locked_by), (RecommendationJob.PENDING, 'engine down', ''))
+
+        run_job(claim_next_job('worker-2'), StubService())
+        job = RecommendationJob.objects.get(id=self.job.id)
+        self.assertEqual((job.status, job.attempts), (RecommendationJob.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_next_job('worker-3'))
+
+
+@override_settings(CATALOG_INDEX_CHECK_SECONDS=3600, RECOMMENDATION_CACHE_ENABLED=False)
+class RecommendBatchTests(TestCase):
+    """POST /api/results/recommend-batch/ reuses a stored result only for the same user."""
+
+    def setUp(self):
+        cache.clear()
+        question = QuizQuestion.objects.create(question_text='Q', category='logic', order=1)
+        self.question_id = str(question.id)
+        QuizAnswer.objects.create(question=question, session_id='session-1', user_response=7)
+
+        self.service = StubService()
+        registry = mock.Mock(active_name='stub', get_service=lambda: self.service)
+        for target in ('apps.results.views.get_engine_registry', 'apps.results.services.get_engine_registry'):
+            patcher = mock.patch(target, return_value=registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post(self, data):
+        return self.client.post('/api/results/recommend-batch/', data, content_type='application/json')
+
+    def test_sessions_and_answer_sets_in_order(self):
+        response = self.post({
+            'session_ids': ['session-1', 'missing'],
+            'answers': [{self.question_id: 3}],
+            'top_n': 2,
+        })
+        self.assertEqual(response.status_code, 200)
+        first, missing, raw = response.json()['results']
+        self.assertEqual((first['session_id'], first['primary_career']), ('session-1', 'Career 0'))
+        self.assertEqual(len(first['top_recommendations']), 2)
+        self.assertEqual(first['abilities']['logical_thinking'], 7)
+        self.assertEqual((missing['session_id'], missing['success']), ('missing', False))
+        self.assertEqual((raw['index'], raw['abilities']['logical_thinking']), (0, 3))
+        self.assertTrue(CareerRecommendation.objects.filter(session_id='session-1', user=None).exists())
+
+        calls = self.service.calls
+        self.post({'session_ids': ['session-1'], 'top_n': 2})
+        self.assertEqual(self.service.calls, calls)  # stored row reused
+
+    def test_row_of_another_user_is_not_reused(self):
+        top_n, filters = parse_recommend_options({'top_n': 2})
+        other = User.objects.create_user('other')
+        CareerRecommendation.objects.create(
+            session_id='session-1', user=other, primary_career='Theirs', primary_compatibility=1,
+            top_recommendations=[{'name': 'Theirs'}], abilities={},
+            answers_digest=request_digest({self.question_id: 7}, top_n, filters),
+            engine_fingerprint=current_fingerprint(self.service),
+        )
+        result = self.post({'session_ids': ['session-1'], 'top_n': 2}).json()['results'][0]
+        self.assertEqual(result['primary_career'], 'Career 0')
+        self.assertEqual(self.service.calls, 1)
+        stored = CareerRecommendation.objects.get(session_id='session-1')
+        self.assertIsNone(stored.user)
+
+
+@override_settings(CATALOG_INDEX_CHECK_SECONDS=3600, RECOMMENDATION_MAX_TOP_N=50)
+class RescoringTests(TestCase):
+    """rescore_recommendations pages by id, skips sessions without answers and resumes."""
+
+    COMMAND = 'apps.results.management.commands.rescore_recommendations'
+
+    def setUp(self):
+        question = QuizQuestion.objects.create(question_text='Q', category='logic', order=1)
+        self.ids = []
+        for i in range(5):
+            session_id = f'session-{i}'
+            if i != 2:  # session-2 has no answers left
+                QuizAnswer.objects.create(question=question, session_id=session_id, user_response=i + 1)
+            self.ids.append(str(CareerRecommendation.objects.create(
+                session_id=session_id, primary_career='Old', primary_compatibility=1,
+                top_recommendations=[{'name': 'Old'}] * i, engine_fingerprint='old',
+            ).id))
+        self.ids.sort()
+
+        self.service = StubService()
+        registry = mock.Mock(active_name='stub', get_service=lambda: self.service)
+        for target in (f'{self.COMMAND}.get_engine_registry', 'apps.results.services.get_engine_registry'):
+            patcher = mock.patch(target, return_value=registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.fingerprint = current_fingerprint(self.service)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.checkpoint = os.path.join(directory, 'checkpoint.json')
+
+    def rescore(self, **options):
+        call_command('rescore_recommendations', workers=0, chunk_size=2,
+                     checkpoint=self.checkpoint, stdout=open(os.devnull, 'w'), **options)
+
+    def fingerprints(self):
+        return dict(CareerRecommendation.objects.values_list('session_id', 'engine_fingerprint'))
+
+    def test_iter_chunks_pages_by_id(self):
+        chunks = list(iter_chunks(CareerRecommendation.objects.all(), 2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([str(pk) for chunk in chunks for pk in chunk], self.ids)
+        after = list(iter_chunks(CareerRecommendation.objects.all(), 2, after=self.ids[2]))
+        self.assertEqual([str(pk) for chunk in after for pk in chunk], self.ids[3:])
+
+    def test_load_chunk_skips_sessions_without_answers(self):
+        rows, skipped = load_chunk(self.ids)
+        self.assertEqual(skipped, 1)
+        top_n = {session_id: n for _, session_id, _, n in rows}
+        # the stored list length, at least 1
+        self.assertEqual(top_n, {'session-0': 1, 'session-1': 1, 'session-3': 3, 'session-4': 4})
+
+    def test_checkpoint_round_trip(self):
+        checkpoint = Checkpoint(self.checkpoint)
+        self.assertIsNone(checkpoint.load())
+        checkpoint.save(last_id=self.ids[1], rescored=2)
+        self.assertEqual(checkpoint.load(), {'last_id': self.ids[1], 'rescored': 2})
+        checkpoint.clear()
+        self.assertIsNone(checkpoint.load())
+        with open(self.checkpoint, 'w') as f:
+            f.write('{not json')
+        with self.assertRaises(ValueError):
+            checkpoint.load()
+
+    def test_rescores_stale_rows_in_process(self):
+        self.rescore()
+        fingerprints = self.fingerprints()
+        self.assertEqual(fingerprints.pop('session-2'), 'old')  # no answers: skipped
+        self.assertEqual(set(fingerprints.values()), {self.fingerprint})
+        stored = CareerRecommendation.objects.get(session_id='session-4')
+        self.assertEqual(len(stored.top_recommendations), 4)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume_continues_after_the_checkpoint(self):
+        seen = []
+
+        def interrupt_second_chunk(service, ids, fingerprint):
+            if seen:
+                raise KeyboardInterrupt
+            seen.append(list(ids))
+            return rescore_chunk(service, ids, fingerprint)
+
+        with mock.patch(f'{self.COMMAND}.rescore_chunk', side_effect=interrupt_second_chunk):
+            with self.assertRaises(CommandError):
+                self.rescore(all=True)
+        self.assertEqual(Checkpoint(self.checkpoint).load()['last_id'], self.ids[1])
+
+        with mock.patch(f'{self.COMMAND}.rescore_chunk', side_effect=rescore_chunk) as resumed:
+            self.rescore(all=True, resume=True)
+        self.assertEqual([str(pk) for call in resumed.call_args_list for pk in call[0][1]], self.ids[2:])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_checkpoint_of_another_engine_starts_over(self):
+        Checkpoint(self.checkpoint).save(fingerprint='other', all=True, last_id=self.ids[-1], rescored=5)
+        with mock.patch(f'{self.COMMAND}.rescore_chunk', side_effect=rescore_chunk) as run:
+            self.rescore(all=True, resume=True)
+        self.assertEqual([str(pk) for call in run.call_args_list for pk in call[0][1]], self.ids)
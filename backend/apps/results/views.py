@@ -2,76 +2,53 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.shortcuts import get_object_or_404
-from django.db import transaction
-from .models import CareerRecommendation, UserProgress
-from .serializers import CareerRecommendationSerializer, UserProgressSerializer
-from .inference import CareerInferenceService
+from django.conf import settings
+from .models import CareerRecommendation, RecommendationJob, UserProgress
+from .serializers import CareerRecommendationSerializer, RecommendBatchSerializer, UserProgressSerializer
+from .engines import get_engine_registry
+from .jobs import ACTIVE, enqueue_recommendation, job_status, latest_job
+from .ranking import decode_cursor, encode_cursor, get_ranking
+from .services import load_session_answers, parse_recommend_options, recommend_and_store, recommend_batch
+from apps.careers.filters import CatalogFilters
+from apps.core.idempotency import idempotent
 from apps.quiz.models import QuizAnswer
+from ml.catalog_index import get_catalog_index
 import logging
 
 
 logger = logging.getLogger(__name__)
 
-# Import recommendation services with graceful fallback
-try:
-    from ml.ability_recommender import AbilityRecommendationService
-except (ImportError, Exception):
-    AbilityRecommendationService = None
-
-try:
-    from ml.advanced_recommender import HybridRecommendationService
-except (ImportError, Exception):
-    HybridRecommendationService = None
+# upper bound for ``k`` of the per-cluster endpoint
+MAX_PER_CLUSTER = 10
 
 
 class CareerRecommendationViewSet(viewsets.ViewSet):
     """
     API endpoints for career recommendations.
     POST /api/results/recommend/ - Generate recommendations from quiz answers
-    GET /api/results/{session_id}/ - Retrieve saved recommendations
+    POST /api/results/recommend-batch/ - Recommendations for many sessions at once
+    POST /api/results/top-per-cluster/ - Best careers in each cluster
+    GET /api/results/{session_id}/ranking/ - Page through the full ranking
+    GET /api/results/{session_id}/explain/{career_id}/ - Explain one career
+    GET /api/results/{session_id}/ - Retrieve saved recommendations (or async job status)
     """
     
     permission_classes = [AllowAny]
-    inference_service = None
-
-    def __init__(self, *args, **kwargs):
-        """Initialize with ML inference service (priority order)."""
-        super().__init__(*args, **kwargs)
-        if CareerRecommendationViewSet.inference_service is None:
-            # Priority 1: Ability-based recommendation (best at matching user abilities)
-            if AbilityRecommendationService:
-                try:
-                    CareerRecommendationViewSet.inference_service = AbilityRecommendationService()
-                    logger.info("Using AbilityRecommendationService (ability-based matching)")
-                except Exception as e:
-                    logger.warning(f"AbilityRecommendationService failed ({e}), trying HybridRecommendationService")
-            
-            # Priority 2: Hybrid embedding-based recommender
-            if CareerRecommendationViewSet.inference_service is None and HybridRecommendationService:
-                try:
-                    CareerRecommendationViewSet.inference_service = HybridRecommendationService()
-                    logger.info("Using HybridRecommendationService (embedding-based)")
-                except Exception as e:
-                    logger.warning(f"HybridRecommendationService failed ({e}), falling back to CareerInferenceService")
-            
-            # Priority 3: Traditional ML fallback
-            if CareerRecommendationViewSet.inference_service is None:
-                try:
-                    CareerRecommendationViewSet.inference_service = CareerInferenceService()
-                    logger.info("Using CareerInferenceService (traditional ML fallback)")
-                except Exception as fallback_e:
-                    logger.error(f"Failed to initialize any inference service: {fallback_e}")
-
     
-    @transaction.atomic
+    @idempotent('results.recommend')
     def generate_recommendations(self, request):
         """
         Generate career recommendations from quiz answers.
         
         Request: {
             "session_id": "unique-session",
-            "top_n": 5  // optional
+            "top_n": 5,  // optional, capped at RECOMMENDATION_MAX_TOP_N
+            "skills": ["python", "sql"],  // optional, only careers requiring them
+            "skills_mode": "all",  // optional, "all" or "any"
+            "min_salary": 90000,  // optional, salary range reaches at least this
+            "min_growth": 10,  // optional, job growth in %
+            "clusters": ["Technology"],  // optional, list or "a,b"
+            "max_education": "bachelor"  // optional, name or code 0-5
         }
         
         Returns: {
@@ -81,186 +58,59 @@ class CareerRecommendationViewSet(viewsets.ViewSet):
             "primary_career": "Software Developer",
             "primary_compatibility": 87.5
         }
+        
+        With ?async=1 the request is queued for the recommendation workers
+        and answered with 202 {"job_id": ..., "status": "pending"}; poll
+        GET /api/results/{session_id}/ for the result.
         """
         session_id = request.data.get('session_id')
-        top_n = request.data.get('top_n', 10)  # Default to 10 careers instead of 5
         
         if not session_id:
             return Response(
                 {'success': False, 'error': 'session_id is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            top_n, filters = parse_recommend_options(request.data)
+        except ValueError as e:
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if request.query_params.get('async') in ('1', 'true'):
+            return self._enqueue_recommendation(request, session_id, top_n, filters)
+        
+        # Engines are warmed in the background at startup (see engines.py);
+        # a cold worker answers 503 instead of blocking the request thread.
+        self.inference_service = get_engine_registry().get_service()
+        if self.inference_service is None:
+            return Response(
+                {'success': False, 'error': 'Recommendation engine is not ready'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         
         try:
             # Fetch quiz answers for this session
-            quiz_answers = QuizAnswer.objects.filter(session_id=session_id)
+            answers_dict = load_session_answers(session_id)
             
-            if not quiz_answers.exists():
+            if not answers_dict:
                 return Response(
                     {'success': False, 'error': 'No quiz answers found for this session'},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Convert to dict for ML service
-            answers_dict = {}
-            for answer in quiz_answers:
-                answers_dict[str(answer.question.id)] = answer.user_response
-            
-            # Handle different service types
-            service_class_name = self.inference_service.__class__.__name__
-            
-            if service_class_name == 'AbilityRecommendationService':
-                # New ability-based service returns AbilityRecommendation objects
-                rec_objects = self.inference_service.recommend(answers_dict, top_n=top_n)
-                recommendations = [r.to_dict() for r in rec_objects]
-                ability_scores = {}  # Will be filled below
-            elif service_class_name == 'HybridRecommendationService':
-                # Hybrid service returns dataclass objects
-                rec_objects = self.inference_service.recommend(answers_dict, top_n=top_n)
-                recommendations = [r.to_dict() for r in rec_objects]
-                ability_scores = self.inference_service.calculate_ability_scores(answers_dict) if hasattr(self.inference_service, 'calculate_ability_scores') else {}
-            else:
-                # Old CareerInferenceService returns dicts directly
-                recommendations = self.inference_service.predict_careers(answers_dict, top_n=top_n)
-                ability_scores = self.inference_service.calculate_ability_scores(answers_dict) if hasattr(self.inference_service, 'calculate_ability_scores') else {}
-            
-            # If ability_scores is empty (AbilityRecommendationService), compute using inference service
-            if not ability_scores or service_class_name == 'AbilityRecommendationService':
-                try:
-                    # Use CareerInferenceService separately to get core ability scores
-                    from apps.results.inference import CareerInferenceService
-                    inference_service = CareerInferenceService()
-                    core_abilities = inference_service.calculate_ability_scores(answers_dict)
-                    ability_scores.update(core_abilities)
-                except Exception as e:
-                    logger.warning(f"Failed to extract core ability scores: {e}")
-            
-            # even if the service didn't supply interest details, compute them here
-            def _extract_interest_scores(answers):
-                scores = {
-                    'interest_tech': 5.0,
-                    'interest_business': 5.0,
-                    'interest_creativity': 5.0,
-                    'interest_social': 5.0,
-                }
-                try:
-                    from apps.quiz.models import QuizQuestion
-                    questions = {str(q.id): q for q in QuizQuestion.objects.all()}
-                    buckets = {14: [], 15: [], 16: [], 17: []}
-                    for qid, val in answers.items():
-                        q = questions.get(str(qid))
-                        if not q or q.category != 'interests':
-                            continue
-                        order = q.order
-                        score = None
-                        if isinstance(val, dict):
-                            score = val.get('value') or val.get('score')
-                        else:
-                            score = val
-                        try:
-                            buckets[order].append(float(score))
-                        except Exception:
-                            pass
-                    def avg(lst):
-                        return round(sum(lst) / len(lst), 1) if lst else 5.0
-                    scores['interest_tech'] = avg(buckets[14])
-                    scores['interest_business'] = avg(buckets[15])
-                    scores['interest_creativity'] = avg(buckets[16])
-                    scores['interest_social'] = avg(buckets[17])
-                except Exception:
-                    pass
-                return scores
-            interest_scores = _extract_interest_scores(answers_dict)
-            # merge into ability_scores (overwrites existing keys or fills missing)
-            ability_scores.update(interest_scores)
-            
-            # Extract work style scores
-            def _extract_work_style_scores(answers):
-                scores = {
-                    'work_style_independent': 5.0,
-                    'work_style_collaborative': 5.0,
-                }
-                try:
-                    from apps.quiz.models import QuizQuestion
-                    questions = {str(q.id): q for q in QuizQuestion.objects.all()}
-                    buckets = {18: [], 19: []}  # Q18: independent, Q19: collaborative
-                    for qid, val in answers.items():
-                        q = questions.get(str(qid))
-                        if not q or q.category != 'work_style':
-                            continue
-                        order = q.order
-                        score = None
-                        if isinstance(val, dict):
-                            score = val.get('value') or val.get('score')
-                        else:
-                            score = val
-                        try:
-                            buckets[order].append(float(score))
-                        except Exception:
-                            pass
-                    def avg(lst):
-                        return round(sum(lst) / len(lst), 1) if lst else 5.0
-                    scores['work_style_independent'] = avg(buckets[18])
-                    scores['work_style_collaborative'] = avg(buckets[19])
-                except Exception:
-                    pass
-                return scores
-            work_scores = _extract_work_style_scores(answers_dict)
-            ability_scores.update(work_scores)
-            
-            # normalize dictionary keys so frontend can always access .career
-            for rec in recommendations:
-                if 'career' not in rec and 'name' in rec:
-                    rec['career'] = rec['name']
-                # also ensure compatibility_score present when using score
-                if 'compatibility_score' not in rec and 'score' in rec:
-                    rec['compatibility_score'] = rec['score']
-                if 'match_score' in rec and 'compatibility_score' not in rec:
-                    rec['compatibility_score'] = rec['match_score']
-            
-            # Save recommendation to database
-            if recommendations:
-                primary_career = recommendations[0].get('name') or recommendations[0].get('career', 'Unknown')
-                # Handle both response formats: new has 'score', old has 'compatibility_score'
-                primary_compatibility = (
-                    recommendations[0].get('score') or 
-                    recommendations[0].get('compatibility_score') or
-                    recommendations[0].get('match_score', 0)
-                )
-            else:
-                primary_career = 'Unknown'
-                primary_compatibility = 0
-            
-            recommendation_obj, created = CareerRecommendation.objects.update_or_create(
-                session_id=session_id,
-                defaults={
-                    'primary_career': primary_career,
-                    'primary_compatibility': primary_compatibility,
-                    'top_recommendations': recommendations,
-                    'abilities': ability_scores,
-                    'quiz_features': answers_dict,
-                    'user': request.user if request.user.is_authenticated else None,
-                }
+            body, created = recommend_and_store(
+                self.inference_service,
+                session_id,
+                answers_dict,
+                top_n,
+                filters,
+                user=request.user if request.user.is_authenticated else None,
             )
-            
-            # Track user progress
-            UserProgress.objects.update_or_create(
-                session_id=session_id,
-                defaults={
-                    'recommendation': recommendation_obj,
-                    'user': request.user if request.user.is_authenticated else None,
-                }
+            return Response(
+                body, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
             )
-            
-            return Response({
-                'success': True,
-                'recommendation_id': str(recommendation_obj.id),
-                'session_id': session_id,
-                'primary_career': primary_career,
-                'primary_compatibility': round(primary_compatibility, 2),
-                'top_recommendations': recommendations[:top_n],
-                'abilities': ability_scores,
-            }, status=status.HTTP_201_CREATED)
         
         except Exception as e:
             logger.error(f"Error generating recommendations: {e}")
@@ -268,24 +118,312 @@ class CareerRecommendationViewSet(viewsets.ViewSet):
                 {'success': False, 'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
+
+    def _enqueue_recommendation(self, request, session_id, top_n, filters):
+        """Async mode: queue a job for the workers (jobs.py) and answer 202."""
+        if not QuizAnswer.objects.filter(session_id=session_id).exists():
+            return Response(
+                {'success': False, 'error': 'No quiz answers found for this session'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        job = enqueue_recommendation(
+            session_id,
+            top_n,
+            filters,
+            user=request.user if request.user.is_authenticated else None,
+        )
+        return Response({
+            'success': True,
+            'session_id': session_id,
+            **job_status(job),
+            'status_url': f'/api/results/{session_id}/',
+        }, status=status.HTTP_202_ACCEPTED)
+
+    def recommend_batch(self, request):
+        """
+        Recommendations for many sessions and/or raw answer sets at once.
+        
+        Request: {
+            "session_ids": ["session-1", "session-2"],  // optional
+            "answers": [{"question-uuid": 8, ...}],  // optional, scored but not saved
+            "top_n": 5,  // optional, same options as /api/results/recommend/
+            ...
+        }
+        
+        Returns: {
+            "success": true,
+            "results": [
+                {"success": true, "session_id": "session-1", "primary_career": ..., ...},
+                {"success": false, "session_id": "session-2", "error": "No quiz answers found for this session"},
+                {"success": true, "index": 0, "primary_career": ..., ...}
+            ]
+        }
+        Results follow the order of session_ids, then answers.
+        """
+        serializer = RecommendBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'success': False, 'errors': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            top_n, filters = parse_recommend_options(request.data)
+        except ValueError as e:
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        service = get_engine_registry().get_service()
+        if service is None:
+            return Response(
+                {'success': False, 'error': 'Recommendation engine is not ready'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        try:
+            results = recommend_batch(
+                service,
+                serializer.validated_data['session_ids'],
+                serializer.validated_data['answers'],
+                top_n,
+                filters,
+                user=request.user if request.user.is_authenticated else None,
+            )
+        except Exception as e:
+            logger.error(f"Error generating batch recommendations: {e}")
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response({'success': True, 'results': results})
+
+    def top_per_cluster(self, request):
+        """
+        Best matching careers in each field (cluster), from one scoring pass.
+
+        Request: {
+            "session_id": "unique-session",
+            "k": 1,  // optional, careers per cluster (1-10)
+            ...  // optional filters, same as /api/results/recommend/
+        }
+
+        Returns: {
+            "success": true,
+            "clusters": [{"cluster": "Technology", "recommendations": [...]}, ...]
+        }
+        """
+        session_id = request.data.get('session_id')
+        if not session_id:
+            return Response(
+                {'success': False, 'error': 'session_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            k = int(request.data.get('k', 1))
+            if not 1 <= k <= MAX_PER_CLUSTER:
+                raise ValueError(f"k must be between 1 and {MAX_PER_CLUSTER}")
+            filters = CatalogFilters.from_params(request.data)
+        except (TypeError, ValueError) as e:
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        service = get_engine_registry().get_service()
+        if service is None:
+            return Response(
+                {'success': False, 'error': 'Recommendation engine is not ready'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        if not hasattr(service, 'top_per_cluster'):
+            return Response(
+                {'success': False, 'error': 'The active recommendation engine does not support per-cluster results'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+
+        answers_dict = load_session_answers(session_id)
+        if not answers_dict:
+            return Response(
+                {'success': False, 'error': 'No quiz answers found for this session'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            groups = service.top_per_cluster(answers_dict, k=k, filters=filters)
+        except Exception as e:
+            logger.error(f"Error generating per-cluster recommendations: {e}")
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response({
+            'success': True,
+            'session_id': session_id,
+            'clusters': [
+                {'cluster': cluster, 'recommendations': [r.to_dict() for r in recs]}
+                for cluster, recs in groups
+            ],
+        })
+
+    def ranking(self, request, session_id=None):
+        """
+        One page of the full career ranking of a session.
+
+        Query params: cursor (from the previous page), limit (default
+        RANKING_PAGE_SIZE, max RANKING_MAX_PAGE_SIZE) and the same filters as
+        /api/results/recommend/ (skills, min_salary, clusters, ...).
+
+        The ranking is computed once and cached (see ranking.py); each page
+        only builds the recommendation objects it returns.
+
+        Returns: {
+            "success": true,
+            "total": 84,
+            "results": [{"rank": 1, ...}, ...],
+            "next_cursor": "..."  // null on the last page
+        }
+        """
+        params = request.query_params
+        try:
+            offset = decode_cursor(params.get('cursor'))
+            limit = int(params.get('limit', settings.RANKING_PAGE_SIZE))
+            if not 1 <= limit <= settings.RANKING_MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be between 1 and {settings.RANKING_MAX_PAGE_SIZE}")
+            filters = CatalogFilters.from_params(params)
+        except ValueError as e:
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        service = get_engine_registry().get_service()
+        if service is None:
+            return Response(
+                {'success': False, 'error': 'Recommendation engine is not ready'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        if not hasattr(service, 'full_ranking'):
+            return Response(
+                {'success': False, 'error': 'The active recommendation engine does not support rankings'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+
+        answers_dict = load_session_answers(session_id)
+        if not answers_dict:
+            return Response(
+                {'success': False, 'error': 'No quiz answers found for this session'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            # one index for ranking and paging, so positions can't shift
+            # under a concurrent catalog rebuild
+            index = get_catalog_index()
+            full = get_ranking(service, session_id, answers_dict, filters, index=index)
+            page = slice(offset, offset + limit)
+            recs = service.describe(answers_dict, full.positions[page], full.scores[page], index=index)
+        except Exception as e:
+            logger.error(f"Error paging ranking: {e}")
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        results = []
+        for rank, rec in enumerate(recs, start=offset + 1):
+            item = rec.to_dict()
+            item['rank'] = rank
+            results.append(item)
+        next_offset = offset + len(results)
+        return Response({
+            'success': True,
+            'session_id': session_id,
+            'total': len(full),
+            'results': results,
+            'next_cursor': encode_cursor(next_offset) if next_offset < len(full) else None,
+        })
+
+    def explain(self, request, session_id=None, career_id=None):
+        """
+        Personal explanation of one career for a session.
+
+        Recommendation lists only carry career-level text; the user-specific
+        breakdown is rendered here, when the user opens a career.
+        """
+        service = get_engine_registry().get_service()
+        if service is None:
+            return Response(
+                {'success': False, 'error': 'Recommendation engine is not ready'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        if not hasattr(service, 'explain'):
+            return Response(
+                {'success': False, 'error': 'The active recommendation engine does not support explanations'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+
+        answers_dict = load_session_answers(session_id)
+        if not answers_dict:
+            return Response(
+                {'success': False, 'error': 'No quiz answers found for this session'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            explanation = service.explain(answers_dict, career_id)
+        except Exception as e:
+            logger.error(f"Error explaining career {career_id}: {e}")
+            return Response(
+                {'success': False, 'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        if explanation is None:
+            return Response(
+                {'success': False, 'error': 'Career not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({'success': True, 'session_id': session_id, **explanation})
+
     def get_recommendations(self, request, session_id=None):
         """
         Retrieve saved recommendations for a session.
         
+        While a job queued with POST /api/results/recommend/?async=1 is
+        pending or running, answers 202 with {"status": "pending", ...}.
+        
         Returns: {
             "recommendation": {...},
-            "progress": {...}
+            "progress": {...},
+            "job": {...}  // latest async job, if any
         }
         """
         try:
-            recommendation = get_object_or_404(CareerRecommendation, session_id=session_id)
+            job = latest_job(session_id)
+            if job is not None and job.status in ACTIVE:
+                return Response(
+                    {'success': True, 'session_id': session_id, **job_status(job)},
+                    status=status.HTTP_202_ACCEPTED
+                )
+            
+            recommendation = CareerRecommendation.objects.filter(session_id=session_id).first()
+            if recommendation is None:
+                if job is not None and job.status == RecommendationJob.FAILED:
+                    return Response(
+                        {'success': False, 'session_id': session_id, **job_status(job)},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                    )
+                return Response(
+                    {'error': 'No recommendations found for this session'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
             progress = UserProgress.objects.filter(session_id=session_id).first()
             
             data = {
                 'recommendation': CareerRecommendationSerializer(recommendation).data,
                 'progress': UserProgressSerializer(progress).data if progress else None,
             }
+            if job is not None:
+                data['job'] = job_status(job)
             
             return Response(data)
         
@@ -368,3 +506,29 @@ class CareerRecommendationViewSet(viewsets.ViewSet):
             return Response({'success': True})
         except Exception as e:
             return Response({'error': str(e)}, status=500)
+
+
+class HealthCheckViewSet(viewsets.ViewSet):
+    """
+    Health endpoints for load balancers.
+    GET /api/health/live/ - Process is up
+    GET /api/health/ready/ - Engines and catalog index are loaded (503 while warming)
+    """
+    
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    
+    def live(self, request):
+        """Liveness probe; never touches the database or the engines."""
+        return Response({'status': 'alive'})
+    
+    def ready(self, request):
+        """Readiness probe with per-engine load state and index version."""
+        registry = get_engine_registry()
+        # kick off loading if the startup hook didn't (no-op otherwise)
+        registry.start_background_load()
+        data = registry.health()
+        return Response(
+            data,
+            status=status.HTTP_200_OK if registry.is_ready else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
@@ -6,5 +6,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# lets apps.results warm the recommendation engines in server processes
+os.environ.setdefault('DJANGO_SERVING_PROCESS', 'true')
 
 application = get_asgi_application()
@@ -5,6 +5,7 @@ Development and production configurations manage here
 
 import os
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from decouple import config, Csv
 
 # Build paths
@@ -20,6 +21,9 @@ ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=Csv(
 # Include Vite dev variations (5173/5174) so dev server port changes don't block requests
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:5173,http://localhost:5174,http://localhost:3000', cast=Csv())
 CORS_ALLOW_CREDENTIALS = True
+# retried writes carry an Idempotency-Key header (apps/core/idempotency.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 # Application definition
 INSTALLED_APPS = [
@@ -36,6 +40,7 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     
     # Local apps
+    'apps.core',
     'apps.quiz',
     'apps.careers',
     'apps.results',
@@ -92,6 +97,17 @@ else:
         }
     }
 
+# Cache - per-process memory by default.  Version counters, result caches and
+# request coalescing are only shared between workers with a shared backend,
+# e.g. CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache and
+# CACHE_LOCATION=cache_table (then run `python manage.py createcachetable`)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -139,6 +155,70 @@ REST_FRAMEWORK = {
 ML_MODELS_DIR = os.path.join(PROJECT_ROOT, 'backend', 'ml', 'models')
 ML_DATA_DIR = os.path.join(PROJECT_ROOT, 'backend', 'ml', 'data')
 
+# Micro-batching of SentenceTransformer encode calls (hybrid recommender)
+EMBEDDING_BATCH_SIZE = config('EMBEDDING_BATCH_SIZE', default=32, cast=int)
+EMBEDDING_BATCH_WAIT_MS = config('EMBEDDING_BATCH_WAIT_MS', default=5.0, cast=float)
+
+# Recommendation engines, in priority order; loaded in a background thread at
+# startup when RECOMMENDER_WARM_START is on (see apps/results/engines.py)
+RECOMMENDATION_ENGINES = config('RECOMMENDATION_ENGINES', default='ability,hybrid,inference', cast=Csv())
+RECOMMENDER_WARM_START = config('RECOMMENDER_WARM_START', default=True, cast=bool)
+RECOMMENDATION_ENGINE_WAIT_SECONDS = config('RECOMMENDATION_ENGINE_WAIT_SECONDS', default=10.0, cast=float)
+CATALOG_INDEX_CHECK_SECONDS = config('CATALOG_INDEX_CHECK_SECONDS', default=5.0, cast=float)
+
+# 'exact' scores every career; 'clustered' prunes whole clusters by an upper
+# bound first (same top-n, fewer careers scored on large catalogs; ml/retrieval.py)
+RECOMMENDER_RETRIEVAL = config('RECOMMENDER_RETRIEVAL', default='exact')
+
+# MMR diversity reranking (ml/diversity.py): relevance weight in [0, 1] and how
+# many of the most relevant careers are reranked
+RECOMMENDER_MMR_LAMBDA = config('RECOMMENDER_MMR_LAMBDA', default=0.7, cast=float)
+RECOMMENDER_MMR_CANDIDATES = config('RECOMMENDER_MMR_CANDIDATES', default=50, cast=int)
+
+# Result sizes: POST /api/results/recommend/ returns at most
+# RECOMMENDATION_MAX_TOP_N careers; the rest is paged from the cached full
+# ranking (GET /api/results/{session_id}/ranking/, apps/results/ranking.py)
+RECOMMENDATION_MAX_TOP_N = config('RECOMMENDATION_MAX_TOP_N', default=50, cast=int)
+# sessions + answer sets per POST /api/results/recommend-batch/
+RECOMMENDATION_BATCH_MAX_SIZE = config('RECOMMENDATION_BATCH_MAX_SIZE', default=500, cast=int)
+RANKING_PAGE_SIZE = config('RANKING_PAGE_SIZE', default=20, cast=int)
+RANKING_MAX_PAGE_SIZE = config('RANKING_MAX_PAGE_SIZE', default=100, cast=int)
+RANKING_CACHE_SECONDS = config('RANKING_CACHE_SECONDS', default=3600, cast=int)
+
+# Recommendation result cache (apps/results/cache.py): in-process LRU in front
+# of the Django cache, keyed by answer hash + engine/catalog/quiz fingerprint.
+# A non-zero quantum rounds answers so near-identical profiles share results.
+RECOMMENDATION_CACHE_ENABLED = config('RECOMMENDATION_CACHE_ENABLED', default=True, cast=bool)
+RECOMMENDATION_CACHE_LOCAL_SIZE = config('RECOMMENDATION_CACHE_LOCAL_SIZE', default=1024, cast=int)
+RECOMMENDATION_CACHE_SECONDS = config('RECOMMENDATION_CACHE_SECONDS', default=3600, cast=int)
+RECOMMENDATION_CACHE_QUANTUM = config('RECOMMENDATION_CACHE_QUANTUM', default=0, cast=float)
+
+# Concurrent duplicate recommend requests share one computation
+# (apps/results/coalescing.py); lock and result lifetime in seconds
+RECOMMENDATION_COALESCE_SECONDS = config('RECOMMENDATION_COALESCE_SECONDS', default=15.0, cast=float)
+
+# Responses replayed for a repeated Idempotency-Key header (apps/core/idempotency.py);
+# expired keys are deleted by `python manage.py purge_idempotency_keys`
+IDEMPOTENCY_KEY_TTL_SECONDS = config('IDEMPOTENCY_KEY_TTL_SECONDS', default=86400, cast=int)
+# A key reserved by a request that never finished (crashed worker) is freed after this
+IDEMPOTENCY_IN_PROGRESS_SECONDS = config('IDEMPOTENCY_IN_PROGRESS_SECONDS', default=60, cast=int)
+
+# Async recommendation jobs (POST /api/results/recommend/?async=1), computed by
+# `python manage.py run_recommendation_workers` (apps/results/jobs.py)
+RECOMMENDATION_WORKERS = config('RECOMMENDATION_WORKERS', default=2, cast=int)
+RECOMMENDATION_JOB_POLL_SECONDS = config('RECOMMENDATION_JOB_POLL_SECONDS', default=1.0, cast=float)
+RECOMMENDATION_JOB_TIMEOUT_SECONDS = config('RECOMMENDATION_JOB_TIMEOUT_SECONDS', default=300, cast=int)
+RECOMMENDATION_JOB_MAX_ATTEMPTS = config('RECOMMENDATION_JOB_MAX_ATTEMPTS', default=3, cast=int)
+
+# Debounced background re-embedding of edited careers (apps/careers/signals.py)
+CAREER_AUTO_EMBED = config('CAREER_AUTO_EMBED', default=True, cast=bool)
+CAREER_EMBEDDING_DEBOUNCE_SECONDS = config('CAREER_EMBEDDING_DEBOUNCE_SECONDS', default=2.0, cast=float)
+CAREER_EMBEDDING_MAX_DELAY_SECONDS = config('CAREER_EMBEDDING_MAX_DELAY_SECONDS', default=30.0, cast=float)
+
+# Career search (apps/careers/search.py): 'auto' uses SQLite FTS5 when
+# available and an in-process BM25 index otherwise; or force 'fts5' / 'memory'
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='auto')
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -7,8 +7,8 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 from apps.quiz.views import QuizQuestionViewSet, QuizSubmissionViewSet
-from apps.careers.views import CareerViewSet, CourseViewSet, UniversityViewSet
-from apps.results.views import CareerRecommendationViewSet
+from apps.careers.views import CareerViewSet, CourseViewSet, SearchViewSet, UniversityViewSet
+from apps.results.views import CareerRecommendationViewSet, HealthCheckViewSet
 
 # Create router for viewsets
 router = DefaultRouter()
@@ -28,10 +28,26 @@ urlpatterns = [
     # API routes
     path('api/', include(router.urls)),
     
+    # Health checks for load balancers
+    path('api/health/live/', 
+         HealthCheckViewSet.as_view({'get': 'live'}),
+         name='health-live'),
+    path('api/health/ready/', 
+         HealthCheckViewSet.as_view({'get': 'ready'}),
+         name='health-ready'),
+    
+    # Full-text career search
+    path('api/search/', 
+         SearchViewSet.as_view({'get': 'search'}),
+         name='search'),
+    
     # Quiz submission
     path('api/quiz/submit/', 
          QuizSubmissionViewSet.as_view({'post': 'submit_quiz'}),
          name='submit-quiz'),
+    path('api/quiz/submit-and-recommend/', 
+         QuizSubmissionViewSet.as_view({'post': 'submit_and_recommend'}),
+         name='submit-and-recommend'),
     path('api/quiz/submission/<str:session_id>/', 
          QuizSubmissionViewSet.as_view({'get': 'get_submission'}),
          name='get-submission'),
@@ -40,6 +56,12 @@ urlpatterns = [
     path('api/results/recommend/', 
          CareerRecommendationViewSet.as_view({'post': 'generate_recommendations'}),
          name='generate-recommendations'),
+    path('api/results/recommend-batch/', 
+         CareerRecommendationViewSet.as_view({'post': 'recommend_batch'}),
+         name='recommend-batch'),
+    path('api/results/top-per-cluster/', 
+         CareerRecommendationViewSet.as_view({'post': 'top_per_cluster'}),
+         name='top-per-cluster'),
     # save/view endpoints must come before the session_id catch‑all or they will
     # be misinterpreted as a session identifier (see 405 errors in frontend).
     path('api/results/save-career/', 
@@ -48,6 +70,12 @@ urlpatterns = [
     path('api/results/view-career/', 
          CareerRecommendationViewSet.as_view({'post': 'view_career'}),
          name='view-career'),
+    path('api/results/<str:session_id>/explain/<str:career_id>/', 
+         CareerRecommendationViewSet.as_view({'get': 'explain'}),
+         name='explain-career'),
+    path('api/results/<str:session_id>/ranking/', 
+         CareerRecommendationViewSet.as_view({'get': 'ranking'}),
+         name='recommendation-ranking'),
     path('api/results/<str:session_id>/', 
          CareerRecommendationViewSet.as_view({'get': 'get_recommendations'}),
          name='get-recommendations'),
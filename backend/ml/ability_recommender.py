@@ -5,11 +5,28 @@ Matches user abilities/interests against career ability requirements
 This is the primary recommendation system that should be used instead of
 the old classification-based approach.
 """
+import re
 import numpy as np
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
+from django.conf import settings
 from django.db.models import QuerySet
 from apps.careers.models import Career
+from apps.careers.filters import CatalogFilters
+from ml.catalog_index import get_catalog_index
+from ml.diversity import mmr_rerank
+from ml.retrieval import (
+    COVERAGE_RATIO,
+    STRENGTH_THRESHOLD,
+    AbilityBoundStats,
+    ClusterGroups,
+    ClusterRetriever,
+    ability_match_bounds,
+    ability_match_matrix,
+    ability_match_scores,
+    exact_top_k,
+    grouped_top_k,
+)
 
 
 # Mapping from quiz dimensions to ability vector dimensions
@@ -132,6 +149,23 @@ ABILITY_NAMES = [
     "Business Acumen",
 ]
 
+# query-parameter style names, e.g. "Attention to Detail" -> "attention_to_detail"
+ABILITY_KEYS = [re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") for name in ABILITY_NAMES]
+
+
+def career_explanation(career: Career, abilities) -> str:
+    """Explanation text that depends only on the career (no user input)."""
+    primary_abilities = [
+        ABILITY_NAMES[i] for i, val in enumerate(list(abilities)[:10])  # First 10 primary abilities
+        if val > 7
+    ]
+    if primary_abilities:
+        explanation = f"This career requires strong skills in {', '.join(primary_abilities[:2])}. "
+    else:
+        explanation = f"{career.name} is a {career.cluster.lower()} role. "
+    explanation += f"{career.description if career.description else 'Dynamic role with growth potential.'}"
+    return explanation
+
 
 class AbilityRecommendationService:
     """
@@ -139,6 +173,10 @@ class AbilityRecommendationService:
     Matches user abilities against career ability requirements.
     """
 
+    # part of the result-cache fingerprint (apps/results/cache.py); bump
+    # when the scoring rules change
+    model_version = "ability:1"
+
     def __init__(self):
         """Initialize the service."""
         self.ability_names = ABILITY_NAMES
@@ -174,12 +212,12 @@ class AbilityRecommendationService:
         
         # Try to fetch full question objects for category information
         try:
-            from apps.quiz.models import QuizQuestion
+            from apps.quiz.schema import questions_by_id
             
             # Build a map of question ID to category
-            question_categories = {}
-            for q in QuizQuestion.objects.all():
-                question_categories[str(q.id)] = q.category
+            question_categories = {
+                question_id: q.category for question_id, q in questions_by_id().items()
+            }
         except Exception:
             # If we can't fetch questions, use fallback method
             question_categories = {}
@@ -275,27 +313,73 @@ class AbilityRecommendationService:
 
     def get_career_explanations(self, career: Career) -> str:
         """Generate explanation connecting user abilities to career."""
-        abilities = career.ability_vector
-        
-        primary_abilities = []
-        for i, val in enumerate(abilities[:10]):  # First 10 primary abilities
-            if val > 7:
-                primary_abilities.append(self.ability_names[i])
+        return career_explanation(career, career.ability_vector)
+
+    def career_explanations(self, index=None) -> List[str]:
+        """Career-only explanation of every catalog career, built once per index version."""
+        index = index or get_catalog_index()
+        return index.derived(
+            "ability_explanations",
+            lambda: [career_explanation(c, index.abilities[i]) for i, c in enumerate(index.careers)],
+        )
+
+    def rank(
+        self,
+        user_abilities: np.ndarray,
+        top_n: int = 5,
+        retrieval: Optional[str] = None,
+        mask: Optional[np.ndarray] = None,
+        index=None,
+    ) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """
+        Find the top careers for an ability profile (by relevance only).
         
-        if primary_abilities:
-            explanation = f"This career requires strong skills in {', '.join(primary_abilities[:2])}. "
-        else:
-            explanation = f"{career.name} is a {career.cluster.lower()} role. "
+        Args:
+            user_abilities: 15-dimensional user ability vector
+            top_n: Number of careers to return
+            retrieval: 'exact' scores every career, 'clustered' prunes whole
+                clusters by an upper bound first (same results, fewer careers
+                scored); defaults to settings.RECOMMENDER_RETRIEVAL
+            mask: Optional boolean array over catalog positions; only careers
+                where it is True are considered (e.g. a skills filter)
+            index: Catalog index to rank on (default: the current one)
+            
+        Returns:
+            (catalog index positions, boosted match scores, retrieval stats)
+        """
+        if index is None:
+            index = get_catalog_index()
+        mode = retrieval or getattr(settings, "RECOMMENDER_RETRIEVAL", "exact")
+        valid = index.has_abilities if mask is None else index.has_abilities & mask
+        pool = np.flatnonzero(valid)
         
-        explanation += f"{career.description if career.description else 'Dynamic role with growth potential.'}"
+        if mode == "clustered":
+            groups = self._cluster_groups(index)
+            bound_stats = index.derived(
+                "ability_bounds", lambda: AbilityBoundStats.build(index.abilities, groups)
+            )
+            return ClusterRetriever(groups).search(
+                ability_match_bounds(user_abilities, bound_stats),
+                lambda positions: ability_match_scores(user_abilities, index.abilities[positions])[0],
+                top_n,
+                mask=mask,
+            )
+        if mode != "exact":
+            raise ValueError(f"Unknown retrieval mode: {mode!r}")
         
-        return explanation
+        scores = ability_match_scores(user_abilities, index.abilities[pool])[0]
+        stats = {"groups_total": 0, "groups_visited": 0, "candidates_scored": len(pool)}
+        positions, top_scores = exact_top_k(scores, pool, top_n)
+        return positions, top_scores, stats
 
     def recommend(
         self,
         quiz_answers: Dict,
         top_n: int = 5,
         diversity: bool = True,
+        retrieval: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+        filters: Optional[CatalogFilters] = None,
     ) -> List[AbilityRecommendation]:
         """
         Generate career recommendations based on user abilities.
@@ -303,72 +387,245 @@ class AbilityRecommendationService:
         Args:
             quiz_answers: Dict of quiz answers (question -> 0-10 score)
             top_n: Number of recommendations to return
-            diversity: If True, limit 1 career per cluster in top N
+            diversity: If True, rerank the best candidates with MMR so similar
+                careers (by ability profile) don't crowd the top N
+            retrieval: 'exact' or 'clustered' (see ``rank``)
+            mmr_lambda: Relevance weight of the MMR reranker (1.0 = pure
+                relevance); defaults to settings.RECOMMENDER_MMR_LAMBDA
+            filters: Only consider careers passing these filters (skills,
+                salary, growth, clusters, education; see apps.careers.filters)
             
         Returns:
-            List of AbilityRecommendation objects sorted by match score
+            List of AbilityRecommendation objects, best first
         """
         # Extract user abilities from quiz answers
         user_abilities = self.extract_user_abilities(quiz_answers)
         
-        # Get all careers with ability vectors
-        careers = Career.objects.filter(ability_vector__isnull=False).exclude(
-            ability_vector=[]
+        # Careers come from the shared catalog index; only the selected ones
+        # get the detailed (per-ability) breakdown
+        index = get_catalog_index()
+        mask = filters.mask(index) if filters else None
+        if diversity:
+            candidates = max(top_n, getattr(settings, "RECOMMENDER_MMR_CANDIDATES", 50))
+            positions, scores, _ = self.rank(user_abilities, candidates, retrieval, mask, index=index)
+            picks = mmr_rerank(
+                scores,
+                index.similarity("ability", positions),
+                top_n,
+                mmr_lambda if mmr_lambda is not None else getattr(settings, "RECOMMENDER_MMR_LAMBDA", 0.7),
+            )
+            positions, scores = positions[picks], scores[picks]
+        else:
+            positions, scores, _ = self.rank(user_abilities, top_n, retrieval, mask, index=index)
+        
+        return self._build_recommendations(user_abilities, index, positions, scores)
+
+    def recommend_many(
+        self,
+        answers_list: List[Dict],
+        top_n: int = 5,
+        diversity: bool = True,
+        mmr_lambda: Optional[float] = None,
+        filters: Optional[CatalogFilters] = None,
+    ) -> List[List[AbilityRecommendation]]:
+        """
+        ``recommend`` for many answer sets, scoring them all in one pass.
+        
+        The users' ability vectors form an (M, 15) matrix that is matched
+        against the catalog at once (``ability_match_matrix``); only the
+        per-user top-n selection and MMR rerank run per row.  Results equal
+        ``recommend(answers, ...)`` with exact retrieval for each entry.
+        """
+        if not answers_list:
+            return []
+        users = np.array([self.extract_user_abilities(answers) for answers in answers_list])
+        index = get_catalog_index()
+        mask = filters.mask(index) if filters else None
+        valid = index.has_abilities if mask is None else index.has_abilities & mask
+        pool = np.flatnonzero(valid)
+        scores = ability_match_matrix(users, index.abilities[pool])
+        
+        candidates = max(top_n, getattr(settings, "RECOMMENDER_MMR_CANDIDATES", 50)) if diversity else top_n
+        if mmr_lambda is None:
+            mmr_lambda = getattr(settings, "RECOMMENDER_MMR_LAMBDA", 0.7)
+        selected = []
+        for row in scores:
+            positions, top_scores = exact_top_k(row, pool, candidates)
+            if diversity:
+                picks = mmr_rerank(top_scores, index.similarity("ability", positions), top_n, mmr_lambda)
+                positions, top_scores = positions[picks], top_scores[picks]
+            selected.append((positions, top_scores))
+        
+        # every user gets the same number of careers: one detail pass for all
+        coverage, top_abs, missing = self._ability_details(
+            users, index.abilities[np.array([positions for positions, _ in selected], dtype=np.intp)]
         )
+        return [
+            self._build_recommendations(
+                user_abilities, index, positions, top_scores, (coverage[i], top_abs[i], missing[i])
+            )
+            for i, (user_abilities, (positions, top_scores)) in enumerate(zip(users, selected))
+        ]
+
+    def top_per_cluster(
+        self,
+        quiz_answers: Dict,
+        k: int = 1,
+        filters: Optional[CatalogFilters] = None,
+    ) -> List[Tuple[str, List[AbilityRecommendation]]]:
+        """
+        Best ``k`` careers of every cluster, scored in a single pass.
         
-        recommendations = []
+        The ability matrix is kept reordered by cluster, so every cluster is a
+        contiguous slice; one vectorized scoring call plus a segmented top-k
+        (``grouped_top_k``) replaces one ``recommend`` call per cluster.
         
-        for career in careers:
-            try:
-                career_abilities = np.array(career.ability_vector)
-                
-                # Calculate match
-                match_score, coverage, top_abs, missing = self.calculate_ability_match(
-                    user_abilities, career_abilities
-                )
-                
-                # Boost score if this is a strength match
-                is_strength = match_score > 0.75
-                if is_strength:
-                    match_score = min(1.0, match_score * 1.1)
-                
-                # Create recommendation
-                rec = AbilityRecommendation(
-                    career=career,
-                    match_score=match_score,
-                    ability_match_score=match_score,
-                    coverage_score=coverage,
-                    is_strength_match=is_strength,
-                    top_matching_abilities=top_abs,
-                    missing_abilities=missing,
-                    salary_range=career.average_salary_range or "Unknown",
-                    job_growth=career.job_growth or "N/A",
-                    explanation=self.get_career_explanations(career),
-                )
-                
-                recommendations.append(rec)
-                
-            except (ValueError, TypeError):
-                # Skip careers with invalid ability vectors
-                continue
+        Returns:
+            ``[(cluster name, recommendations best first), ...]`` with the
+            clusters ordered by their best match
+        """
+        user_abilities = self.extract_user_abilities(quiz_answers)
+        index = get_catalog_index()
+        groups = self._cluster_groups(index)
+        reordered = index.derived("ability_by_cluster", lambda: index.abilities[groups.order])
         
-        # Sort by match score
-        recommendations.sort(key=lambda x: x.match_score, reverse=True)
+        scores = ability_match_scores(user_abilities, reordered)[0]
+        mask = filters.mask(index) if filters else None
+        if mask is not None:
+            scores[~mask[groups.order]] = -np.inf
+        group_of, positions, top_scores = grouped_top_k(scores, groups, k)
         
-        # Apply diversity constraint if requested
-        if diversity:
-            diverse_recs = []
-            clusters_used = set()
-            
-            for rec in recommendations:
-                if rec.career.cluster not in clusters_used:
-                    diverse_recs.append(rec)
-                    clusters_used.add(rec.career.cluster)
-                    if len(diverse_recs) >= top_n:
-                        break
-            
-            recommendations = diverse_recs
-        else:
-            recommendations = recommendations[:top_n]
+        recommendations = self._build_recommendations(user_abilities, index, positions, top_scores)
+        result: List[Tuple[str, List[AbilityRecommendation]]] = []
+        for group, rec in zip(group_of, recommendations):
+            name = index.cluster_names[groups.codes[group]]
+            if not result or result[-1][0] != name:
+                result.append((name, []))
+            result[-1][1].append(rec)
+        return result
+
+    def full_ranking(
+        self, quiz_answers: Dict, filters: Optional[CatalogFilters] = None, index=None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Every matching career by relevance: (int32 catalog positions, float32 scores).
+        
+        Only scores are computed; ``describe`` builds the detailed objects for
+        the slice that is actually shown (see apps/results/ranking.py).
+        """
+        if index is None:
+            index = get_catalog_index()
+        mask = filters.mask(index) if filters else None
+        positions, scores, _ = self.rank(
+            self.extract_user_abilities(quiz_answers), index.size, "exact", mask, index=index
+        )
+        return positions.astype(np.int32), scores.astype(np.float32)
+
+    def describe(self, quiz_answers: Dict, positions, scores, index=None) -> List[AbilityRecommendation]:
+        """Detailed recommendations for positions ranked on ``index``."""
+        user_abilities = self.extract_user_abilities(quiz_answers)
+        return self._build_recommendations(user_abilities, index or get_catalog_index(), positions, scores)
+
+    def explain(self, quiz_answers: Dict, career_id) -> Optional[Dict]:
+        """
+        Personal explanation of one career for a user (None if not in the catalog).
+        
+        Rendered on demand, so recommendation lists don't pay for text they
+        don't show.
+        """
+        index = get_catalog_index()
+        pos = index.position.get(str(career_id))
+        if pos is None:
+            return None
+        user_abilities = self.extract_user_abilities(quiz_answers)
+        row = index.abilities[pos]
+        score = float(ability_match_scores(user_abilities, row[None, :])[0][0]) if index.has_abilities[pos] else 0.0
+        rec = self._build_recommendations(user_abilities, index, [pos], [score])[0]
+        
+        parts = [f"{rec.career.name} matches your abilities at {score * 100:.0f}%."]
+        if rec.top_matching_abilities:
+            parts.append(f"You already meet its demands for {', '.join(rec.top_matching_abilities)}.")
+        if rec.missing_abilities:
+            parts.append(f"Consider developing: {', '.join(rec.missing_abilities)}.")
+        needed = np.flatnonzero(row > 0)
+        return {
+            **rec.to_dict(),
+            "career_id": str(rec.career.id),
+            "career_explanation": rec.explanation,
+            "explanation": " ".join(parts),
+            "abilities": [
+                {
+                    "name": self.ability_names[d],
+                    "required": float(row[d]),
+                    "user": round(float(user_abilities[d]), 1),
+                }
+                for d in needed
+            ],
+        }
+
+    @staticmethod
+    def _cluster_groups(index) -> ClusterGroups:
+        """Careers with ability vectors grouped by cluster (cached on the index)."""
+        return index.derived(
+            "ability_groups",
+            lambda: ClusterGroups.from_codes(index.cluster_codes, np.flatnonzero(index.has_abilities)),
+        )
+
+    def _build_recommendations(
+        self, user_abilities, index, positions, scores, details=None
+    ) -> List[AbilityRecommendation]:
+        """Detailed recommendation objects for the selected catalog positions.
+        
+        Career-only explanation text comes precomputed from the index; the
+        user-specific parts are computed for the selected rows at once (or
+        passed in as ``details``, see ``recommend_many``).
+        """
+        explanations = self.career_explanations(index)
+        coverage, top_abs, missing = details or self._ability_details(
+            user_abilities, index.abilities[positions]
+        )
+        recommendations = []
+        for i, (pos, score) in enumerate(zip(positions, scores)):
+            career = index.careers[pos]
+            recommendations.append(AbilityRecommendation(
+                career=career,
+                match_score=float(score),
+                ability_match_score=float(score),
+                coverage_score=float(coverage[i]),
+                is_strength_match=bool(score > STRENGTH_THRESHOLD),
+                top_matching_abilities=top_abs[i],
+                missing_abilities=missing[i],
+                salary_range=career.average_salary_range or "Unknown",
+                job_growth=career.job_growth or "N/A",
+                explanation=explanations[pos],
+            ))
         
         return recommendations
+
+    def _ability_details(
+        self, user_abilities: np.ndarray, career_rows: np.ndarray
+    ) -> Tuple[np.ndarray, List, List]:
+        """Vectorized coverage / top / missing parts of ``calculate_ability_match``.
+        
+        ``user_abilities`` (D,) with ``career_rows`` (K, D), or many users
+        (M, D) with their rows (M, K, D); the lists are nested alike.
+        """
+        user = np.asarray(user_abilities, dtype=np.float64)[..., None, :]
+        rows = np.asarray(career_rows, dtype=np.float64)
+        need = rows > 0
+        meets = need & (np.clip(user, 0, None) >= rows * COVERAGE_RATIO)
+        coverage = meets.sum(axis=-1) / np.maximum(1, need.sum(axis=-1))
+        strong = (rows > 5) & (user >= rows)
+        weak = (rows > 7) & (user < rows * 0.7)
+        return coverage, self._first_ability_names(strong), self._first_ability_names(weak)
+
+    def _first_ability_names(self, flags: np.ndarray, limit: int = 3) -> List:
+        """Names of the first ``limit`` flagged dimensions of every row."""
+        first = flags & (np.cumsum(flags, axis=-1) <= limit)
+        rows = first.reshape(-1, first.shape[-1])
+        names = [[] for _ in range(len(rows))]
+        for row, dim in zip(*np.nonzero(rows)):
+            names[row].append(self.ability_names[dim])
+        if first.ndim == 3:
+            k = first.shape[1]
+            return [names[i * k:(i + 1) * k] for i in range(first.shape[0])]
+        return names
@@ -10,8 +10,8 @@ requirements listed by the user:
   allow fast nearest‑neighbour queries.
 * Compute a hybrid score combining embedding similarity and ability score
   matching.
-* Enforce a diversity constraint so the final top‑N list does not contain more
-  than one item from any single cluster.
+* Rerank the top candidates for diversity (MMR over career–career
+  similarity) so the final top‑N list isn't a set of near-duplicates.
 
 SQL/ORM snippets demonstrating usage are included below.
 """
@@ -19,7 +19,7 @@ SQL/ORM snippets demonstrating usage are included below.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 try:
     import numpy as np
@@ -33,10 +33,25 @@ try:
 except ImportError:
     SentenceTransformer = None
 
+from django.conf import settings
 from django.db import models
 from django.db.models import F
 
 from apps.careers.models import Career
+from apps.careers.filters import CatalogFilters
+from ml.catalog_index import get_catalog_index
+from ml.diversity import mmr_rerank
+from ml.embedding_batcher import EmbeddingBatcher
+from ml.retrieval import (
+    ClusterGroups,
+    ClusterRetriever,
+    CosineBoundStats,
+    cosine_bounds,
+    exact_top_k,
+    grouped_top_k,
+    normalize,
+    normalize_rows,
+)
 
 # backward compat: if ml.recommendation_engine or inference are available, use them
 try:
@@ -70,11 +85,23 @@ class HybridRecommendationService:
     vs. the numeric ability match.  A value of 0.7 means 70% embedding and 30%
     ability.  You can tune this after collecting user feedback.
 
-    ``diversity`` toggles the cluster‑based diversity constraint.  When True the
-    method will return at most one career per distinct ``cluster`` value.
+    ``diversity`` toggles MMR reranking: the best candidates are reordered so
+    that careers very similar to ones already picked are pushed down
+    (see ``ml/diversity.py``).
+
+    User texts are encoded through an ``EmbeddingBatcher`` so concurrent
+    requests share one ``encode`` call.  ``batch_size`` and ``batch_wait_ms``
+    default to the ``EMBEDDING_BATCH_SIZE`` / ``EMBEDDING_BATCH_WAIT_MS``
+    settings.
     """
 
-    def __init__(self, embedding_model_name: str = "all-MiniLM-L6-v2", alpha: float = 0.7):
+    def __init__(
+        self,
+        embedding_model_name: str = "all-MiniLM-L6-v2",
+        alpha: float = 0.7,
+        batch_size: Optional[int] = None,
+        batch_wait_ms: Optional[float] = None,
+    ):
         if SentenceTransformer is None:
             raise ImportError(
                 "SentenceTransformer not found. Please install: "
@@ -83,14 +110,28 @@ class HybridRecommendationService:
             )
         self.alpha = alpha
         self._model = SentenceTransformer(embedding_model_name)
+        # part of the result-cache fingerprint (apps/results/cache.py)
+        self.model_version = f"hybrid:{embedding_model_name}:alpha={alpha}"
         # calling ``encode`` once, later we cache career vectors in the DB
+        self._batcher = EmbeddingBatcher(
+            self._model,
+            max_batch_size=batch_size or getattr(settings, "EMBEDDING_BATCH_SIZE", 32),
+            max_wait_ms=(
+                batch_wait_ms if batch_wait_ms is not None
+                else getattr(settings, "EMBEDDING_BATCH_WAIT_MS", 5.0)
+            ),
+        )
 
     # ------------------------------------------------------------------
     # embedding helpers
     # ------------------------------------------------------------------
     def text_to_embedding(self, text: str) -> np.ndarray:
-        """Return a *normalized* vector for arbitrary text."""
-        vec = self._model.encode(text, convert_to_numpy=True)
+        """Return a *normalized* vector for arbitrary text.
+
+        The call goes through the micro-batcher, so it may wait a few
+        milliseconds for other requests to join the same batch.
+        """
+        vec = self._batcher.encode(text)
         # SentenceTransformer models can optionally return normalized vectors;
         # ensure normalization for cosine computations regardless.
         return vec / np.linalg.norm(vec, axis=-1, keepdims=True)
@@ -114,6 +155,10 @@ class HybridRecommendationService:
         text = " ".join(f"{k}:{v:.1f}" for k, v in features.items())
         return self.text_to_embedding(text)
 
+    def embedding_stats(self) -> Dict:
+        """Queue-depth and batch-size statistics of the embedding batcher."""
+        return self._batcher.stats()
+
     # ------------------------------------------------------------------
     # similarity / scoring
     # ------------------------------------------------------------------
@@ -131,21 +176,87 @@ class HybridRecommendationService:
     # ------------------------------------------------------------------
     # public API
     # ------------------------------------------------------------------
+    def rank(
+        self,
+        user_emb: np.ndarray,
+        user_feat: np.ndarray,
+        top_n: int = 5,
+        retrieval: Optional[str] = None,
+        mask: Optional[np.ndarray] = None,
+        index=None,
+    ):
+        """Return ``(positions, scores, stats)`` of the most relevant careers.
+
+        ``retrieval='exact'`` scores every embedded career in one matrix
+        product.  ``'clustered'`` first bounds the hybrid score of each cluster
+        (cluster centre + angular radius, for both the embedding and the
+        ability part) and only scores clusters that can still reach the top-n,
+        which gives the same result on large catalogs while scoring far fewer
+        careers.  Defaults to ``settings.RECOMMENDER_RETRIEVAL``.
+
+        ``mask`` (boolean over catalog positions) restricts the candidates,
+        e.g. to careers requiring some skills.  ``index`` defaults to the
+        current catalog index.
+        """
+        if index is None:
+            index = get_catalog_index()
+        mode = retrieval or getattr(settings, "RECOMMENDER_RETRIEVAL", "exact")
+        valid = index.has_embeddings if mask is None else index.has_embeddings & mask
+        pool = np.flatnonzero(valid)
+        if not len(pool):
+            return pool, np.zeros(0), {"groups_total": 0, "groups_visited": 0, "candidates_scored": 0}
+
+        unit_abilities = index.unit_vectors("ability")
+        unit_feat = normalize(user_feat)
+
+        def score(positions):
+            return self._score_rows(index.embeddings[positions], unit_abilities[positions], user_emb, unit_feat)
+
+        if mode == "clustered":
+            groups = self._cluster_groups(index)
+            emb_stats = index.derived(
+                "embedding_bounds", lambda: CosineBoundStats.build(index.embeddings, groups)
+            )
+            ability_stats = index.derived(
+                "ability_cosine_bounds",
+                lambda: CosineBoundStats.build(unit_abilities, groups, valid=index.has_abilities),
+            )
+            # ability vectors are non-negative, so their cosine is never below 0
+            bounds = self._hybrid_score(
+                cosine_bounds(user_emb, emb_stats),
+                np.maximum(cosine_bounds(unit_feat, ability_stats), 0.0),
+            )
+            return ClusterRetriever(groups).search(bounds, score, top_n, mask=mask)
+        if mode != "exact":
+            raise ValueError(f"Unknown retrieval mode: {mode!r}")
+
+        scores = score(pool).astype(np.float64)
+        stats = {"groups_total": 0, "groups_visited": 0, "candidates_scored": len(pool)}
+        positions, top_scores = exact_top_k(scores, pool, top_n)
+        return positions, top_scores, stats
+
     def recommend(
         self,
         quiz_answers: Dict[int, int],
         top_n: int = 5,
         diversity: bool = True,
+        retrieval: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+        filters: Optional[CatalogFilters] = None,
     ) -> List[HybridRecommendation]:
         """Return a ranked list of ``HybridRecommendation`` objects.
 
         The pipeline is:
 
         1. compute user embedding and ability vector
-        2. fetch all active careers (could be restricted by a prefilter)
-        3. score each career via hybrid formula
-        4. optionally enforce diversity by cluster
-        5. return the top-n items
+        2. rank the embedded careers of the catalog index (see ``rank``)
+        3. optionally rerank the best candidates with MMR over career
+           embedding similarity (``mmr_lambda``, default
+           ``settings.RECOMMENDER_MMR_LAMBDA``)
+        4. return the top-n items
+
+        ``filters`` (``apps.careers.filters.CatalogFilters``) restricts the
+        candidates, e.g. to careers requiring some skills or paying enough.
         """
         user_emb = self.user_embedding(quiz_answers)
         user_feat = np.array(
@@ -153,40 +264,184 @@ class HybridRecommendationService:
             dtype=np.float32,
         )
 
-        careers = Career.objects.filter(is_active=True)
-        scored: List[HybridRecommendation] = []
+        # embeddings come pre-normalized from the catalog index; careers that
+        # haven't been embedded yet are skipped (a management command should
+        # be run periodically to fill them).
+        index = get_catalog_index()
+        mask = filters.mask(index) if filters else None
+        if diversity:
+            candidates = max(top_n, getattr(settings, "RECOMMENDER_MMR_CANDIDATES", 50))
+            positions, scores, _ = self.rank(user_emb, user_feat, candidates, retrieval, mask, index=index)
+            picks = mmr_rerank(
+                scores,
+                index.similarity("embedding", positions),
+                top_n,
+                mmr_lambda if mmr_lambda is not None else getattr(settings, "RECOMMENDER_MMR_LAMBDA", 0.7),
+            )
+            positions, scores = positions[picks], scores[picks]
+        else:
+            positions, scores, _ = self.rank(user_emb, user_feat, top_n, retrieval, mask, index=index)
+
+        return self._build_recommendations(user_emb, user_feat, index, positions, scores)
 
-        # fetch all embeddings once (avoid N+1)
-        for career in careers:
-            try:
-                emb = self.career_embedding(career)
-            except ValueError:
-                # skip careers that haven't been embedded yet; a management
-                # command should be run periodically to fill them.
-                continue
-            emb_sim = float(cosine_similarity([user_emb], [emb])[0][0])
+    def recommend_many(
+        self,
+        answers_list: List[Dict[int, int]],
+        top_n: int = 5,
+        diversity: bool = True,
+        mmr_lambda: Optional[float] = None,
+        filters: Optional[CatalogFilters] = None,
+    ) -> List[List[HybridRecommendation]]:
+        """``recommend`` for many answer sets with two matrix-matrix products.
+
+        All user texts are submitted to the embedding batcher together, the
+        (M, E) user embeddings and (M, F) ability features are scored against
+        the catalog at once, and only top-n selection and MMR run per user.
+        """
+        if not answers_list:
+            return []
+        features = [UserFeatureExtractor.extract_features(answers) for answers in answers_list]
+        futures = [
+            self._batcher.submit(" ".join(f"{k}:{v:.1f}" for k, v in feats.items()))
+            for feats in features
+        ]
+        user_embs = normalize_rows(np.stack([future.result() for future in futures]))
+        user_feats = np.array([list(feats.values()) for feats in features], dtype=np.float32)
+
+        index = get_catalog_index()
+        mask = filters.mask(index) if filters else None
+        valid = index.has_embeddings if mask is None else index.has_embeddings & mask
+        pool = np.flatnonzero(valid)
+        scores = self._hybrid_score(
+            user_embs @ index.embeddings[pool].T,
+            normalize_rows(user_feats) @ index.unit_vectors("ability")[pool].T,
+        ).astype(np.float64)
+
+        candidates = max(top_n, getattr(settings, "RECOMMENDER_MMR_CANDIDATES", 50)) if diversity else top_n
+        if mmr_lambda is None:
+            mmr_lambda = getattr(settings, "RECOMMENDER_MMR_LAMBDA", 0.7)
+        results = []
+        for user_emb, user_feat, row in zip(user_embs, user_feats, scores):
+            positions, top_scores = exact_top_k(row, pool, candidates)
+            if diversity:
+                picks = mmr_rerank(top_scores, index.similarity("embedding", positions), top_n, mmr_lambda)
+                positions, top_scores = positions[picks], top_scores[picks]
+            results.append(self._build_recommendations(user_emb, user_feat, index, positions, top_scores))
+        return results
+
+    def top_per_cluster(
+        self,
+        quiz_answers: Dict[int, int],
+        k: int = 1,
+        filters: Optional[CatalogFilters] = None,
+    ) -> List[Tuple[str, List[HybridRecommendation]]]:
+        """Best ``k`` careers of every cluster in a single scoring pass.
+
+        The embedding and ability matrices are cached reordered by cluster, so
+        the whole catalog is scored with two matrix-vector products and the
+        per-cluster top-k is a segmented reduction (``grouped_top_k``): about
+        the cost of one ``recommend`` call.  Clusters are ordered by their
+        best match.
+        """
+        user_emb = self.user_embedding(quiz_answers)
+        user_feat = np.array(
+            list(UserFeatureExtractor.extract_features(quiz_answers).values()),
+            dtype=np.float32,
+        )
+        index = get_catalog_index()
+        groups = self._cluster_groups(index)
+        if not len(groups):
+            return []
+        embeddings = index.derived("embedding_by_cluster", lambda: index.embeddings[groups.order])
+        abilities = index.derived(
+            "unit_ability_by_cluster", lambda: index.unit_vectors("ability")[groups.order]
+        )
 
-            ability_sim = self._ability_similarity(user_feat, np.array(career.ability_vector or [], dtype=np.float32))
-            score = self._hybrid_score(emb_sim, ability_sim)
-            scored.append(HybridRecommendation(career, score, emb_sim, ability_sim))
+        scores = self._score_rows(embeddings, abilities, user_emb, normalize(user_feat)).astype(np.float64)
+        mask = filters.mask(index) if filters else None
+        if mask is not None:
+            scores[~mask[groups.order]] = -np.inf
+        group_of, positions, top_scores = grouped_top_k(scores, groups, k)
+
+        recommendations = self._build_recommendations(user_emb, user_feat, index, positions, top_scores)
+        result: List[Tuple[str, List[HybridRecommendation]]] = []
+        for group, rec in zip(group_of, recommendations):
+            name = index.cluster_names[groups.codes[group]]
+            if not result or result[-1][0] != name:
+                result.append((name, []))
+            result[-1][1].append(rec)
+        return result
+
+    def full_ranking(
+        self, quiz_answers: Dict[int, int], filters: Optional[CatalogFilters] = None, index=None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Every matching embedded career by relevance: (int32 positions, float32 scores)."""
+        user_emb = self.user_embedding(quiz_answers)
+        user_feat = np.array(
+            list(UserFeatureExtractor.extract_features(quiz_answers).values()),
+            dtype=np.float32,
+        )
+        if index is None:
+            index = get_catalog_index()
+        mask = filters.mask(index) if filters else None
+        positions, scores, _ = self.rank(user_emb, user_feat, index.size, "exact", mask, index=index)
+        return positions.astype(np.int32), scores.astype(np.float32)
+
+    def describe(self, quiz_answers: Dict[int, int], positions, scores, index=None) -> List[HybridRecommendation]:
+        """``HybridRecommendation`` objects for positions ranked on ``index``."""
+        user_emb = self.user_embedding(quiz_answers)
+        user_feat = np.array(
+            list(UserFeatureExtractor.extract_features(quiz_answers).values()),
+            dtype=np.float32,
+        )
+        return self._build_recommendations(user_emb, user_feat, index or get_catalog_index(), positions, scores)
+
+    def explain(self, quiz_answers: Dict[int, int], career_id) -> Optional[Dict]:
+        """Score breakdown of one career for a user (None if it isn't embedded)."""
+        index = get_catalog_index()
+        pos = index.position.get(str(career_id))
+        if pos is None or not index.has_embeddings[pos]:
+            return None
+        user_emb = self.user_embedding(quiz_answers)
+        user_feat = np.array(
+            list(UserFeatureExtractor.extract_features(quiz_answers).values()),
+            dtype=np.float32,
+        )
+        score = float(self._score_rows(
+            index.embeddings[[pos]], index.unit_vectors("ability")[[pos]], user_emb, normalize(user_feat)
+        )[0])
+        rec = self._build_recommendations(user_emb, user_feat, index, [pos], [score])[0]
+        return {
+            **rec.to_dict(),
+            "explanation": (
+                f"{rec.career.name}: {rec.emb_similarity * 100:.0f}% profile similarity, "
+                f"{rec.ability_similarity * 100:.0f}% ability similarity."
+            ),
+        }
 
-        # rank
-        scored.sort(key=lambda rec: rec.score, reverse=True)
+    @staticmethod
+    def _cluster_groups(index) -> ClusterGroups:
+        """Embedded careers grouped by cluster (cached on the index)."""
+        return index.derived(
+            "embedding_groups",
+            lambda: ClusterGroups.from_codes(index.cluster_codes, np.flatnonzero(index.has_embeddings)),
+        )
 
-        if diversity:
-            selected: List[HybridRecommendation] = []
-            seen_clusters: set = set()
-            for rec in scored:
-                clu = rec.career.cluster
-                if clu and clu in seen_clusters:
-                    continue
-                selected.append(rec)
-                seen_clusters.add(clu)
-                if len(selected) >= top_n:
-                    break
-            return selected
-
-        return scored[:top_n]
+    def _score_rows(self, embeddings, unit_abilities, user_emb, unit_feat) -> np.ndarray:
+        """Hybrid scores of career rows (normalized embeddings / ability vectors)."""
+        return self._hybrid_score(embeddings @ user_emb, unit_abilities @ unit_feat)
+
+    def _build_recommendations(self, user_emb, user_feat, index, positions, scores) -> List[HybridRecommendation]:
+        selected: List[HybridRecommendation] = []
+        for pos, score in zip(positions, scores):
+            career = index.careers[pos]
+            emb_sim = float(np.dot(user_emb, index.embeddings[pos]))
+            ability_sim = (
+                self._ability_similarity(user_feat, index.abilities[pos])
+                if index.has_abilities[pos] else 0.0
+            )
+            selected.append(HybridRecommendation(career, float(score), emb_sim, ability_sim))
+        return selected
 
     # ------------------------------------------------------------------
     # database/ORM helpers
@@ -0,0 +1,155 @@
+"""
+RETRIEVAL BENCHMARK - exact vs cluster-pruned top-n
+
+Builds synthetic clustered catalogs of growing size and compares exhaustive
+scoring with ``ClusterRetriever`` for both scoring functions used by the
+engines (ability match and cosine / hybrid).  For every size it reports the
+average candidate-set size (careers actually scored), recall against the
+exact top-n and mean latency per query.
+
+Usage (from backend/):
+    python -m ml.benchmark_retrieval [--sizes 1000,10000,100000] [--queries 50] [--top-n 5]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ml.retrieval import (  # noqa: E402
+    AbilityBoundStats,
+    ClusterGroups,
+    ClusterRetriever,
+    CosineBoundStats,
+    ability_match_bounds,
+    ability_match_scores,
+    cosine_bounds,
+    exact_top_k,
+    normalize,
+    normalize_rows,
+)
+
+ABILITY_DIMS = 15
+EMBEDDING_DIM = 64
+
+
+def make_catalog(size: int, rng: np.random.Generator):
+    """Careers scattered around ~sqrt(size) cluster prototypes."""
+    n_clusters = max(4, int(np.sqrt(size)))
+    codes = rng.integers(0, n_clusters, size)
+
+    # abilities: each prototype needs a handful of dimensions at a high level
+    prototypes = np.zeros((n_clusters, ABILITY_DIMS))
+    for c in range(n_clusters):
+        dims = rng.choice(ABILITY_DIMS, size=rng.integers(3, 7), replace=False)
+        prototypes[c, dims] = rng.uniform(5, 10, len(dims))
+    abilities = prototypes[codes] + rng.normal(0, 0.7, (size, ABILITY_DIMS)) * (prototypes[codes] > 0)
+    abilities = np.clip(abilities, 0, 10).astype(np.float32)
+
+    centres = normalize_rows(rng.normal(size=(n_clusters, EMBEDDING_DIM)))
+    embeddings = normalize_rows(centres[codes] + rng.normal(0, 0.05, (size, EMBEDDING_DIM)))
+    return codes, abilities, embeddings, centres
+
+
+def run_queries(name, queries, exact_fn, pruned_fn, top_n):
+    recalls, candidates, exact_ms, pruned_ms = [], [], [], []
+    for query in queries:
+        started = time.perf_counter()
+        expected = exact_fn(query)
+        exact_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        found, stats = pruned_fn(query)
+        pruned_ms.append((time.perf_counter() - started) * 1000)
+
+        recalls.append(len(set(expected) & set(found)) / max(1, min(top_n, len(expected))))
+        candidates.append(stats["candidates_scored"])
+    return {
+        "name": name,
+        "candidates": float(np.mean(candidates)),
+        "recall": float(np.mean(recalls)),
+        "exact_ms": float(np.mean(exact_ms)),
+        "pruned_ms": float(np.mean(pruned_ms)),
+    }
+
+
+def benchmark_size(size: int, n_queries: int, top_n: int, alpha: float, seed: int):
+    rng = np.random.default_rng(seed)
+    codes, abilities, embeddings, centres = make_catalog(size, rng)
+    positions = np.arange(size)
+
+    started = time.perf_counter()
+    groups = ClusterGroups.from_codes(codes)
+    ability_stats = AbilityBoundStats.build(abilities, groups)
+    unit_abilities = normalize_rows(abilities)
+    emb_stats = CosineBoundStats.build(embeddings, groups)
+    unit_stats = CosineBoundStats.build(unit_abilities, groups)
+    build_ms = (time.perf_counter() - started) * 1000
+    retriever = ClusterRetriever(groups)
+
+    users = rng.uniform(0, 10, (n_queries, ABILITY_DIMS))
+    # user texts land near some cluster of careers, like real quiz summaries
+    near = centres[rng.integers(0, len(centres), n_queries)]
+    user_embs = normalize_rows(near + rng.normal(0, 0.1, (n_queries, EMBEDDING_DIM)))
+
+    def ability_exact(i):
+        scores = ability_match_scores(users[i], abilities)[0]
+        return exact_top_k(scores, positions, top_n)[0]
+
+    def ability_pruned(i):
+        found, _, stats = retriever.search(
+            ability_match_bounds(users[i], ability_stats),
+            lambda pos: ability_match_scores(users[i], abilities[pos])[0],
+            top_n,
+        )
+        return found, stats
+
+    def hybrid_score(i, pos):
+        return alpha * (embeddings[pos] @ user_embs[i]) + (1 - alpha) * (unit_abilities[pos] @ normalize(users[i]))
+
+    def hybrid_exact(i):
+        return exact_top_k(hybrid_score(i, positions).astype(np.float64), positions, top_n)[0]
+
+    def hybrid_pruned(i):
+        bounds = (alpha * cosine_bounds(user_embs[i], emb_stats)
+                  + (1 - alpha) * np.maximum(cosine_bounds(normalize(users[i]), unit_stats), 0.0))
+        found, _, stats = retriever.search(bounds, lambda pos: hybrid_score(i, pos), top_n)
+        return found, stats
+
+    queries = range(n_queries)
+    return build_ms, len(groups), [
+        run_queries("ability", queries, ability_exact, ability_pruned, top_n),
+        run_queries("hybrid", queries, hybrid_exact, hybrid_pruned, top_n),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--alpha", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print("\n" + "=" * 86)
+    print("RETRIEVAL BENCHMARK: exact vs cluster-pruned")
+    print("=" * 86)
+    print(f"{'careers':>9} {'clusters':>8} {'engine':>8} {'scored':>10} {'scored %':>9} "
+          f"{'recall':>7} {'exact ms':>9} {'pruned ms':>10} {'build ms':>9}")
+    print("-" * 86)
+    for size in (int(s) for s in args.sizes.split(",")):
+        build_ms, n_groups, rows = benchmark_size(size, args.queries, args.top_n, args.alpha, args.seed)
+        for row in rows:
+            print(f"{size:>9} {n_groups:>8} {row['name']:>8} {row['candidates']:>10.0f} "
+                  f"{100 * row['candidates'] / size:>8.1f}% {row['recall']:>7.3f} "
+                  f"{row['exact_ms']:>9.2f} {row['pruned_ms']:>10.2f} {build_ms:>9.1f}")
+    print("=" * 86)
+
+
+if __name__ == "__main__":
+    main()
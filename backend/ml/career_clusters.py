@@ -0,0 +1,129 @@
+"""
+Persisted career cluster centroids.
+
+``cluster_careers`` fits k-means over ability vectors (or embeddings) and
+stores the centroids here so they can be reused without reclustering:
+
+* new careers are assigned to the nearest existing centroid
+  (``ClusterCentroids.assign``),
+* the recommendation engines can score centroids before careers.
+
+The artifact is a small ``.npz`` file in ``ML_MODELS_DIR``.
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+CENTROIDS_FILENAME = "career_centroids.npz"
+
+
+def default_centroids_path() -> str:
+    return os.path.join(settings.ML_MODELS_DIR, CENTROIDS_FILENAME)
+
+
+@dataclass
+class ClusterCentroids:
+    """Centroids of one clustering run and the cluster names they map to."""
+    centroids: np.ndarray          # (k, d) float32
+    names: List[str]               # cluster name per centroid row
+    space: str                     # 'ability' or 'embedding'
+    created_at: float = field(default_factory=time.time)
+    inertia: Optional[float] = None
+
+    @property
+    def dimension(self) -> int:
+        return int(self.centroids.shape[1])
+
+    def nearest(self, vectors: np.ndarray) -> np.ndarray:
+        """Index of the nearest centroid (squared euclidean, like k-means)."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        # |x - c|^2 = |x|^2 - 2 x.c + |c|^2 ; |x|^2 is constant per row
+        dists = -2.0 * vectors @ self.centroids.T + (self.centroids ** 2).sum(axis=1)
+        return np.argmin(dists, axis=1)
+
+    def assign(self, vectors: np.ndarray) -> List[str]:
+        """Cluster name of the nearest centroid for each row of ``vectors``."""
+        return [self.names[i] for i in self.nearest(vectors)]
+
+    def save(self, path: Optional[str] = None) -> str:
+        path = path or default_centroids_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(
+            path,
+            centroids=self.centroids.astype(np.float32),
+            names=np.array(self.names),
+            space=np.array(self.space),
+            created_at=np.array(self.created_at),
+            inertia=np.array(np.nan if self.inertia is None else self.inertia),
+        )
+        return path
+
+
+def load_centroids(path: Optional[str] = None) -> Optional[ClusterCentroids]:
+    """Load the persisted centroids, or None if no artifact exists."""
+    path = path or default_centroids_path()
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        inertia = float(data["inertia"])
+        return ClusterCentroids(
+            centroids=data["centroids"].astype(np.float32),
+            names=[str(n) for n in data["names"]],
+            space=str(data["space"]),
+            created_at=float(data["created_at"]),
+            inertia=None if np.isnan(inertia) else inertia,
+        )
+
+
+def make_kmeans(n_clusters: int, minibatch: bool = False, batch_size: int = 1024):
+    """KMeans for small catalogs, MiniBatchKMeans for large ones."""
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+
+    if minibatch:
+        return MiniBatchKMeans(
+            n_clusters=n_clusters, random_state=42, batch_size=batch_size, n_init=3
+        )
+    return KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+
+
+def _silhouette_for_k(X: np.ndarray, k: int, minibatch: bool, batch_size: int,
+                      sample_size: Optional[int]) -> Tuple[int, float]:
+    from sklearn.metrics import silhouette_score
+
+    labels = make_kmeans(k, minibatch, batch_size).fit_predict(X)
+    if len(set(labels)) < 2:
+        return k, -1.0
+    return k, float(silhouette_score(X, labels, sample_size=sample_size, random_state=42))
+
+
+def select_k(
+    X: np.ndarray,
+    k_values: Iterable[int],
+    minibatch: bool = False,
+    batch_size: int = 1024,
+    n_jobs: int = -1,
+    sample_size: Optional[int] = 10000,
+) -> Tuple[int, Dict[int, float]]:
+    """Pick the k with the best silhouette score, evaluating k's in parallel.
+
+    ``sample_size`` bounds the O(n^2) silhouette computation on large
+    catalogs.  Returns ``(best_k, {k: score})``.
+    """
+    from joblib import Parallel, delayed
+
+    k_values = [k for k in k_values if 2 <= k < len(X)]
+    if not k_values:
+        raise ValueError("No valid k in range for this many vectors")
+    if sample_size is not None and sample_size >= len(X):
+        sample_size = None
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_silhouette_for_k)(X, k, minibatch, batch_size, sample_size) for k in k_values
+    )
+    scores = dict(results)
+    best_k = max(scores, key=lambda k: (scores[k], -k))
+    return best_k, scores
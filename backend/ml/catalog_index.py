@@ -0,0 +1,254 @@
+"""
+In-memory catalog index shared by the recommendation engines.
+
+Every recommendation request used to re-read all careers from the database
+and convert their JSON vectors to numpy arrays.  ``CatalogIndex`` does that
+once per catalog version and keeps the results in process memory:
+
+* ``careers``      - active ``Career`` rows, ordered by name
+* ``abilities``    - (N, 15) float32 ability matrix
+* ``embeddings``   - (N, D) float32 L2-normalized embedding matrix (or None)
+* ``cluster_codes``- int array indexing into ``cluster_names``
+
+Career-career similarity (``similarity()``) for diversity reranking is
+computed for the reranked candidates only - a (C, C) block of the cached
+unit vectors, never the full (N, N) matrix.
+
+The catalog version is derived from the career table (row count and latest
+``updated_at``) plus a generation counter kept in the Django cache, so
+``bump_catalog_version()`` forces every process sharing the cache to rebuild.
+``get_catalog_index()`` re-checks the version at most every
+``CATALOG_INDEX_CHECK_SECONDS`` seconds.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from apps.careers.models import Career
+from ml.retrieval import SortedColumnIndex, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+ABILITY_DIMS = 15
+CATALOG_GENERATION_CACHE_KEY = "careers:catalog_generation"
+
+
+def current_catalog_version() -> str:
+    """Return a version string that changes whenever the catalog changes."""
+    agg = Career.objects.aggregate(count=Count("id"), last=Max("updated_at"))
+    last = agg["last"].timestamp() if agg["last"] else 0.0
+    generation = cache.get(CATALOG_GENERATION_CACHE_KEY, 0)
+    return f"{agg['count']}.{last:.6f}.{generation}"
+
+
+def bump_catalog_version() -> None:
+    """Invalidate every process's catalog index (and the local one immediately)."""
+    try:
+        cache.incr(CATALOG_GENERATION_CACHE_KEY)
+    except ValueError:
+        # key not set yet (or evicted)
+        cache.set(CATALOG_GENERATION_CACHE_KEY, 1, timeout=None)
+    _holder.mark_stale()
+
+
+class CatalogIndex:
+    """Numpy view of the active career catalog at one version."""
+
+    def __init__(self, careers: List[Career], version: str):
+        started = time.perf_counter()
+        self.version = version
+        self.careers = careers
+        self.size = len(careers)
+        self.position: Dict[str, int] = {str(c.id): i for i, c in enumerate(careers)}
+
+        # ability vectors; malformed rows stay zero and are masked out
+        self.abilities = np.zeros((self.size, ABILITY_DIMS), dtype=np.float32)
+        self.has_abilities = np.zeros(self.size, dtype=bool)
+        for i, career in enumerate(careers):
+            vec = career.ability_vector
+            if not vec:
+                continue
+            try:
+                row = np.asarray(vec, dtype=np.float32)
+            except (TypeError, ValueError):
+                continue
+            if row.shape == (ABILITY_DIMS,):
+                self.abilities[i] = row
+                self.has_abilities[i] = True
+
+        # embeddings, normalized so cosine similarity is a dot product
+        self.embeddings: Optional[np.ndarray] = None
+        self.has_embeddings = np.zeros(self.size, dtype=bool)
+        dim = next((len(c.embedding) for c in careers if c.embedding), 0)
+        if dim:
+            self.embeddings = np.zeros((self.size, dim), dtype=np.float32)
+            for i, career in enumerate(careers):
+                if career.embedding and len(career.embedding) == dim:
+                    self.embeddings[i] = career.embedding
+                    self.has_embeddings[i] = True
+            norms = np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+            np.divide(self.embeddings, norms, out=self.embeddings, where=norms > 0)
+
+        # integer cluster codes ('' is a valid cluster label)
+        names = sorted({c.cluster or "" for c in careers})
+        self.cluster_names: List[str] = names
+        lookup = {name: code for code, name in enumerate(names)}
+        self.cluster_codes = np.array([lookup[c.cluster or ""] for c in careers], dtype=np.int32)
+
+        # parsed market attributes for filters (NaN / -1 = unknown)
+        def column(field):
+            return np.array(
+                [np.nan if getattr(c, field, None) is None else getattr(c, field) for c in careers],
+                dtype=np.float32,
+            )
+        self.salary_min = column("salary_min")
+        self.salary_max = column("salary_max")
+        self.growth_pct = column("growth_pct")
+        self.education_level = np.nan_to_num(column("education_level"), nan=-1).astype(np.int16)
+
+        # lazily derived structures (retrieval groups, bound stats, ...)
+        self._derived: Dict[str, object] = {}
+        self._derived_lock = threading.RLock()  # factories may call derived()
+
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> "CatalogIndex":
+        """Load all active careers and build a fresh index."""
+        version = version or current_catalog_version()
+        careers = list(Career.objects.filter(is_active=True).order_by("name"))
+        index = cls(careers, version)
+        logger.info(
+            f"Built catalog index v{version}: {index.size} careers "
+            f"in {index.build_seconds * 1000:.1f} ms"
+        )
+        return index
+
+    def derived(self, key: str, factory):
+        """Compute ``factory()`` once per index version and cache it under ``key``.
+
+        Used for structures that only some engines need (cluster groups,
+        retrieval bounds, normalized matrices), so building the index stays
+        cheap and each structure is rebuilt automatically with the catalog.
+        """
+        value = self._derived.get(key)
+        if value is None:
+            with self._derived_lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = factory()
+                    self._derived[key] = value
+        return value
+
+    def unit_vectors(self, space: str) -> np.ndarray:
+        """Row-normalized ``'ability'`` or ``'embedding'`` matrix (zero rows if missing)."""
+        if space == "ability":
+            return self.derived("unit:ability", lambda: normalize_rows(self.abilities))
+        if space == "embedding":
+            if self.embeddings is None:
+                return np.zeros((self.size, 0), dtype=np.float32)
+            return self.embeddings
+        raise ValueError(f"Unknown vector space: {space!r}")
+
+    def attribute_mask(
+        self,
+        min_salary: Optional[float] = None,
+        min_growth: Optional[float] = None,
+        clusters: Optional[List[str]] = None,
+        max_education: Optional[int] = None,
+    ) -> Optional[np.ndarray]:
+        """Boolean mask of careers passing the given filters (None if no filter).
+
+        ``min_salary`` is compared with the top of the salary range ("can
+        reach"), careers with unknown values never pass a filter on them.
+        """
+        mask = None
+
+        def narrow(condition):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if min_salary is not None:
+            narrow(self.salary_max >= min_salary)
+        if min_growth is not None:
+            narrow(self.growth_pct >= min_growth)
+        if max_education is not None:
+            narrow((self.education_level >= 0) & (self.education_level <= max_education))
+        if clusters:
+            wanted = {name.lower() for name in clusters}
+            codes = [code for code, name in enumerate(self.cluster_names) if name.lower() in wanted]
+            narrow(np.isin(self.cluster_codes, codes))
+        return mask
+
+    def ability_ranges(self) -> SortedColumnIndex:
+        """Sorted ability columns for threshold filters such as creativity >= 7."""
+        return self.derived("ability_sorted", lambda: SortedColumnIndex(self.abilities, self.has_abilities))
+
+    def similarity(self, space: str, positions: np.ndarray) -> np.ndarray:
+        """Cosine similarity between the careers at ``positions`` (square block)."""
+        unit = self.unit_vectors(space)[positions]
+        return unit @ unit.T
+
+    def summary(self) -> Dict:
+        """Short description used by the health endpoints."""
+        return {
+            "version": self.version,
+            "size": self.size,
+            "with_abilities": int(self.has_abilities.sum()),
+            "with_embeddings": int(self.has_embeddings.sum()),
+            "clusters": len(self.cluster_names),
+            "load_seconds": round(self.build_seconds, 4),
+            "built_at": self.built_at,
+        }
+
+
+class _IndexHolder:
+    """Process-wide holder that rebuilds the index when the version moves."""
+
+    def __init__(self):
+        self._index: Optional[CatalogIndex] = None
+        self._checked_at = 0.0
+        self._stale = False
+        self._lock = threading.Lock()
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def peek(self) -> Optional[CatalogIndex]:
+        return self._index
+
+    def get(self) -> CatalogIndex:
+        interval = getattr(settings, "CATALOG_INDEX_CHECK_SECONDS", 5.0)
+        index = self._index
+        if index is not None and not self._stale and time.monotonic() - self._checked_at < interval:
+            return index
+        with self._lock:
+            if self._index is not None and not self._stale and time.monotonic() - self._checked_at < interval:
+                return self._index
+            self._stale = False
+            version = current_catalog_version()
+            if self._index is None or self._index.version != version:
+                self._index = CatalogIndex.build(version)
+            self._checked_at = time.monotonic()
+            return self._index
+
+
+_holder = _IndexHolder()
+
+
+def get_catalog_index() -> CatalogIndex:
+    """Return the current catalog index, rebuilding it if the catalog changed."""
+    return _holder.get()
+
+
+def peek_catalog_index() -> Optional[CatalogIndex]:
+    """Return the loaded index without touching the database (may be None)."""
+    return _holder.peek()
@@ -0,0 +1,51 @@
+"""
+MMR (maximal marginal relevance) diversity reranking.
+
+Picks items one at a time, each time taking the candidate with the best
+
+    lambda * relevance - (1 - lambda) * max similarity to the items already picked
+
+``lambda = 1`` is plain relevance order, lower values trade relevance for
+variety.  Unlike the old "one career per cluster" rule this always returns
+``k`` items (as long as there are ``k`` candidates), whatever the number of
+clusters.
+
+The reranker keeps a running "max similarity to the selection" vector and
+updates it with one similarity row per pick, so a request costs
+O(k * candidates) on top of the candidates' similarity block
+(``CatalogIndex.similarity``).
+"""
+
+import numpy as np
+
+
+def mmr_rerank(relevance: np.ndarray, similarity: np.ndarray, k: int, lambda_: float = 0.7) -> np.ndarray:
+    """Return the indices (into ``relevance``) of the ``k`` MMR picks, in pick order.
+
+    Args:
+        relevance: (C,) relevance score of each candidate
+        similarity: (C, C) pairwise similarity of the candidates
+        k: number of items to pick
+        lambda_: relevance weight in [0, 1]
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    k = min(k, len(relevance))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    lambda_ = float(np.clip(lambda_, 0.0, 1.0))
+    max_sim = np.full(len(relevance), -np.inf)
+    available = np.ones(len(relevance), dtype=bool)
+    picked = np.empty(k, dtype=np.int64)
+
+    for step in range(k):
+        if step == 0:
+            # nothing selected yet: the most relevant item wins
+            score = relevance
+        else:
+            score = lambda_ * relevance - (1.0 - lambda_) * max_sim
+        best = int(np.argmax(np.where(available, score, -np.inf)))
+        picked[step] = best
+        available[best] = False
+        np.maximum(max_sim, similarity[best], out=max_sim)
+    return picked
@@ -0,0 +1,176 @@
+"""
+Dynamic micro-batching for embedding models.
+
+SentenceTransformer models are much faster per sentence when they encode a
+batch than when they are called with one sentence at a time.  Concurrent
+recommendation requests each need exactly one user embedding, so this module
+puts a small queue in front of the model: requests are collected for up to
+``max_wait_ms`` milliseconds (or until ``max_batch_size`` items are waiting),
+encoded in a single ``model.encode`` call, and every caller's future is
+resolved with its own row of the result.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Collect single-text encode requests and run them as one batch.
+
+    ``model`` can be any object exposing ``encode(texts, ...)`` that returns a
+    2-D numpy array for a list input (SentenceTransformer does).  Extra keyword
+    arguments for ``encode`` can be passed through ``encode_kwargs``.
+
+    The worker thread is started lazily on the first submission and runs as
+    a daemon, so an idle batcher costs nothing.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        encode_kwargs: Optional[Dict] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.encode_kwargs = {"convert_to_numpy": True}
+        self.encode_kwargs.update(encode_kwargs or {})
+
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        # counters exported through ``stats()``
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._last_batch = 0
+        self._encode_seconds = 0.0
+        self._max_queue_depth = 0
+        self._batch_size_histogram: Dict[int, int] = {}
+
+    # ------------------------------------------------------------------
+    # public API
+    # ------------------------------------------------------------------
+    def submit(self, text: str) -> Future:
+        """Queue ``text`` for encoding and return a future for its vector."""
+        if self._closed:
+            raise RuntimeError("EmbeddingBatcher is closed")
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+        return future
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """Blocking helper: submit ``text`` and wait for its vector."""
+        return self.submit(text).result(timeout=timeout)
+
+    def stats(self) -> Dict:
+        """Return queue-depth and batch-size statistics."""
+        with self._stats_lock:
+            avg = (self._items / self._batches) if self._batches else 0.0
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(avg, 2),
+                "max_batch_size": self._max_batch,
+                "last_batch_size": self._last_batch,
+                "batch_size_histogram": dict(sorted(self._batch_size_histogram.items())),
+                "encode_seconds": round(self._encode_seconds, 4),
+                "config": {
+                    "max_batch_size": self.max_batch_size,
+                    "max_wait_ms": self.max_wait * 1000.0,
+                },
+            }
+
+    def close(self) -> None:
+        """Stop accepting work; the worker exits once the queue is drained."""
+        self._closed = True
+        if self._worker is not None:
+            self._queue.put(None)
+
+    # ------------------------------------------------------------------
+    # worker
+    # ------------------------------------------------------------------
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> Optional[List[Tuple[str, Future]]]:
+        """Block for the first item, then gather more until full or timed out."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # re-post the sentinel so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # callers that gave up (cancelled futures) don't need encoding
+            batch = [(text, fut) for text, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            texts = [text for text, _ in batch]
+            started = time.perf_counter()
+            try:
+                vectors = np.asarray(self.model.encode(texts, **self.encode_kwargs))
+            except Exception as exc:  # propagate the failure to every caller
+                logger.warning(f"Batched encode of {len(texts)} texts failed: {exc}")
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                continue
+            elapsed = time.perf_counter() - started
+
+            for row, (_, fut) in zip(vectors, batch):
+                fut.set_result(row)
+
+            size = len(batch)
+            with self._stats_lock:
+                self._batches += 1
+                self._items += size
+                self._last_batch = size
+                self._max_batch = max(self._max_batch, size)
+                self._encode_seconds += elapsed
+                self._batch_size_histogram[size] = self._batch_size_histogram.get(size, 0) + 1
@@ -18,6 +18,8 @@ from dataclasses import dataclass
 from pathlib import Path
 import logging
 
+from ml.retrieval import exact_top_k
+
 logger = logging.getLogger(__name__)
 
 # ============================================================================
@@ -59,6 +61,9 @@ FEATURE_NAMES = [
     'social_interaction', 'independence', 'work_life_commitment'
 ]
 
+# display names used in explanations, e.g. 'math_quantitative' -> 'Math Quantitative'
+FEATURE_LABELS = [name.replace('_', ' ').title() for name in FEATURE_NAMES]
+
 assert len(FEATURE_NAMES) == 15, "Must have exactly 15 features"
 
 # ============================================================================
@@ -312,12 +317,22 @@ class UserFeatureExtractor:
 # ============================================================================
 
 class RecommendationEngine:
-    """Similarity-based career recommendation engine."""
+    """Similarity-based career recommendation engine.
+
+    Career vectors are stacked into a row-normalized matrix once, so a request
+    is one matrix-vector product plus a partial top-k selection; alignment
+    labels and explanations are only computed for the returned careers.
+    """
+    
+    # ``np.digitize`` bins of (user - career) and their labels
+    ALIGNMENT_BINS = np.array([-1.5, -0.5, 0.5, 1.5])
+    ALIGNMENT_LABELS = np.array(["critical_gap", "low_match", "good_match", "good_exceed", "high_exceed"])
     
     def __init__(self):
         """Initialize with career database."""
         self.careers: Dict[str, Career] = {}
         self._load_careers()
+        self._build_matrix()
     
     def _load_careers(self):
         """Load careers from data dictionary."""
@@ -333,6 +348,18 @@ class RecommendationEngine:
             )
             self.careers[name] = career
     
+    def _build_matrix(self):
+        """Precompute the career matrices used for scoring and explanations."""
+        self.career_names = list(self.careers)
+        vectors = np.array([c.to_vector() for c in self.careers.values()], dtype=float).reshape(-1, len(FEATURE_NAMES))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        # row-normalized for cosine similarity (all-zero rows stay zero)
+        self.career_matrix = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        # raw requirements as the explanations read them (missing feature = 5)
+        self.career_requirements = np.array(
+            [[c.features.get(f, 5) for f in FEATURE_NAMES] for c in self.careers.values()], dtype=float
+        ).reshape(-1, len(FEATURE_NAMES))
+    
     def recommend(self, user_features: Dict[str, float], top_n: int = 5) -> List[Recommendation]:
         """
         Generate top-N career recommendations for user.
@@ -344,131 +371,114 @@ class RecommendationEngine:
         Returns:
             List of Recommendation objects sorted by compatibility
         """
-        # Convert user features to normalized vector
-        user_vector = UserFeatureExtractor.features_to_vector(user_features)
-        
-        # Compute similarity with each career
-        similarities = []
-        for career_name, career in self.careers.items():
-            career_vector = career.to_vector()
-            # Normalize career vector
-            norm = np.linalg.norm(career_vector)
-            if norm > 0:
-                career_vector = career_vector / norm
-            
-            # Cosine similarity
-            similarity = np.dot(user_vector, career_vector)
-            compatibility = max(0, similarity * 100)  # Scale to 0-100
-            
-            similarities.append((career_name, compatibility, user_vector, career_vector))
+        # similarity treats a missing feature as 0, the explanations as 5
+        scoring = np.array([[user_features.get(f, 0) for f in FEATURE_NAMES]], dtype=float)
+        explaining = np.array([[user_features.get(f, 5) for f in FEATURE_NAMES]], dtype=float)
+        recommendations = self._recommend_rows(scoring, explaining, top_n)[0]
+        logger.info(f"Generated {len(recommendations)} recommendations")
+        return recommendations
+    
+    def recommend_many(self, user_matrix: np.ndarray, top_n: int = 5) -> List[List[Recommendation]]:
+        """
+        Recommendations for many users at once.
         
-        # Sort by compatibility descending
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        Args:
+            user_matrix: (U, 15) feature scores, columns in ``FEATURE_NAMES`` order
+            top_n: Number of recommendations per user
         
-        # Generate recommendations with explanations
-        recommendations = []
-        for rank, (career_name, compatibility, user_vec, career_vec) in enumerate(similarities[:top_n], 1):
-            career = self.careers[career_name]
-            explanation = self._generate_explanation(
-                career_name, compatibility, user_features, career.features
-            )
-            feature_alignment = self._compute_alignment(user_features, career.features)
-            
-            rec = Recommendation(
-                rank=rank,
-                career=career_name,
-                compatibility_score=round(compatibility, 1),
-                explanation=explanation,
-                feature_alignment=feature_alignment,
-                salary_range=career.salary_range,
-            )
-            recommendations.append(rec)
+        Returns:
+            One list of Recommendation objects per row, as ``recommend`` would return
+        """
+        user_matrix = np.atleast_2d(np.asarray(user_matrix, dtype=float))
+        results = self._recommend_rows(user_matrix, user_matrix, top_n)
+        logger.info(f"Generated recommendations for {len(results)} users")
+        return results
+    
+    def _recommend_rows(self, scoring: np.ndarray, explaining: np.ndarray, top_n: int) -> List[List[Recommendation]]:
+        norms = np.linalg.norm(scoring, axis=1, keepdims=True)
+        unit = np.divide(scoring, norms, out=np.zeros_like(scoring), where=norms > 0)
+        # cosine similarity with every career, scaled to 0-100
+        compatibility = np.maximum(0.0, unit @ self.career_matrix.T * 100)
+        positions = np.arange(len(self.career_names))
         
-        logger.info(f"Generated {len(recommendations)} recommendations")
-        return recommendations
+        results = []
+        for user, scores in zip(explaining, compatibility):
+            top, top_scores = exact_top_k(scores, positions, top_n)
+            names = [self.career_names[pos] for pos in top]
+            requirements = self.career_requirements[top]
+            labels = self._classify_alignment(user, requirements)
+            explanations = self._generate_explanations(names, top_scores, user, requirements)
+            recommendations = []
+            for rank, (name, compatibility_score, row_labels, explanation) in enumerate(
+                zip(names, top_scores, labels, explanations), 1
+            ):
+                career = self.careers[name]
+                recommendations.append(Recommendation(
+                    rank=rank,
+                    career=career.name,
+                    compatibility_score=round(float(compatibility_score), 1),
+                    explanation=explanation,
+                    feature_alignment=dict(zip(FEATURE_NAMES, row_labels.tolist())),
+                    salary_range=career.salary_range,
+                ))
+            results.append(recommendations)
+        return results
+    
+    def _classify_alignment(self, user: np.ndarray, requirements: np.ndarray) -> np.ndarray:
+        """(K, 15) labels: high_exceed / good_exceed / good_match / low_match / critical_gap."""
+        return self.ALIGNMENT_LABELS[np.digitize(user - requirements, self.ALIGNMENT_BINS)]
     
     def _compute_alignment(self, user_features: Dict[str, float], 
                           career_features: Dict[str, float]) -> Dict[str, str]:
         """Classify each feature as high/good/low/critical match."""
-        alignment = {}
-        for feature_name in FEATURE_NAMES:
-            user_score = user_features.get(feature_name, 5)
-            career_score = career_features.get(feature_name, 5)
-            
-            # Compute difference
-            diff = user_score - career_score
-            
-            # Classify
-            if diff >= 1.5:  # User significantly above career requirement
-                alignment[feature_name] = "high_exceed"
-            elif diff >= 0.5:  # User above requirement
-                alignment[feature_name] = "good_exceed"
-            elif diff >= -0.5:  # Well matched
-                alignment[feature_name] = "good_match"
-            elif diff >= -1.5:  # Below requirement
-                alignment[feature_name] = "low_match"
-            else:  # Significantly below
-                alignment[feature_name] = "critical_gap"
-        
-        return alignment
+        user = np.array([user_features.get(f, 5) for f in FEATURE_NAMES], dtype=float)
+        career = np.array([career_features.get(f, 5) for f in FEATURE_NAMES], dtype=float)
+        return dict(zip(FEATURE_NAMES, self._classify_alignment(user, career[None, :])[0].tolist()))
     
     def _generate_explanation(self, career_name: str, compatibility: float,
-                             user_features: Dict[str, float],
-                             career_features: Dict[str, float]) -> str:
-        """Generate human-readable explanation of the recommendation."""
-        
-        # Find top matching and mismatching features
-        feature_scores = {}
-        for feature_name in FEATURE_NAMES:
-            user_score = user_features.get(feature_name, 5)
-            career_score = career_features.get(feature_name, 5)
-            # Absolute alignment (higher better)
-            alignment = 10 - abs(user_score - career_score)
-            feature_scores[feature_name] = {
-                'user': user_score,
-                'career': career_score,
-                'alignment': alignment
-            }
-        
-        # Identify top strengths (high alignment)
-        top_matches = sorted(
-            feature_scores.items(), 
-            key=lambda x: x[1]['alignment'], 
-            reverse=True
-        )[:3]
+                             user: np.ndarray, career: np.ndarray) -> str:
+        """Generate human-readable explanation of the recommendation.
         
-        # Identify areas to develop (low alignment)
-        gaps = sorted(
-            feature_scores.items(), 
-            key=lambda x: x[1]['alignment']
-        )[:2]
+        ``user`` and ``career`` are feature scores in ``FEATURE_NAMES`` order.
+        """
+        return self._generate_explanations([career_name], [compatibility], user, career[None, :])[0]
+    
+    def _generate_explanations(self, career_names: List[str], compatibilities,
+                               user: np.ndarray, careers: np.ndarray) -> List[str]:
+        """Explanations for several careers (rows of ``careers``) and one user."""
+        # Absolute alignment (higher better), one row per career
+        alignment = 10 - np.abs(user - careers)
+        features = np.broadcast_to(np.arange(len(FEATURE_NAMES)), alignment.shape)
         
-        # Build explanation
-        explanation_parts = [
-            f"{career_name} is a strong match ({compatibility:.0f}% compatibility) for you."
-        ]
+        # Top strengths (high alignment) and areas to develop (low alignment)
+        # for all rows at once; ties keep feature order like a stable sort
+        top_matches = np.lexsort((features, -alignment), axis=-1)[:, :3]
+        gaps = np.lexsort((features, alignment), axis=-1)[:, :2]
+        below = user < careers
         
-        # Highlight strengths
-        strengths = []
-        for feature_name, scores in top_matches:
-            if scores['alignment'] > 7:
-                strengths.append(f"{feature_name.replace('_', ' ').title()}")
-        if strengths:
-            explanation_parts.append(
-                f"Your strengths in {', '.join(strengths)} align great with this role."
-            )
-        
-        # Mention development areas
-        dev_areas = []
-        for feature_name, scores in gaps:
-            if scores['alignment'] < 6 and scores['user'] < scores['career']:
-                dev_areas.append(f"{feature_name.replace('_', ' ').title()}")
-        if dev_areas:
-            explanation_parts.append(
-                f"Consider developing: {', '.join(dev_areas)}."
-            )
-        
-        return " ".join(explanation_parts)
+        explanations = []
+        for row, (career_name, compatibility) in enumerate(zip(career_names, compatibilities)):
+            # Build explanation
+            explanation_parts = [
+                f"{career_name} is a strong match ({compatibility:.0f}% compatibility) for you."
+            ]
+            
+            # Highlight strengths
+            strengths = [FEATURE_LABELS[f] for f in top_matches[row] if alignment[row, f] > 7]
+            if strengths:
+                explanation_parts.append(
+                    f"Your strengths in {', '.join(strengths)} align great with this role."
+                )
+            
+            # Mention development areas
+            dev_areas = [FEATURE_LABELS[f] for f in gaps[row] if alignment[row, f] < 6 and below[row, f]]
+            if dev_areas:
+                explanation_parts.append(
+                    f"Consider developing: {', '.join(dev_areas)}."
+                )
+            
+            explanations.append(" ".join(explanation_parts))
+        return explanations
 
 
 # ============================================================================
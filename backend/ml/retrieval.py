@@ -0,0 +1,384 @@
+"""
+Vectorized scoring and coarse-to-fine (cluster-pruned) retrieval.
+
+The exact scorers score every career.  For large catalogs ``ClusterRetriever``
+first computes an *upper bound* of the score for each cluster of careers,
+visits clusters in decreasing bound order, scores only their members exactly,
+and stops as soon as the next cluster's bound cannot beat the current k-th
+best score.  Because the bounds are true upper bounds, the returned top-k is
+the same as exhaustive scoring (up to ties).
+
+Two bounds are provided:
+
+* ``ability_match_bounds`` for the ability-coverage score used by
+  ``AbilityRecommendationService`` (per-dimension minimum requirement of the
+  cluster members),
+* ``cosine_bounds`` for cosine similarity (cluster centre plus angular
+  radius; used by the hybrid engine for both embeddings and abilities).
+
+Everything here is plain numpy so it can be benchmarked without Django
+(see ``ml/benchmark_retrieval.py``).
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+STRENGTH_THRESHOLD = 0.75
+STRENGTH_BOOST = 1.1
+COVERAGE_RATIO = 0.8
+
+
+# ---------------------------------------------------------------------------
+# exact scorers
+# ---------------------------------------------------------------------------
+def ability_match_scores(user: np.ndarray, careers: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Score one user against many careers (vectorized ability matching).
+
+    Mirrors ``AbilityRecommendationService.calculate_ability_match``: for
+    every dimension a career needs (value > 0) the user scores
+    ``min(1, user / max(1, need))``; the match is the mean over needed
+    dimensions (0.5 if none).  Matches above 0.75 get a 10% strength boost.
+
+    Returns ``(boosted_match, coverage, is_strength)``, each of shape (N,).
+    """
+    user = np.clip(np.asarray(user, dtype=np.float64), 0, None)
+    careers = np.asarray(careers, dtype=np.float64)
+    need = careers > 0
+    ratio = np.minimum(1.0, user / np.maximum(1.0, careers))
+    counts = need.sum(axis=1)
+    sums = np.where(need, ratio, 0.0).sum(axis=1)
+    match = np.divide(sums, counts, out=np.full(len(careers), 0.5), where=counts > 0)
+
+    meets = need & (user >= careers * COVERAGE_RATIO)
+    coverage = meets.sum(axis=1) / np.maximum(1, counts)
+
+    is_strength = match > STRENGTH_THRESHOLD
+    boosted = np.where(is_strength, np.minimum(1.0, match * STRENGTH_BOOST), match)
+    return boosted, coverage, is_strength
+
+
+def ability_match_matrix(
+    users: np.ndarray, careers: np.ndarray, block_elements: int = 4_000_000
+) -> np.ndarray:
+    """Boosted ``ability_match_scores`` of many users at once, shape (M, N).
+
+    The per-dimension ``min(1, user / need)`` is not a dot product, so the
+    (users x careers x dimensions) ratios are computed by broadcasting, in
+    blocks of users holding at most ``block_elements`` values.  Row ``i``
+    equals ``ability_match_scores(users[i], careers)[0]``.
+    """
+    users = np.clip(np.asarray(users, dtype=np.float64), 0, None)
+    careers = np.asarray(careers, dtype=np.float64)
+    need = careers > 0
+    counts = need.sum(axis=1)
+    caps = np.maximum(1.0, careers)
+    out = np.empty((len(users), len(careers)))
+    step = max(1, block_elements // max(1, careers.size))
+    for start in range(0, len(users), step):
+        ratio = np.minimum(1.0, users[start:start + step, None, :] / caps)
+        sums = np.where(need, ratio, 0.0).sum(axis=2)
+        match = np.divide(sums, counts, out=np.full(sums.shape, 0.5), where=counts > 0)
+        out[start:start + step] = np.where(
+            match > STRENGTH_THRESHOLD, np.minimum(1.0, match * STRENGTH_BOOST), match
+        )
+    return out
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows; all-zero rows stay zero."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def normalize(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+# ---------------------------------------------------------------------------
+# cluster grouping and bounds
+# ---------------------------------------------------------------------------
+@dataclass
+class ClusterGroups:
+    """Items reordered so each cluster is a contiguous slice."""
+    order: np.ndarray    # item positions sorted by cluster
+    starts: np.ndarray   # slice start of each group in ``order``
+    ends: np.ndarray     # slice end of each group in ``order``
+    codes: np.ndarray    # cluster code of each group
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, positions: Optional[np.ndarray] = None) -> "ClusterGroups":
+        """Group ``positions`` (default: all items) by their cluster code."""
+        codes = np.asarray(codes)
+        if positions is None:
+            positions = np.arange(len(codes))
+        order = positions[np.argsort(codes[positions], kind="stable")]
+        sorted_codes = codes[order]
+        if len(order):
+            starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        ends = np.r_[starts[1:], len(order)].astype(np.int64)
+        return cls(order=order, starts=starts, ends=ends, codes=sorted_codes[starts])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def members(self, group: int) -> np.ndarray:
+        return self.order[self.starts[group]:self.ends[group]]
+
+
+@dataclass
+class AbilityBoundStats:
+    """Per-group summary for ``ability_match_bounds``."""
+    min_need: np.ndarray      # (G, D) min requirement over members needing d (inf if none)
+    min_count: np.ndarray     # (G,) fewest needed dimensions of any member
+    any_zero_need: np.ndarray  # (G,) some member needs nothing (scores 0.5)
+
+    @classmethod
+    def build(cls, abilities: np.ndarray, groups: ClusterGroups) -> "AbilityBoundStats":
+        abilities = np.asarray(abilities, dtype=np.float64)
+        dims = abilities.shape[1] if abilities.ndim == 2 else 0
+        min_need = np.full((len(groups), dims), np.inf)
+        min_count = np.zeros(len(groups), dtype=np.int64)
+        any_zero = np.zeros(len(groups), dtype=bool)
+        for g in range(len(groups)):
+            block = abilities[groups.members(g)]
+            need = block > 0
+            min_need[g] = np.where(need, block, np.inf).min(axis=0)
+            counts = need.sum(axis=1)
+            any_zero[g] = bool((counts == 0).any())
+            positive = counts[counts > 0]
+            min_count[g] = positive.min() if len(positive) else 0
+        return cls(min_need=min_need, min_count=min_count, any_zero_need=any_zero)
+
+
+def ability_match_bounds(user: np.ndarray, stats: AbilityBoundStats) -> np.ndarray:
+    """Upper bound of ``ability_match_scores`` for every group.
+
+    Each member's per-dimension term is at most ``min(1, u / max(1, c_min))``
+    where ``c_min`` is the smallest requirement in the group.  A member
+    needing ``m >= min_count`` dimensions averages ``m`` such terms, which is
+    at most the mean of the ``min_count`` largest ones.
+    """
+    user = np.clip(np.asarray(user, dtype=np.float64), 0, None)
+    needed = np.isfinite(stats.min_need)
+    term = np.where(needed, np.minimum(1.0, user / np.maximum(1.0, np.where(needed, stats.min_need, 1.0))), -np.inf)
+    term_sorted = -np.sort(-term, axis=1)             # descending, -inf last
+    term_sorted = np.where(np.isfinite(term_sorted), term_sorted, 0.0)
+    cumulative = np.cumsum(term_sorted, axis=1)
+    k = np.maximum(stats.min_count, 1)
+    bounds = cumulative[np.arange(len(k)), np.minimum(k, term.shape[1]) - 1] / k
+    bounds = np.where(stats.min_count > 0, bounds, 0.0)
+    bounds = np.where(stats.any_zero_need, np.maximum(bounds, 0.5), bounds)
+    return np.where(bounds > STRENGTH_THRESHOLD, np.minimum(1.0, bounds * STRENGTH_BOOST), bounds)
+
+
+@dataclass
+class CosineBoundStats:
+    """Per-group unit centre and angular radius for ``cosine_bounds``."""
+    centers: np.ndarray   # (G, D) unit vectors
+    radii: np.ndarray     # (G,) max angle (radians) between centre and members
+
+    @classmethod
+    def build(cls, unit_vectors: np.ndarray, groups: ClusterGroups,
+              valid: Optional[np.ndarray] = None) -> "CosineBoundStats":
+        """``unit_vectors`` must be row-normalized; ``valid`` masks missing rows."""
+        dims = unit_vectors.shape[1]
+        centers = np.zeros((len(groups), dims), dtype=np.float32)
+        radii = np.full(len(groups), np.pi, dtype=np.float64)
+        for g in range(len(groups)):
+            members = groups.members(g)
+            if valid is not None:
+                members = members[valid[members]]
+            if not len(members):
+                continue
+            block = unit_vectors[members]
+            center = normalize(block.mean(axis=0))
+            if not center.any():
+                continue
+            cosines = np.clip(block @ center, -1.0, 1.0)
+            centers[g] = center
+            radii[g] = float(np.arccos(cosines.min()))
+        return cls(centers=centers, radii=radii)
+
+
+def cosine_bounds(unit_query: np.ndarray, stats: CosineBoundStats) -> np.ndarray:
+    """Upper bound of ``cos(query, member)`` for every group.
+
+    By the triangle inequality on the sphere the angle to any member is at
+    least ``angle(query, centre) - radius``.
+    """
+    cos_center = np.clip(stats.centers @ unit_query, -1.0, 1.0)
+    angle = np.arccos(cos_center) - stats.radii - 1e-6
+    return np.cos(np.clip(angle, 0.0, np.pi))
+
+
+# ---------------------------------------------------------------------------
+# coarse-to-fine search
+# ---------------------------------------------------------------------------
+class ClusterRetriever:
+    """Exact top-k search that skips clusters whose bound can't compete."""
+
+    def __init__(self, groups: ClusterGroups):
+        self.groups = groups
+
+    def search(
+        self,
+        bounds: np.ndarray,
+        score_fn: Callable[[np.ndarray], np.ndarray],
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """Return ``(positions, scores, stats)`` of the exact top-k items.
+
+        ``score_fn(positions)`` scores a subset of items exactly.  ``mask``
+        (boolean over item positions) excludes items up front.
+        """
+        visit = np.argsort(-bounds, kind="stable")
+        best_pos = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float64)
+        scored = groups_visited = 0
+
+        for g in visit:
+            if len(best_scores) >= k and bounds[g] < best_scores[k - 1]:
+                break
+            members = self.groups.members(g)
+            if mask is not None:
+                members = members[mask[members]]
+            if not len(members):
+                continue
+            groups_visited += 1
+            scores = np.asarray(score_fn(members), dtype=np.float64)
+            scored += len(members)
+            best_pos = np.concatenate([best_pos, members])
+            best_scores = np.concatenate([best_scores, scores])
+            # keep the candidate list sorted by (-score, position) and at most k long
+            order = np.lexsort((best_pos, -best_scores))[:k]
+            best_pos, best_scores = best_pos[order], best_scores[order]
+
+        stats = {
+            "groups_total": len(self.groups),
+            "groups_visited": groups_visited,
+            "candidates_scored": scored,
+        }
+        return best_pos, best_scores, stats
+
+
+def exact_top_k(scores: np.ndarray, positions: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k of already computed scores, ordered by (-score, position)."""
+    if k <= 0:
+        return positions[:0], scores[:0]
+    if k < len(scores):
+        part = np.argpartition(-scores, k - 1)[:k]
+        threshold = scores[part].min()
+        part = np.flatnonzero(scores >= threshold)
+    else:
+        part = np.arange(len(scores))
+    order = part[np.lexsort((positions[part], -scores[part]))][:k]
+    return positions[order], scores[order]
+
+
+def grouped_top_k(
+    scores: np.ndarray, groups: ClusterGroups, k: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Top-k of every group in one pass over scores laid out in ``groups.order``.
+
+    ``scores[i]`` is the score of item ``groups.order[i]``; items scored
+    ``-inf`` (e.g. filtered out) are skipped and groups left empty are dropped.
+    Groups come ordered by their best score (``np.maximum.reduceat`` over the
+    contiguous slices), members by (-score, position).
+
+    Returns ``(group, positions, scores)``, one entry per kept item, where
+    ``group`` indexes ``groups.codes``.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if not len(groups) or k <= 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    sizes = groups.ends - groups.starts
+    group_of = np.repeat(np.arange(len(groups)), sizes)
+
+    best = np.maximum.reduceat(scores, groups.starts)
+    group_rank = np.empty(len(groups), dtype=np.int64)
+    group_rank[np.lexsort((groups.codes, -best))] = np.arange(len(groups))
+
+    # sort within each slice; the slice offset turns order into in-group rank
+    order = np.lexsort((groups.order, -scores, group_of))
+    rank = np.arange(len(order)) - groups.starts[group_of[order]]
+    kept = order[(rank < k) & np.isfinite(scores[order])]
+    kept = kept[np.argsort(group_rank[group_of[kept]], kind="stable")]
+    return group_of[kept], groups.order[kept], scores[kept]
+
+
+def blocked_knn(unit_vectors: np.ndarray, k: int, block_size: int = 1024):
+    """Yield ``(rows, neighbours, similarities)`` of each row's k nearest rows.
+
+    Cosine similarity of row-normalized vectors, computed ``block_size`` rows
+    at a time so memory stays at O(block_size * N) instead of O(N^2).  A row
+    is never its own neighbour.  ``neighbours`` and ``similarities`` have
+    shape (len(rows), min(k, N - 1)), best first.
+    """
+    n = len(unit_vectors)
+    k = min(k, n - 1)
+    if k <= 0:
+        return
+    for start in range(0, n, block_size):
+        rows = np.arange(start, min(start + block_size, n))
+        sims = unit_vectors[rows] @ unit_vectors.T
+        sims[np.arange(len(rows)), rows] = -np.inf
+        part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        part_sims = np.take_along_axis(sims, part, axis=1)
+        order = np.argsort(-part_sims, axis=1, kind="stable")
+        yield rows, np.take_along_axis(part, order, axis=1), np.take_along_axis(part_sims, order, axis=1)
+
+
+# ---------------------------------------------------------------------------
+# range queries
+# ---------------------------------------------------------------------------
+class SortedColumnIndex:
+    """Per-column sorted values and argsort permutations of a matrix.
+
+    ``range_positions(d, low, high)`` is two ``searchsorted`` calls on column
+    ``d``; ``query`` intersects several column ranges as boolean bitmaps,
+    starting from the most selective one.
+    """
+
+    def __init__(self, matrix: np.ndarray, valid: Optional[np.ndarray] = None):
+        matrix = np.asarray(matrix)
+        self.size = len(matrix)
+        rows = np.arange(self.size) if valid is None else np.flatnonzero(valid)
+        values = matrix[rows]
+        order = np.argsort(values, axis=0, kind="stable")
+        self.values = np.ascontiguousarray(np.take_along_axis(values, order, axis=0).T)  # (D, n)
+        self.order = np.ascontiguousarray(rows[order].T)                                 # (D, n)
+        self.rows = rows
+
+    def range_positions(self, dim: int, low: Optional[float] = None, high: Optional[float] = None) -> np.ndarray:
+        """Positions with ``low <= value <= high`` in column ``dim`` (bounds optional)."""
+        column = self.values[dim]
+        start = 0 if low is None else int(np.searchsorted(column, low, side="left"))
+        stop = len(column) if high is None else int(np.searchsorted(column, high, side="right"))
+        return self.order[dim][start:max(start, stop)]
+
+    def query(self, ranges: Dict[int, Tuple[Optional[float], Optional[float]]]) -> np.ndarray:
+        """Boolean mask of rows inside every ``{dim: (low, high)}`` range."""
+        mask = np.zeros(self.size, dtype=bool)
+        if not ranges:
+            mask[self.rows] = True
+            return mask
+        parts = sorted(
+            (self.range_positions(dim, low, high) for dim, (low, high) in ranges.items()), key=len
+        )
+        mask[parts[0]] = True
+        for positions in parts[1:]:
+            if not mask.any():
+                break
+            other = np.zeros(self.size, dtype=bool)
+            other[positions] = True
+            mask &= other
+        return mask
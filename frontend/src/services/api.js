@@ -39,6 +39,21 @@ export const quizAPI = {
     }
   },
 
+  // Submits the answers and returns the recommendations in one request
+  submitAndRecommend: async (sessionId, answers, topN = 5) => {
+    try {
+      const response = await api.post('/quiz/submit-and-recommend/', {
+        session_id: sessionId,
+        answers: answers,
+        top_n: topN,
+      })
+      return response.data
+    } catch (error) {
+      console.error('Error submitting quiz:', error)
+      throw error
+    }
+  },
+
   getSubmission: async (sessionId) => {
     try {
       const response = await api.get(`/quiz/submission/${sessionId}/`)